@@ -0,0 +1,32 @@
+# Generated by Django 2.0.8 on 2018-09-14 08:27
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from saleor.search.vectors import get_user_search_vector, update_search_vectors
+
+
+def fill_search_vectors(apps, schema_editor):
+    User = apps.get_model('account', 'User')
+    update_search_vectors(User.objects.all(), get_user_search_vector())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0023_auto_20180719_0520'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='user_search_gin'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,8 @@ import uuid
 from django.conf import settings
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin)
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.db.models import Q
 from django.forms.models import model_to_dict
@@ -122,6 +124,9 @@ class User(PermissionsMixin, AbstractBaseUser):
     default_billing_address = models.ForeignKey(
         Address, related_name='+', null=True, blank=True,
         on_delete=models.SET_NULL)
+    # kept up to date by `saleor.search.signals` for full text search
+    search_vector = SearchVectorField(
+        blank=True, null=True, editable=False)
 
     USERNAME_FIELD = 'email'
 
@@ -138,6 +143,7 @@ class User(PermissionsMixin, AbstractBaseUser):
             (
                 'impersonate_users', pgettext_lazy(
                     'Permission description', 'Impersonate customers.')))
+        indexes = [GinIndex(fields=['search_vector'], name='user_search_gin')]
 
     def get_full_name(self):
         return self.email
@@ -12,6 +12,7 @@ from measurement.measures import Weight
 
 from ..account.models import Address
 from ..core.utils.taxes import ZERO_TAXED_MONEY
+from ..core.utils.translations import prefetch_translations
 from ..shipping.models import ShippingMethod
 
 CENTS = Decimal('0.01')
@@ -26,11 +27,12 @@ class CartQueryset(models.QuerySet):
         Prefetches additional data from the database to avoid the n+1 queries
         problem.
         """
-        return self.prefetch_related(
-            'lines__variant__translations',
-            'lines__variant__product__translations',
+        queryset = self.prefetch_related(
             'lines__variant__product__images',
             'lines__variant__product__product_type__product_attributes__values')  # noqa
+        return prefetch_translations(
+            queryset, 'lines__variant__translations',
+            'lines__variant__product__translations')
 
 
 class Cart(models.Model):
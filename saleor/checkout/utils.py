@@ -23,7 +23,7 @@ from ..discount import VoucherType
 from ..discount.models import NotApplicable, Voucher
 from ..discount.utils import (
     get_products_voucher_discount, get_shipping_voucher_discount,
-    get_value_voucher_discount, increase_voucher_usage)
+    get_value_voucher_discount, redeem_voucher)
 from ..order.models import Order
 from ..shipping import ShippingMethodType
 from .forms import (
@@ -909,19 +909,10 @@ def clear_shipping_method(cart):
 
 def _process_voucher_data_for_order(cart):
     """Fetch, process and return voucher/discount data from cart."""
-    vouchers = Voucher.objects.active(date=date.today()).select_for_update()
-    voucher = get_voucher_for_cart(cart, vouchers)
-
-    if cart.voucher_code and not voucher:
-        msg = pgettext(
-            'Voucher not applicable',
-            'Voucher expired in meantime. Order placement aborted.')
-        raise NotApplicable(msg)
-
-    if not voucher:
+    if not cart.voucher_code:
         return {}
 
-    increase_voucher_usage(voucher)
+    voucher = redeem_voucher(cart.voucher_code, date.today())
     return {
         'voucher': voucher,
         'discount_amount': cart.discount_amount,
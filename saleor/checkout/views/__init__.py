@@ -6,6 +6,7 @@ from django.template.response import TemplateResponse
 from ...account.forms import LoginForm
 from ...core.utils import (
     format_money, get_user_shipping_country, to_local_currency)
+from ...core.utils.translations import prefetch_translations
 from ...product.models import ProductVariant
 from ...shipping.utils import get_shipping_price_estimate
 from ..forms import CartShippingMethodForm, CountryForm, ReplaceCartLineForm
@@ -110,11 +111,11 @@ def cart_index(request, cart):
 
     lines = cart.lines.select_related('variant__product__product_type')
     lines = lines.prefetch_related(
-        'variant__translations', 'variant__product__translations',
-        'variant__product__images',
-        'variant__product__product_type__variant_attributes__translations',
-        'variant__images',
+        'variant__product__images', 'variant__images',
         'variant__product__product_type__variant_attributes')
+    lines = prefetch_translations(
+        lines, 'variant__translations', 'variant__product__translations',
+        'variant__product__product_type__variant_attributes__translations')
     for line in lines:
         initial = {'quantity': line.quantity}
         form = ReplaceCartLineForm(
@@ -1,3 +1,4 @@
+from django.apps import AppConfig
 from django.conf import settings
 from django.core.checks import Warning, register
 from django.utils.translation import pgettext_lazy
@@ -6,6 +7,17 @@ TOKEN_PATTERN = ('(?P<token>[0-9a-z]{8}-[0-9a-z]{4}-[0-9a-z]{4}-[0-9a-z]{4}'
                  '-[0-9a-z]{12})')
 
 
+class CoreAppConfig(AppConfig):
+    name = 'saleor.core'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from django_prices_vatlayer.models import VAT
+        from .signals import tax_rates_changed
+        post_save.connect(tax_rates_changed, sender=VAT)
+        post_delete.connect(tax_rates_changed, sender=VAT)
+
+
 @register()
 def check_session_caching(app_configs, **kwargs):  # pragma: no cover
     errors = []
@@ -8,9 +8,10 @@ from django.utils.translation import get_language
 from django_countries.fields import Country
 
 from . import analytics
-from ..discount.models import Sale
+from ..discount.utils import get_active_sale_index
+from ..site import snapshot
 from .utils import get_client_ip, get_country_by_ip, get_currency_for_country
-from .utils.taxes import get_taxes_for_country
+from .utils.taxes import get_taxes_for_country, tax_tables
 
 logger = logging.getLogger(__name__)
 
@@ -34,9 +35,8 @@ def google_analytics(get_response):
 def discounts(get_response):
     """Assign active discounts to `request.discounts`."""
     def middleware(request):
-        discounts = Sale.objects.active(date.today()).prefetch_related(
-            'products', 'categories', 'collections')
-        request.discounts = discounts
+        request.discounts = SimpleLazyObject(
+            lambda: get_active_sale_index(date.today()))
         return get_response(request)
 
     return middleware
@@ -68,29 +68,45 @@ def currency(get_response):
 
 
 def site(get_response):
-    """Clear the Sites cache and assign the current site to `request.site`.
+    """Assign the current site and a snapshot of its settings to the request.
 
     By default django.contrib.sites caches Site instances at the module
     level. This leads to problems when updating Site instances, as it's
     required to restart all application servers in order to invalidate
-    the cache. Using this middleware solves this problem.
+    the cache. Each request loads its own `Site` and settings instead, so
+    views may modify them without affecting other requests. The settings
+    snapshot taken here is used by pricing code for the rest of the
+    request.
     """
     def middleware(request):
-        Site.objects.clear_cache()
-        request.site = Site.objects.get_current()
-        return get_response(request)
+        request.site_settings = snapshot.get_site_settings()
+        request.site = Site.objects.select_related('settings').get(
+            pk=request.site_settings.site_id)
+        snapshot.activate(request.site_settings)
+        try:
+            return get_response(request)
+        finally:
+            snapshot.deactivate()
 
     return middleware
 
 
 def taxes(get_response):
-    """Assign tax rates for default country to `request.taxes`."""
+    """Assign tax rates for default country to `request.taxes`.
+
+    Tax tables looked up while the request is handled are the ones current
+    at its start, so warmed up lookups don't query the shared cache.
+    """
     def middleware(request):
-        if settings.VATLAYER_ACCESS_KEY:
-            request.taxes = SimpleLazyObject(lambda: get_taxes_for_country(
-                request.country))
-        else:
+        if not settings.VATLAYER_ACCESS_KEY:
             request.taxes = None
-        return get_response(request)
+            return get_response(request)
+        request.taxes = SimpleLazyObject(lambda: get_taxes_for_country(
+            request.country))
+        tax_tables.activate()
+        try:
+            return get_response(request)
+        finally:
+            tax_tables.deactivate()
 
     return middleware
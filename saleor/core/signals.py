@@ -0,0 +1,9 @@
+from django.db import transaction
+
+from .utils.taxes import invalidate_tax_tables
+
+
+def tax_rates_changed(sender, **kwargs):
+    """Recompile cached tax tables after vatlayer rates are refreshed."""
+    invalidate_tax_tables()
+    transaction.on_commit(invalidate_tax_tables)
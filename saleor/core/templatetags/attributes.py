@@ -12,3 +12,9 @@ def get_object_properties(object, properties):
         if attribute:
             return getattr(object.translated, property)
     return ''
+
+
+@register.simple_tag
+def get_facet_count(facets, attribute_slug, value_pk):
+    """Return number of products matching an attribute value."""
+    return facets.get(attribute_slug, {}).get(int(value_pk), 0)
@@ -0,0 +1,19 @@
+from django.core.cache import cache
+
+
+def get_cache_version(key):
+    """Return the current value of a cache generation counter."""
+    return cache.get_or_set(key, 0, timeout=None)
+
+
+def increment_cache_version(key):
+    """Bump a cache generation counter shared by all processes.
+
+    Process level caches keyed by the counter's value are rebuilt on their
+    next use.
+    """
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
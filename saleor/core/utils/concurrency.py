@@ -0,0 +1,84 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+_executor_lock = threading.Lock()
+_executor = None
+
+
+def get_executor():
+    """Return a thread pool shared by all requests of the process."""
+    global _executor  # pylint: disable=global-statement
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.CONCURRENT_QUERIES_WORKERS)
+    return _executor
+
+
+def _set_statement_timeout(timeout):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SET statement_timeout = %s', [int(timeout * 1000)])
+
+
+def _run_in_worker(func, timeout):
+    """Call the function on a database connection of the worker thread.
+
+    Queries are cancelled by the database once they run longer than the
+    timeout, connections are released like at the end of a request.
+    """
+    close_old_connections()
+    try:
+        if timeout is not None:
+            _set_statement_timeout(timeout)
+        try:
+            return func()
+        finally:
+            if timeout is not None and connection.connection is not None:
+                _set_statement_timeout(0)
+    finally:
+        close_old_connections()
+
+
+def evaluate_concurrently(tasks, timeout=None):
+    """Call independent functions in parallel and return their results.
+
+    `tasks` maps names to functions taking no arguments. Every function runs
+    on a thread of the shared pool with its own database connection, the
+    total time is bounded by the slowest one instead of the sum of all.
+    Returns `(results, timed_out)`, names of functions that did not finish
+    within `timeout` seconds or had their queries cancelled by the database
+    are missing from results and listed in `timed_out`.
+
+    Inside a transaction functions are called one after another in the
+    current thread, as other connections cannot see its uncommitted data.
+    """
+    if connection.in_atomic_block:
+        return {name: func() for name, func in tasks.items()}, []
+    executor = get_executor()
+    futures = {
+        name: executor.submit(_run_in_worker, func, timeout)
+        for name, func in tasks.items()}
+    wait(futures.values(), timeout=timeout)
+    results = {}
+    timed_out = []
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            logger.warning('%s did not finish in %s seconds', name, timeout)
+            timed_out.append(name)
+            continue
+        try:
+            results[name] = future.result()
+        except OperationalError:
+            logger.warning('%s was cancelled', name, exc_info=True)
+            timed_out.append(name)
+    return results, timed_out
@@ -5,3 +5,18 @@ def get_now_sorted_by(filter_set, default_sort='name'):
     else:
         sort_by = default_sort
     return sort_by
+
+
+def filter_queryset_excluding(filter_set, excluded):
+    """Return the filter set's queryset filtered by all but given filters.
+
+    Used to count what other values of the excluded filters would match.
+    """
+    if not filter_set.is_bound or not filter_set.form.is_valid():
+        return filter_set.qs
+    qs = filter_set.queryset.all()
+    for name, filter_ in filter_set.filters.items():
+        value = filter_set.form.cleaned_data.get(name)
+        if name not in excluded and value is not None:
+            qs = filter_.filter(qs, value)
+    return qs
@@ -1,19 +1,30 @@
+import threading
+from types import MappingProxyType
+
 from django.conf import settings
-from django.contrib.sites.models import Site
 from django_countries.fields import Country
 from django_prices_vatlayer.utils import (
     get_tax_for_rate, get_tax_rates_for_country)
 from prices import Money, MoneyRange, TaxedMoney, TaxedMoneyRange
 
 from ...core import TaxRateType
+from ...site.snapshot import get_site_settings
+from .cache import get_cache_version, increment_cache_version
 
 DEFAULT_TAX_RATE_NAME = TaxRateType.STANDARD
 
+TAX_TABLES_VERSION_KEY = 'core:tax-tables-version'
+
 ZERO_MONEY = Money(0, settings.DEFAULT_CURRENCY)
 ZERO_TAXED_MONEY = TaxedMoney(net=ZERO_MONEY, gross=ZERO_MONEY)
 
 
-def apply_tax_to_price(taxes, rate_name, base):
+def apply_tax_to_price(taxes, rate_name, base, keep_gross=None):
+    """Apply tax of the given rate to a price.
+
+    Pass `keep_gross` to avoid looking up the `include_taxes_in_prices`
+    site setting when pricing many items at once.
+    """
     if not taxes or not rate_name:
         # Naively convert Money to TaxedMoney for consistency with price
         # handling logic across the codebase, passthrough other money types
@@ -32,25 +43,89 @@ def apply_tax_to_price(taxes, rate_name, base):
     else:
         tax_to_apply = taxes[DEFAULT_TAX_RATE_NAME]['tax']
 
-    keep_gross = include_taxes_in_prices()
+    if keep_gross is None:
+        keep_gross = include_taxes_in_prices()
     return tax_to_apply(base, keep_gross=keep_gross)
 
 
-def get_taxes_for_country(country):
-    tax_rates = get_tax_rates_for_country(country.code)
+class TaxTableCache:
+    """Per-process cache of compiled tax tables keyed by country code.
+
+    Tables are read-only mappings of rate names to their values and tax
+    functions. The cache is dropped whenever `invalidate_tax_tables` is
+    called by any process. While a request is being handled, the version
+    of tables taken at its start is used without consulting the shared
+    counter again.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._version = None
+        self._active = threading.local()
+
+    def activate(self):
+        """Use the current version in this thread until `deactivate`."""
+        self._active.version = get_cache_version(TAX_TABLES_VERSION_KEY)
+
+    def deactivate(self):
+        self._active.version = None
+
+    def get(self, country_code):
+        version = getattr(self._active, 'version', None)
+        if version is None:
+            version = get_cache_version(TAX_TABLES_VERSION_KEY)
+        tables = self._tables
+        if self._version == version and country_code in tables:
+            self.hits += 1
+            return tables[country_code]
+        with self._lock:
+            if self._version != version:
+                self._tables = {}
+                self._version = version
+            elif country_code in self._tables:
+                # compiled by another thread while this one was waiting
+                self.hits += 1
+                return self._tables[country_code]
+            self.misses += 1
+            table = compile_tax_table(
+                get_tax_rates_for_country(country_code, force_refresh=True))
+            self._tables[country_code] = table
+        return table
+
+    def get_stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+def compile_tax_table(tax_rates):
     if tax_rates is None:
         return None
 
-    taxes = {DEFAULT_TAX_RATE_NAME: {
+    taxes = {DEFAULT_TAX_RATE_NAME: MappingProxyType({
         'value': tax_rates['standard_rate'],
-        'tax': get_tax_for_rate(tax_rates)}}
+        'tax': get_tax_for_rate(tax_rates)})}
     if tax_rates['reduced_rates']:
         taxes.update({
-            rate_name: {
+            rate_name: MappingProxyType({
                 'value': tax_rates['reduced_rates'][rate_name],
-                'tax': get_tax_for_rate(tax_rates, rate_name)}
+                'tax': get_tax_for_rate(tax_rates, rate_name)})
             for rate_name in tax_rates['reduced_rates']})
-    return taxes
+    return MappingProxyType(taxes)
+
+
+tax_tables = TaxTableCache()
+
+
+def invalidate_tax_tables():
+    """Force all processes to recompile tax tables on next use."""
+    tax_tables.deactivate()
+    increment_cache_version(TAX_TABLES_VERSION_KEY)
+
+
+def get_taxes_for_country(country):
+    return tax_tables.get(country.code)
 
 
 def get_taxes_for_address(address):
@@ -75,20 +150,26 @@ def get_tax_rate_by_name(rate_name, taxes=None):
     return tax_rate
 
 
-def include_taxes_in_prices():
-    return Site.objects.get_current().settings.include_taxes_in_prices
+def include_taxes_in_prices(site_settings=None):
+    site_settings = site_settings or get_site_settings()
+    return site_settings.include_taxes_in_prices
 
 
-def display_gross_prices():
-    return Site.objects.get_current().settings.display_gross_prices
+def display_gross_prices(site_settings=None):
+    site_settings = site_settings or get_site_settings()
+    return site_settings.display_gross_prices
 
 
-def charge_taxes_on_shipping():
-    return Site.objects.get_current().settings.charge_taxes_on_shipping
+def charge_taxes_on_shipping(site_settings=None):
+    site_settings = site_settings or get_site_settings()
+    return site_settings.charge_taxes_on_shipping
 
 
-def get_taxed_shipping_price(shipping_price, taxes):
+def get_taxed_shipping_price(shipping_price, taxes, site_settings=None):
     """Calculate shipping price based on settings and taxes."""
-    if not charge_taxes_on_shipping():
+    site_settings = site_settings or get_site_settings()
+    if not site_settings.charge_taxes_on_shipping:
         taxes = None
-    return apply_tax_to_price(taxes, DEFAULT_TAX_RATE_NAME, shipping_price)
+    return apply_tax_to_price(
+        taxes, DEFAULT_TAX_RATE_NAME, shipping_price,
+        site_settings.include_taxes_in_prices)
@@ -1,14 +1,67 @@
+from django.db.models import Prefetch
+from django.db.models.constants import LOOKUP_SEP
 from django.utils.translation import get_language
 
 
+def get_prefetched_translations_attr(language):
+    """Return the attribute that stores translations prefetched for
+    a language.
+    """
+    return '_prefetched_translations_%s' % (language, )
+
+
+def prefetch_translations(queryset, *lookups, language=None):
+    """Prefetch translations of given relations in one language only.
+
+    Each lookup is a path ending with a `translations` relation, eg.
+    `'category__translations'`. Only rows in the active language are fetched
+    and `TranslationProxy` uses them without looking at other languages.
+    """
+    language = language or get_language()
+    if not language:
+        return queryset.prefetch_related(*lookups)
+    prefetches = []
+    for lookup in lookups:
+        model = queryset.model
+        for part in lookup.split(LOOKUP_SEP):
+            model = model._meta.get_field(part).related_model
+        prefetches.append(Prefetch(
+            lookup, queryset=model.objects.filter(language_code=language),
+            to_attr=get_prefetched_translations_attr(language)))
+    return queryset.prefetch_related(*prefetches)
+
+
+def get_prefetched_translations(instance, locale):
+    """Return translations prefetched for the instance, None if there are
+    none.
+    """
+    prefetched = getattr(
+        instance, get_prefetched_translations_attr(locale), None)
+    if prefetched is not None:
+        return prefetched
+    prefetched_objects = getattr(instance, '_prefetched_objects_cache', {})
+    return prefetched_objects.get('translations')
+
+
+def get_translation(instance, locale):
+    prefetched = getattr(
+        instance, get_prefetched_translations_attr(locale), None)
+    if prefetched is not None:
+        return prefetched[0] if prefetched else None
+    return next((
+        t for t in instance.translations.all()
+        if t.language_code == locale), None)
+
+
 class TranslationWrapper(object):
     def __init__(self, instance, locale):
         self.instance = instance
-        self.translation = next((
-            t for t in instance.translations.all()
-            if t.language_code == locale), None)
+        self.translation = get_translation(instance, locale)
 
     def __getattr__(self, item):
+        if item in ['instance', 'translation']:
+            # not set yet, eg. while being unpickled
+            raise AttributeError(item)
         if all([
                 item not in ['id', 'pk'],
                 self.translation is not None,
@@ -22,7 +75,24 @@ class TranslationWrapper(object):
 
 
 class TranslationProxy(object):
+    """Access the translation of a model instance in the active language.
+
+    Wrappers are memoized per instance and language along with the
+    prefetched translations they are built from, so translations fetched
+    again get a new wrapper. Instances without prefetched translations
+    look them up on every access.
+    """
 
     def __get__(self, instance, owner):
+        if instance is None:
+            return self
         locale = get_language()
-        return TranslationWrapper(instance, locale)
+        prefetched = get_prefetched_translations(instance, locale)
+        if prefetched is None:
+            return TranslationWrapper(instance, locale)
+        wrappers = instance.__dict__.setdefault('_translation_wrappers', {})
+        source, wrapper = wrappers.get(locale, (None, None))
+        if source is not prefetched:
+            wrapper = TranslationWrapper(instance, locale)
+            wrappers[locale] = (prefetched, wrapper)
+        return wrapper
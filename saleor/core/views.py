@@ -8,16 +8,16 @@ from impersonate.views import impersonate as orig_impersonate
 from ..account.models import User
 from ..dashboard.views import staff_member_required
 from ..product.utils import products_for_homepage
-from ..product.utils.availability import products_with_availability
+from ..product.utils.availability import price_products
 from ..seo.schema.webpage import get_webpage_schema
 
 
 def home(request):
     products = products_for_homepage(
         request.site.settings.homepage_collection)[:8]
-    products = list(products_with_availability(
+    products = price_products(
         products, discounts=request.discounts, taxes=request.taxes,
-        local_currency=request.currency))
+        local_currency=request.currency)
     webpage_schema = get_webpage_schema(request)
     return TemplateResponse(
         request, 'home.html', {
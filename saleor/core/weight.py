@@ -16,12 +16,13 @@ from decimal import Decimal
 from enum import Enum
 
 from django import forms
-from django.contrib.sites.models import Site
 from django.core.validators import MinValueValidator
 from django.template.loader import render_to_string
 from django.utils.translation import pgettext_lazy
 from measurement.measures import Weight
 
+from ..site.snapshot import get_site_settings
+
 
 class WeightUnits:
     KILOGRAM = 'kg'
@@ -54,8 +55,7 @@ def convert_weight(weight, unit):
 
 
 def get_default_weight_unit():
-    site = Site.objects.get_current()
-    return site.settings.default_weight_unit
+    return get_site_settings().default_weight_unit
 
 
 class WeightInput(forms.TextInput):
@@ -19,6 +19,7 @@ from ...product.models import (
     ProductImage, ProductType, ProductVariant, VariantImage)
 from ...product.thumbnails import create_product_thumbnails
 from ...product.utils.attributes import get_name_from_attributes
+from ...product.utils.bitmaps import queue_product_index_update
 from ..forms import ModelChoiceOrCreationField, OrderedModelMultipleChoiceField
 from ..seo.fields import SeoDescriptionField, SeoTitleField
 from ..seo.utils import prepare_seo_description
@@ -517,6 +518,13 @@ class ProductBulkUpdate(forms.Form):
 
     def _publish_products(self):
         self.cleaned_data['products'].update(is_published=True)
+        self._update_product_index()
 
     def _unpublish_products(self):
         self.cleaned_data['products'].update(is_published=False)
+        self._update_product_index()
+
+    def _update_product_index(self):
+        # queryset updates skip signals keeping the product index up to date
+        queue_product_index_update(
+            self.cleaned_data['products'].values_list('pk', flat=True))
@@ -2,27 +2,35 @@ from django.conf import settings
 from django.http import Http404
 from django.shortcuts import render
 
+from ...core.utils.concurrency import evaluate_concurrently
 from ..views import staff_member_required
 from .forms import DashboardSearchForm
 
+SEARCH_PERMISSIONS = {
+    'orders': 'order.manage_orders',
+    'users': 'account.manage_users'}
 
-def limit_results(*results):
-    """Pass-through only first few best items for each result query."""
+
+def limit_results(queryset):
+    """Return a function evaluating only first few best items of a query."""
     limit = settings.DASHBOARD_SEARCH_LIMIT
-    return (qs[:limit] for qs in results)
+    return lambda: list(queryset[:limit])
 
 
 def get_results(request, form):
+    """Return `(results, timed_out)` of searches the user has access to.
+
+    Searches are evaluated concurrently, each one is given
+    `DASHBOARD_SEARCH_TIMEOUT` seconds and has no results once it's over.
+    """
     user = request.user
-    results = form.search()
-    products = results['products']
-    orders = results['orders']
-    users = results['users']
-    if not user.has_perm('order.manage_orders'):
-        orders = orders.none()
-    if not user.has_perm('account.manage_users'):
-        users = users.none()
-    return limit_results(products, orders, users)
+    tasks = {
+        name: limit_results(queryset)
+        for name, queryset in form.search().items()
+        if name not in SEARCH_PERMISSIONS
+        or user.has_perm(SEARCH_PERMISSIONS[name])}
+    return evaluate_concurrently(
+        tasks, timeout=settings.DASHBOARD_SEARCH_TIMEOUT)
 
 
 @staff_member_required
@@ -31,17 +39,17 @@ def search(request):
         raise Http404('No such page!')
     form = DashboardSearchForm(data=request.GET or None)
     query = ''
-    users = []
-    products = []
-    orders = []
+    results = {}
+    timed_out = []
     if form.is_valid():
-        products, orders, users = get_results(request, form)
+        results, timed_out = get_results(request, form)
         query = form.cleaned_data['q']
     ctx = {
         'form': form,
         'query': query,
-        'products': products,
-        'orders': orders,
-        'users': users,
+        'products': results.get('products', []),
+        'orders': results.get('orders', []),
+        'users': results.get('users', []),
+        'timed_out': timed_out,
         'query_string': '?q=%s' % query}
     return render(request, 'dashboard/search/results.html', ctx)
@@ -8,9 +8,10 @@ from django.contrib.syndication.views import add_domain
 from django.core.files.storage import default_storage
 from django.utils.encoding import smart_text
 
-from ..discount.models import Sale
+from ..discount.utils import get_active_sale_index
 from ..product.models import (
     AttributeChoiceValue, Category, ProductAttribute, ProductVariant)
+from ..product.utils.categories import get_category_tree
 
 CATEGORY_SEPARATOR = ' > '
 
@@ -139,9 +140,8 @@ def item_google_product_category(item, category_paths):
     category = item.product.category
     if category.pk in category_paths:
         return category_paths[category.pk]
-    ancestors = [
-        ancestor.name for ancestor in list(category.get_ancestors())]
-    category_path = CATEGORY_SEPARATOR.join(ancestors + [category.name])
+    category_path = CATEGORY_SEPARATOR.join(
+        get_category_tree().get_path(category.pk))
     category_paths[category.pk] = category_path
     return category_path
 
@@ -196,8 +196,7 @@ def write_feed(file_obj):
     writer = csv.DictWriter(file_obj, ATTRIBUTES, dialect=csv.excel_tab)
     writer.writeheader()
     categories = Category.objects.all()
-    discounts = Sale.objects.active(date.today()).prefetch_related(
-        'products', 'categories')
+    discounts = get_active_sale_index(date.today())
     attributes_dict = {a.slug: a.pk for a in ProductAttribute.objects.all()}
     attribute_values_dict = {smart_text(a.pk): smart_text(a) for a
                              in AttributeChoiceValue.objects.all()}
@@ -1,7 +1,29 @@
+from django.apps import AppConfig
 from django.conf import settings
 from django.utils.translation import pgettext_lazy
 
 
+class DiscountAppConfig(AppConfig):
+    name = 'saleor.discount'
+
+    def ready(self):
+        from django.db.models.signals import (
+            m2m_changed, post_delete, post_save, pre_delete)
+        from .models import Sale
+        from .signals import (
+            sale_changed, sale_deleted, sale_pre_delete,
+            sale_relations_changed, sale_saved)
+        from ..product.models import Category
+        post_save.connect(sale_saved, sender=Sale)
+        pre_delete.connect(sale_pre_delete, sender=Sale)
+        post_delete.connect(sale_deleted, sender=Sale)
+        post_save.connect(sale_changed, sender=Category)
+        post_delete.connect(sale_changed, sender=Category)
+        for relation in (Sale.products, Sale.categories, Sale.collections):
+            m2m_changed.connect(
+                sale_relations_changed, sender=relation.through)
+
+
 class DiscountValueType:
     FIXED = 'fixed'
     PERCENTAGE = 'percentage'
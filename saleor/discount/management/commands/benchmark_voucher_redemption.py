@@ -0,0 +1,79 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from ...models import NotApplicable, Voucher
+from ...utils import increase_voucher_usage, redeem_voucher
+
+
+def lock_all_vouchers(code, today):
+    """Redeem a voucher the way checkout used to, locking all active ones."""
+    vouchers = Voucher.objects.active(date=today).select_for_update()
+    voucher = vouchers.get(code=code)
+    increase_voucher_usage(voucher)
+    return voucher
+
+
+STRATEGIES = {
+    'row': redeem_voucher,
+    'all': lock_all_vouchers}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure checkout throughput of parallel orders sharing a single '
+        'voucher code')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders', type=int, default=50,
+            help='Number of orders placed in parallel')
+        parser.add_argument(
+            '--usage-limit', type=int, default=None,
+            help='Usage limit of the shared voucher')
+        parser.add_argument(
+            '--hold', type=float, default=0.01,
+            help='Seconds each order spends in its transaction after '
+                 'redeeming the voucher')
+        parser.add_argument(
+            '--strategy', choices=sorted(STRATEGIES), default='row',
+            help='Voucher redemption strategy')
+
+    def handle(self, *args, **options):
+        orders = options['orders']
+        hold = options['hold']
+        redeem = STRATEGIES[options['strategy']]
+        today = date.today()
+        voucher = Voucher.objects.create(
+            code=uuid.uuid4().hex[:12], name='Benchmark voucher',
+            discount_value=1, usage_limit=options['usage_limit'])
+
+        def place_order(dummy_index):
+            try:
+                with transaction.atomic():
+                    redeem(voucher.code, today)
+                    time.sleep(hold)
+                return True
+            except NotApplicable:
+                return False
+            finally:
+                connection.close()
+
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=orders) as executor:
+                results = list(executor.map(place_order, range(orders)))
+            elapsed = time.perf_counter() - start
+            voucher.refresh_from_db()
+        finally:
+            voucher.delete()
+
+        placed = sum(results)
+        self.stdout.write(
+            'Placed %d of %d orders in %.3fs (%.1f orders/s), '
+            'voucher used %d times' % (
+                placed, orders, elapsed, orders / elapsed, voucher.used))
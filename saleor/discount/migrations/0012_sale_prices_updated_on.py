@@ -0,0 +1,18 @@
+# Generated by Django 2.0.8 on 2018-09-25 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('discount', '0011_auto_20180803_0528'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sale',
+            name='prices_updated_on',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+    ]
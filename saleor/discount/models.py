@@ -28,6 +28,14 @@ class NotApplicable(ValueError):
         self.min_amount_spent = min_amount_spent
 
 
+class VoucherExpired(NotApplicable):
+    """Exception raised when redeeming a voucher that is no longer active."""
+
+
+class VoucherUsageLimitReached(NotApplicable):
+    """Exception raised when redeeming a voucher that was used up."""
+
+
 class VoucherQueryset(models.QuerySet):
     def active(self, date):
         return self.filter(
@@ -166,6 +174,10 @@ class Sale(models.Model):
     collections = models.ManyToManyField('product.Collection', blank=True)
     start_date = models.DateField(default=date.today)
     end_date = models.DateField(null=True, blank=True)
+    # the day stored prices of products were last refreshed for the sale
+    # starting or ending
+    prices_updated_on = models.DateField(
+        null=True, blank=True, editable=False)
 
     objects = SaleQueryset.as_manager()
 
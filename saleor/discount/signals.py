@@ -0,0 +1,60 @@
+from django.db import transaction
+
+from ..product.tasks import update_products_prices_task
+from ..product.utils.prices import get_products_of_sales
+from .models import Sale
+from .utils import invalidate_sale_index
+
+
+def get_product_ids_of_sales(sales):
+    return set(get_products_of_sales(sales).values_list('pk', flat=True))
+
+
+def invalidate_sale_index_on_commit():
+    # Invalidate right away for the current transaction and once more after
+    # commit, so other processes cannot cache an index built from data that
+    # was not yet committed
+    invalidate_sale_index()
+    transaction.on_commit(invalidate_sale_index)
+
+
+def refresh_sale_prices(product_ids):
+    """Rebuild the sale index and stored prices of given products."""
+    invalidate_sale_index_on_commit()
+    if product_ids:
+        product_ids = sorted(product_ids)
+        transaction.on_commit(
+            lambda: update_products_prices_task.delay(product_ids))
+
+
+def sale_changed(sender, **kwargs):
+    """Rebuild the active sale index after sales or categories change."""
+    invalidate_sale_index_on_commit()
+
+
+def sale_saved(sender, instance, **kwargs):
+    refresh_sale_prices(get_product_ids_of_sales([instance]))
+
+
+def sale_pre_delete(sender, instance, **kwargs):
+    instance._product_ids = get_product_ids_of_sales([instance])
+
+
+def sale_deleted(sender, instance, **kwargs):
+    refresh_sale_prices(vars(instance).pop('_product_ids', set()))
+
+
+def sale_relations_changed(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh prices of products that were or are now covered by sales."""
+    if not reverse:
+        sales = [instance]
+    elif pk_set is None:
+        sales = list(instance.sale_set.all())
+    else:
+        sales = list(Sale.objects.filter(pk__in=pk_set))
+    if action.startswith('pre_'):
+        instance._sale_product_ids = get_product_ids_of_sales(sales)
+    else:
+        product_ids = vars(instance).pop('_sale_product_ids', set())
+        refresh_sale_prices(product_ids | get_product_ids_of_sales(sales))
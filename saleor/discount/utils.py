@@ -1,8 +1,19 @@
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+
 from django.db.models import F
 from django.utils.translation import pgettext
 
+from ..core.utils.cache import get_cache_version, increment_cache_version
 from ..core.utils.taxes import ZERO_MONEY, ZERO_TAXED_MONEY
-from .models import NotApplicable
+from .models import (
+    NotApplicable, Sale, Voucher, VoucherExpired, VoucherUsageLimitReached)
+
+SALE_INDEX_VERSION_KEY = 'discount:sale-index-version'
+
+_sale_index_lock = threading.Lock()
+_sale_index_cache = {}
 
 
 def increase_voucher_usage(voucher):
@@ -17,6 +28,32 @@ def decrease_voucher_usage(voucher):
     voucher.save(update_fields=['used'])
 
 
+def redeem_voucher(code, date):
+    """Increase usage of the voucher with given code and return it.
+
+    The usage is increased with a single conditional update, so only the
+    redeemed voucher's row is locked and its usage limit can never be
+    exceeded by concurrent redemptions.
+
+    Raise VoucherExpired if the voucher does not exist or is not active at
+    the given date and VoucherUsageLimitReached if it was used up.
+    """
+    updated = Voucher.objects.active(date).filter(code=code).update(
+        used=F('used') + 1)
+    voucher = Voucher.objects.filter(code=code).first()
+    if updated:
+        return voucher
+    if voucher is not None and voucher.start_date <= date and (
+            voucher.end_date is None or voucher.end_date >= date):
+        raise VoucherUsageLimitReached(pgettext(
+            'Voucher not applicable',
+            'Voucher usage limit has been reached. '
+            'Order placement aborted.'))
+    raise VoucherExpired(pgettext(
+        'Voucher not applicable',
+        'Voucher expired in meantime. Order placement aborted.'))
+
+
 def are_product_collections_on_sale(product, sale):
     """Checks if any collection is on sale."""
     discounted_collections = set(sale.collections.all())
@@ -26,10 +63,12 @@ def are_product_collections_on_sale(product, sale):
 
 def is_category_on_sale(category, sale):
     """Check if category is descendant of one of categories on sale."""
-    discounted_categories = set(sale.categories.all())
+    # pylint: disable=cyclic-import
+    from ..product.utils.categories import get_category_tree
+    tree = get_category_tree()
     return any([
-        category.is_descendant_of(c, include_self=True)
-        for c in discounted_categories])
+        tree.is_descendant_of(category.pk, c.pk, include_self=True)
+        for c in sale.categories.all()])
 
 
 def get_product_discount_on_sale(sale, product):
@@ -47,8 +86,103 @@ def get_product_discount_on_sale(sale, product):
             'Discount not applicable for this product'))
 
 
+class SaleIndex:
+    """Precompiled lookup of sales applicable to products.
+
+    Maps product ids, collection ids and MPTT category ranges to discount
+    callables so that matching a product against all active sales does not
+    require iterating over every sale. Iterating over the index yields the
+    sales it was built from, so it can be passed wherever a list of sales
+    is accepted.
+    """
+
+    def __init__(self, sales):
+        self.sales = list(sales)
+        self._products = defaultdict(list)
+        self._collections = defaultdict(list)
+        self._category_ranges = defaultdict(list)
+        self._category_cache = {}
+        for sale in self.sales:
+            discount = sale.get_discount()
+            for product in sale.products.all():
+                self._products[product.pk].append(discount)
+            for collection in sale.collections.all():
+                self._collections[collection.pk].append(discount)
+            for category in sale.categories.all():
+                self._category_ranges[category.tree_id].append(
+                    (category.lft, category.rght, discount))
+        for ranges in self._category_ranges.values():
+            ranges.sort(key=lambda item: item[0])
+        self._category_lefts = {
+            tree_id: [lft for lft, dummy_rght, dummy_discount in ranges]
+            for tree_id, ranges in self._category_ranges.items()}
+
+    def __iter__(self):
+        return iter(self.sales)
+
+    def __len__(self):
+        return len(self.sales)
+
+    def __bool__(self):
+        return bool(self.sales)
+
+    def get_category_discounts(self, category):
+        """Return discounts of sales covering the category or its parents."""
+        key = (category.tree_id, category.lft, category.rght)
+        discounts = self._category_cache.get(key)
+        if discounts is None:
+            ranges = self._category_ranges.get(category.tree_id, [])
+            lefts = self._category_lefts.get(category.tree_id, [])
+            # Categories in one tree are either nested or disjoint, only the
+            # ones starting at or before this category can contain it.
+            candidates = ranges[:bisect_right(lefts, category.lft)]
+            discounts = [
+                discount for lft, rght, discount in candidates
+                if rght >= category.rght]
+            self._category_cache[key] = discounts
+        return discounts
+
+    def get_product_discounts(self, product):
+        """Return discounts of all sales applicable to the product."""
+        discounts = list(self._products.get(product.pk, []))
+        if self._category_ranges:
+            discounts += self.get_category_discounts(product.category)
+        if self._collections:
+            for collection in product.collections.all():
+                discounts += self._collections.get(collection.pk, [])
+        return discounts
+
+
+def invalidate_sale_index():
+    """Force all processes to rebuild the sale index on next use."""
+    increment_cache_version(SALE_INDEX_VERSION_KEY)
+
+
+def get_active_sale_index(date):
+    """Return a `SaleIndex` of sales active on the given date.
+
+    The index is built once per process and shared between requests until
+    the date changes or `invalidate_sale_index` is called.
+    """
+    key = (date, get_cache_version(SALE_INDEX_VERSION_KEY))
+    index = _sale_index_cache.get(key)
+    if index is None:
+        with _sale_index_lock:
+            index = _sale_index_cache.get(key)
+            if index is None:
+                sales = Sale.objects.active(date).prefetch_related(
+                    'products', 'categories', 'collections')
+                index = SaleIndex(sales)
+                _sale_index_cache.clear()
+                _sale_index_cache[key] = index
+    return index
+
+
 def get_product_discounts(product, discounts):
     """Return discount values for all discounts applicable to a product."""
+    if isinstance(discounts, SaleIndex):
+        yield from discounts.get_product_discounts(product)
+        return
     for discount in discounts:
         try:
             yield get_product_discount_on_sale(discount, product)
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class GraphQLAppConfig(AppConfig):
+    name = 'saleor.graphql'
+
+    def ready(self):
+        from django.db.models.signals import (
+            m2m_changed, post_delete, post_save)
+        from .signals import object_deleted, object_saved, relations_changed
+        post_save.connect(object_saved)
+        post_delete.connect(object_deleted)
+        m2m_changed.connect(relations_changed)
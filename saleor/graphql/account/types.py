@@ -51,7 +51,7 @@ class User(CountableDjangoObjectType):
     class Meta:
         exclude_fields = [
             'date_joined', 'password', 'is_superuser', 'ordernote_set',
-            'orderhistoryentry_set', 'last_login']
+            'orderhistoryentry_set', 'last_login', 'search_vector']
         description = 'Represents user data.'
         interfaces = [relay.Node]
         model = get_user_model()
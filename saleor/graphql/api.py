@@ -1,6 +1,5 @@
 import graphene
 import graphql_jwt
-from graphene_django.filter import DjangoFilterConnectionField
 from graphql_jwt.decorators import login_required, permission_required
 
 from .account.mutations import (
@@ -20,6 +19,7 @@ from .discount.types import Sale, Voucher
 from .discount.mutations import (
     SaleCreate, SaleDelete, SaleUpdate, VoucherCreate, VoucherDelete,
     VoucherUpdate)
+from .core.fields import OptimizedFilterConnectionField
 from .core.filters import DistinctFilterSet
 from .core.mutations import CreateToken, VerifyToken
 from .order.filters import OrderFilter
@@ -35,6 +35,7 @@ from .order.mutations.orders import (
 from .page.resolvers import resolve_pages, resolve_page
 from .page.types import Page
 from .page.mutations import PageCreate, PageDelete, PageUpdate
+from .product.fields import FacetedFilterConnectionField
 from .product.filters import ProductFilterSet
 from .product.mutations.attributes import (
     AttributeChoiceValueCreate, AttributeChoiceValueDelete,
@@ -51,10 +52,10 @@ from .product.mutations.products import (
     ProductVariantUpdate, VariantImageAssign, VariantImageUnassign)
 from .product.resolvers import (
     resolve_attributes, resolve_categories, resolve_collections,
-    resolve_products, resolve_product_types)
+    resolve_products, resolve_product_types, resolve_search_suggestions)
 from .product.types import (
     Category, Collection, Product, ProductAttribute, ProductType,
-    ProductVariant)
+    ProductVariant, SearchSuggestion)
 from .shipping.resolvers import resolve_shipping_zones
 from .shipping.types import ShippingZone
 from .shipping.mutations import (
@@ -67,12 +68,12 @@ from .shop.mutations import (
 
 
 class Query(graphene.ObjectType):
-    attributes = DjangoFilterConnectionField(
+    attributes = OptimizedFilterConnectionField(
         ProductAttribute, filterset_class=DistinctFilterSet,
         query=graphene.String(description=DESCRIPTIONS['attributes']),
         in_category=graphene.Argument(graphene.ID),
         description='List of the shop\'s product attributes.')
-    categories = DjangoFilterConnectionField(
+    categories = OptimizedFilterConnectionField(
         Category, filterset_class=DistinctFilterSet, query=graphene.String(
             description=DESCRIPTIONS['category']),
         level=graphene.Argument(graphene.Int),
@@ -83,7 +84,7 @@ class Query(graphene.ObjectType):
     collection = graphene.Field(
         Collection, id=graphene.Argument(graphene.ID),
         description='Lookup a collection by ID.')
-    collections = DjangoFilterConnectionField(
+    collections = OptimizedFilterConnectionField(
         Collection, query=graphene.String(
             description=DESCRIPTIONS['collection']),
         description='List of the shop\'s collections.')
@@ -91,40 +92,40 @@ class Query(graphene.ObjectType):
         Menu, id=graphene.Argument(graphene.ID),
         name=graphene.Argument(graphene.String, description="Menu name."),
         description='Lookup a menu by ID or name.')
-    menus = DjangoFilterConnectionField(
+    menus = OptimizedFilterConnectionField(
         Menu, query=graphene.String(description=DESCRIPTIONS['menu']),
         description="List of the shop\'s menus.")
     menu_item = graphene.Field(
         MenuItem, id=graphene.Argument(graphene.ID),
         description='Lookup a menu item by ID.')
-    menu_items = DjangoFilterConnectionField(
+    menu_items = OptimizedFilterConnectionField(
         MenuItem, query=graphene.String(description=DESCRIPTIONS['menu_item']),
         description='List of the shop\'s menu items.')
     order = graphene.Field(
         Order, description='Lookup an order by ID.',
         id=graphene.Argument(graphene.ID))
-    orders = DjangoFilterConnectionField(
+    orders = OptimizedFilterConnectionField(
         Order, filterset_class=OrderFilter, query=graphene.String(
             description=DESCRIPTIONS['order']),
         description='List of the shop\'s orders.')
     page = graphene.Field(
         Page, id=graphene.Argument(graphene.ID), slug=graphene.String(),
         description='Lookup a page by ID or by slug.')
-    pages = DjangoFilterConnectionField(
+    pages = OptimizedFilterConnectionField(
         Page, filterset_class=DistinctFilterSet, query=graphene.String(
             description=DESCRIPTIONS['page']),
         description='List of the shop\'s pages.')
     product = graphene.Field(
         Product, id=graphene.Argument(graphene.ID),
         description='Lookup a product by ID.')
-    products = DjangoFilterConnectionField(
+    products = FacetedFilterConnectionField(
         Product, filterset_class=ProductFilterSet, query=graphene.String(
             description=DESCRIPTIONS['product']),
         description='List of the shop\'s products.')
     product_type = graphene.Field(
         ProductType, id=graphene.Argument(graphene.ID),
         description='Lookup a product type by ID.')
-    product_types = DjangoFilterConnectionField(
+    product_types = OptimizedFilterConnectionField(
         ProductType, filterset_class=DistinctFilterSet,
         description='List of the shop\'s product types.')
     product_variant = graphene.Field(
@@ -133,25 +134,34 @@ class Query(graphene.ObjectType):
     sale = graphene.Field(
         Sale, id=graphene.Argument(graphene.ID),
         description='Lookup a sale by ID.')
-    sales = DjangoFilterConnectionField(
+    sales = OptimizedFilterConnectionField(
         Sale, query=graphene.String(description=DESCRIPTIONS['sale']),
         description="List of the shop\'s sales.")
+    search_suggestions = graphene.List(
+        graphene.NonNull(SearchSuggestion),
+        query=graphene.String(
+            required=True, description='Beginning of the searched name.'),
+        first=graphene.Int(
+            default_value=10, description='Maximum number of suggestions.'),
+        description=(
+            'List of the most popular products, categories and collections '
+            'with names starting with the query.'))
     shop = graphene.Field(Shop, description='Represents a shop resources.')
     voucher = graphene.Field(
         Voucher, id=graphene.Argument(graphene.ID),
         description='Lookup a voucher by ID.')
-    vouchers = DjangoFilterConnectionField(
+    vouchers = OptimizedFilterConnectionField(
         Voucher, query=graphene.String(description=DESCRIPTIONS['product']),
         description="List of the shop\'s vouchers.")
     shipping_zone = graphene.Field(
         ShippingZone, id=graphene.Argument(graphene.ID),
         description='Lookup a shipping zone by ID.')
-    shipping_zones = DjangoFilterConnectionField(
+    shipping_zones = OptimizedFilterConnectionField(
         ShippingZone, description='List of the shop\'s shipping zones.')
     user = graphene.Field(
         User, id=graphene.Argument(graphene.ID),
         description='Lookup an user by ID.')
-    users = DjangoFilterConnectionField(
+    users = OptimizedFilterConnectionField(
         User, description='List of the shop\'s users.',
         query=graphene.String(
             description=DESCRIPTIONS['user']))
@@ -218,6 +228,9 @@ class Query(graphene.ObjectType):
     def resolve_product_types(self, info, **kwargs):
         return resolve_product_types()
 
+    def resolve_search_suggestions(self, info, query, first):
+        return resolve_search_suggestions(query, first)
+
     def resolve_shop(self, info):
         return Shop()
 
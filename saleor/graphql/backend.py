@@ -0,0 +1,94 @@
+from functools import partial
+
+from graphql.backend import GraphQLCoreBackend
+from graphql.backend.base import GraphQLDocument
+from graphql.execution import ExecutionResult, execute
+from graphql.language import ast
+from graphql.language.base import parse, print_ast
+from graphql.validation import validate
+
+from .core.cost import check_query_cost
+from .documents import get_document_cache, get_document_hash
+from .response_cache import (
+    CacheTagCollector, cache_response, get_cached_response,
+    get_response_cache_key)
+
+
+def execute_cached(
+        schema, document_ast, document_hash, *args, **kwargs):
+    """Execute a document, reusing responses cached for the request."""
+    context = kwargs.get('context')
+    cache_key = get_response_cache_key(
+        document_hash, document_ast, context,
+        variables=kwargs.get('variables'),
+        operation_name=kwargs.get('operation_name'))
+    if cache_key is None:
+        return execute(schema, document_ast, *args, **kwargs)
+    context.cacheable_response = True
+    data = get_cached_response(cache_key)
+    if data is not None:
+        return ExecutionResult(data=data)
+    tag_collector = CacheTagCollector()
+    kwargs['middleware'] = list(kwargs.get('middleware') or []) + [
+        tag_collector]
+    result = execute(schema, document_ast, *args, **kwargs)
+    if result.errors or result.invalid:
+        context.cacheable_response = False
+    else:
+        cache_response(cache_key, result.data, tag_collector.tags)
+    return result
+
+
+def execute_checked(
+        schema, document_ast, document_hash, validation_errors, *args,
+        **kwargs):
+    """Execute a validated document if it's within cost limits."""
+    if validation_errors:
+        return ExecutionResult(errors=validation_errors, invalid=True)
+    context = kwargs.get('context')
+    cost_error = check_query_cost(
+        schema, document_ast, variables=kwargs.get('variables'),
+        operation_name=kwargs.get('operation_name'),
+        user=getattr(context, 'user', None))
+    if cost_error:
+        return ExecutionResult(errors=[cost_error], invalid=True)
+    return execute_cached(
+        schema, document_ast, document_hash, *args, **kwargs)
+
+
+class SaleorGraphQLBackend(GraphQLCoreBackend):
+    """Reuse validated documents and reject queries too expensive to run.
+
+    Documents are parsed and validated once and kept in the process-wide
+    `DocumentCache` under their hashes. Costs depend on variables and the
+    user, so they are computed on every execution and limited by
+    `GRAPHQL_QUERY_MAX_COST` and `GRAPHQL_QUERY_MAX_DEPTH`. Responses to
+    anonymous catalog queries are served from the response cache.
+    """
+
+    def create_document(self, schema, document_string, document_ast,
+                        document_hash):
+        validation_errors = validate(schema, document_ast)
+        return GraphQLDocument(
+            schema=schema, document_string=document_string,
+            document_ast=document_ast,
+            execute=partial(
+                execute_checked, schema, document_ast, document_hash,
+                validation_errors, **self.execute_params))
+
+    def document_from_string(self, schema, document_string):
+        if isinstance(document_string, ast.Document):
+            document_ast = document_string
+            document_string = print_ast(document_ast)
+            return self.create_document(
+                schema, document_string, document_ast,
+                get_document_hash(document_string))
+        document_cache = get_document_cache()
+        document_hash = get_document_hash(document_string)
+        document = document_cache.get(document_hash)
+        if document is None or document.schema is not schema:
+            document = self.create_document(
+                schema, document_string, parse(document_string),
+                document_hash)
+            document_cache.set(document_hash, document)
+        return document
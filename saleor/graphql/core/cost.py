@@ -0,0 +1,206 @@
+import logging
+
+from django.conf import settings
+from graphql.error import GraphQLError
+from graphql.language import ast
+from graphql.type.definition import get_named_type
+
+logger = logging.getLogger(__name__)
+
+# number of nodes assumed to be returned by connections queried without
+# `first` or `last`, the same as the limit graphene applies to them
+UNBOUNDED_CONNECTION_SIZE = 100
+# nodes usually returned by connections to few objects of their parent,
+# when they are queried without `first` or `last`
+CONNECTION_SIZES = {
+    'Product.images': 10,
+    'Product.variants': 10,
+    'ProductVariant.images': 5}
+# cost of resolving a field once, fields not listed here cost 1 when they
+# return objects and nothing when they return scalars
+FIELD_COSTS = {
+    'Product.availability': 5,
+    'Product.margin': 5,
+    'Product.purchaseCost': 5,
+    'Product.thumbnailUrl': 2,
+    'ProductCountableConnection.facets': 20,
+    'ProductVariant.margin': 5,
+    'ProductVariant.stockQuantity': 2}
+# types wrapping connection results are not resolved with queries
+WRAPPER_TYPE_SUFFIXES = ('Connection', 'Edge', 'PageInfo')
+
+ANONYMOUS = 'anonymous'
+CUSTOMER = 'customer'
+STAFF = 'staff'
+
+
+def get_user_kind(user):
+    """Return the name of limits that apply to queries of the user."""
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+    if user.is_staff:
+        return STAFF
+    return CUSTOMER
+
+
+def get_operation(document_ast, operation_name=None):
+    operations = [
+        definition for definition in document_ast.definitions
+        if isinstance(definition, ast.OperationDefinition)]
+    if operation_name is None:
+        return operations[0] if len(operations) == 1 else None
+    for operation in operations:
+        if operation.name and operation.name.value == operation_name:
+            return operation
+    return None
+
+
+class QueryCost:
+    """Estimate the cost and depth of a GraphQL operation without running it.
+
+    Every field returning objects costs its weight multiplied by the number
+    of times it is resolved. Connections multiply that number by their page
+    size given with `first` or `last`, so nested connections of 100 nodes
+    cost 100 times more than a single one.
+    """
+
+    def __init__(self, schema, document_ast, variables=None):
+        self.schema = schema
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document_ast.definitions
+            if isinstance(definition, ast.FragmentDefinition)}
+        self.variables = dict(variables or {})
+
+    def get_value(self, value_node):
+        if isinstance(value_node, ast.Variable):
+            return self.variables.get(value_node.name.value)
+        if isinstance(value_node, ast.IntValue):
+            return int(value_node.value)
+        return None
+
+    def get_page_size(self, parent_type, field_node, field_def):
+        """Return nodes returned by a connection, None for other fields."""
+        if 'first' not in field_def.args and 'last' not in field_def.args:
+            return None
+        sizes = [
+            self.get_value(argument.value)
+            for argument in field_node.arguments
+            if argument.name.value in ('first', 'last')]
+        sizes = [size for size in sizes if isinstance(size, int)]
+        if not sizes:
+            return CONNECTION_SIZES.get(
+                '%s.%s' % (parent_type.name, field_node.name.value),
+                UNBOUNDED_CONNECTION_SIZE)
+        return max(0, min(max(sizes), UNBOUNDED_CONNECTION_SIZE))
+
+    def get_field_cost(self, parent_type, name, field_def):
+        weight = FIELD_COSTS.get('%s.%s' % (parent_type.name, name))
+        if weight is not None:
+            return weight
+        field_type = get_named_type(field_def.type)
+        if parent_type.name.endswith(WRAPPER_TYPE_SUFFIXES) or (
+                field_type.name.endswith(WRAPPER_TYPE_SUFFIXES)):
+            return 0
+        is_object = hasattr(field_type, 'fields') or hasattr(
+            field_type, 'types')
+        return 1 if is_object else 0
+
+    def measure(self, selection_set, parent_type, multiplier=1, depth=0,
+                fragment_names=frozenset()):
+        """Return `(cost, depth)` of a selection set."""
+        cost = 0
+        max_depth = depth
+        for selection in selection_set.selections:
+            if isinstance(selection, ast.Field):
+                field_cost, field_depth = self.measure_field(
+                    selection, parent_type, multiplier, depth + 1,
+                    fragment_names)
+            else:
+                if isinstance(selection, ast.FragmentSpread):
+                    name = selection.name.value
+                    fragment = self.fragments.get(name)
+                    if fragment is None or name in fragment_names:
+                        continue
+                    spread_names = fragment_names | {name}
+                else:
+                    fragment = selection
+                    spread_names = fragment_names
+                fragment_type = parent_type
+                if fragment.type_condition:
+                    fragment_type = self.schema.get_type(
+                        fragment.type_condition.name.value)
+                if fragment_type is None:
+                    continue
+                field_cost, field_depth = self.measure(
+                    fragment.selection_set, fragment_type, multiplier, depth,
+                    spread_names)
+            cost += field_cost
+            max_depth = max(max_depth, field_depth)
+        return cost, max_depth
+
+    def measure_field(self, field_node, parent_type, multiplier, depth,
+                      fragment_names):
+        name = field_node.name.value
+        fields = getattr(parent_type, 'fields', None) or {}
+        field_def = fields.get(name)
+        if name.startswith('__') or field_def is None:
+            return 0, depth
+        cost = multiplier * self.get_field_cost(parent_type, name, field_def)
+        page_size = self.get_page_size(parent_type, field_node, field_def)
+        if page_size is not None:
+            # every node returned by the connection is a loaded object
+            multiplier *= page_size
+            cost += multiplier
+        if field_node.selection_set is None:
+            return cost, depth
+        nested_cost, nested_depth = self.measure(
+            field_node.selection_set, get_named_type(field_def.type),
+            multiplier, depth, fragment_names)
+        return cost + nested_cost, nested_depth
+
+
+def get_query_cost(schema, document_ast, variables=None,
+                   operation_name=None):
+    """Return `(cost, depth)` of the operation, None if it's not found."""
+    operation = get_operation(document_ast, operation_name)
+    if operation is None:
+        return None
+    root_types = {
+        'query': schema.get_query_type(),
+        'mutation': schema.get_mutation_type(),
+        'subscription': schema.get_subscription_type()}
+    root_type = root_types.get(operation.operation)
+    if root_type is None:
+        return None
+    query_cost = QueryCost(schema, document_ast)
+    for definition in operation.variable_definitions or []:
+        if definition.default_value is not None:
+            query_cost.variables[definition.variable.name.value] = (
+                query_cost.get_value(definition.default_value))
+    query_cost.variables.update(variables or {})
+    return query_cost.measure(operation.selection_set, root_type)
+
+
+def check_query_cost(schema, document_ast, variables=None,
+                     operation_name=None, user=None):
+    """Return an error if the operation exceeds limits of the user."""
+    measured = get_query_cost(
+        schema, document_ast, variables, operation_name)
+    if measured is None:
+        return None
+    cost, depth = measured
+    user_kind = get_user_kind(user)
+    logger.info(
+        'Query %s of %s user costs %d with depth %d',
+        operation_name or '(anonymous)', user_kind, cost, depth)
+    max_depth = settings.GRAPHQL_QUERY_MAX_DEPTH.get(user_kind)
+    if max_depth is not None and depth > max_depth:
+        return GraphQLError(
+            'Query depth of %d exceeds the limit of %d.' % (
+                depth, max_depth))
+    max_cost = settings.GRAPHQL_QUERY_MAX_COST.get(user_kind)
+    if max_cost is not None and cost > max_cost:
+        return GraphQLError(
+            'Query cost of %d exceeds the limit of %d.' % (cost, max_cost))
+    return None
@@ -0,0 +1,39 @@
+from promise import Promise
+from promise.dataloader import DataLoader as BaseLoader
+
+
+class DataLoader(BaseLoader):
+    """A loader shared by all resolvers of a request.
+
+    Keys requested by resolvers of a query are collected and passed to a
+    single `batch_load` call, which returns values in the order of keys.
+    Loaders are created with the request as `DataLoader(info.context)`.
+    """
+
+    def __new__(cls, context):
+        loaders = getattr(context, 'dataloaders', None)
+        if loaders is None:
+            loaders = context.dataloaders = {}
+        if cls not in loaders:
+            loaders[cls] = super().__new__(cls)
+        return loaders[cls]
+
+    def __init__(self, context):
+        if getattr(self, 'context', None) is context:
+            return
+        self.context = context
+        super().__init__()
+
+    def batch_load_fn(self, keys):  # pylint: disable=method-hidden
+        return Promise.resolve(self.batch_load(keys))
+
+    def batch_load(self, keys):
+        raise NotImplementedError
+
+
+def get_prefetched(instance, cache_name):
+    """Return objects prefetched along with an instance or None."""
+    cache = getattr(instance, '_prefetched_objects_cache', {})
+    if cache_name in cache:
+        return list(cache[cache_name])
+    return None
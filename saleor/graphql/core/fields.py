@@ -1,8 +1,14 @@
+from functools import partial
+
 import graphene
+from django.db.models.query import QuerySet
 from django_measurement.models import MeasurementField
 from django_prices.models import MoneyField, TaxedMoneyField
 from graphene_django.converter import convert_django_field
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import maybe_queryset
 
+from .optimizer import optimize_queryset
 from .types.common import Weight
 from .types.money import Money, TaxedMoney
 
@@ -20,3 +26,22 @@ def convert_field_money(field, registry=None):
 @convert_django_field.register(MeasurementField)
 def convert_field_measurements(field, registry=None):
     return graphene.Field(Weight)
+
+
+class OptimizedFilterConnectionField(DjangoFilterConnectionField):
+    """Filter connection field loading only what the query selects.
+
+    Querysets returned by resolvers get `only()`, `select_related()` and
+    `prefetch_related()` matching fields selected on the connection nodes.
+    """
+
+    @staticmethod
+    def optimized_resolver(resolver, field, root, info, **args):
+        iterable = maybe_queryset(resolver(root, info, **args))
+        if isinstance(iterable, QuerySet):
+            return optimize_queryset(iterable, info, field.node_type)
+        return iterable
+
+    def get_resolver(self, parent_resolver):
+        return super().get_resolver(
+            partial(self.optimized_resolver, parent_resolver, self))
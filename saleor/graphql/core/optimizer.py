@@ -0,0 +1,220 @@
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Prefetch
+from graphene.relay import Connection
+from graphene.utils.str_converters import to_snake_case
+from graphene_django import DjangoObjectType
+from graphql.language import ast
+from graphql.type.definition import get_named_type
+
+
+class QueryHints:
+    """Model fields and relations used by the resolver of a GraphQL field.
+
+    Registered in `query_hints` of `CountableDjangoObjectType.Meta` for
+    fields that are not model fields of the same name. `only=None` means
+    the resolver may use any field of the model.
+    """
+
+    def __init__(self, only=(), select_related=(), prefetch_related=()):
+        self.only = only
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+
+
+def get_model_field(model, name):
+    if name == 'id':
+        return model._meta.pk
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    # composite fields like `TaxedMoneyField` need hints for their columns
+    return field if isinstance(field, models.Field) else None
+
+
+def is_forward_relation(model_field):
+    return model_field.many_to_one or (
+        model_field.one_to_one and model_field.concrete)
+
+
+class QueryOptimizer:
+    """Collect lookups needed to resolve a selection set of a model type.
+
+    Model fields selected by the query and fields listed in query hints are
+    loaded with `only()`, selected foreign keys are joined with
+    `select_related()` and relations prefetched by hints are loaded with
+    querysets optimized for their own selection sets.
+    """
+
+    def __init__(self, info):
+        self.info = info
+        self.only = set()
+        self.select_related = set()
+        self.prefetch_related = []
+        # models of joined relations, fields they need are not known when
+        # their selection includes fields without hints
+        self.models = {}
+        self.incomplete = set()
+
+    def get_fields(self, selection_set, type_name=None):
+        """Return field nodes of a selection set, expanding fragments."""
+        fields = []
+        if selection_set is None:
+            return fields
+        for selection in selection_set.selections:
+            if isinstance(selection, ast.Field):
+                fields.append(selection)
+                continue
+            if isinstance(selection, ast.FragmentSpread):
+                fragment = self.info.fragments[selection.name.value]
+            else:
+                fragment = selection
+            condition = fragment.type_condition
+            if condition and type_name and condition.name.value != type_name:
+                continue
+            fields.extend(self.get_fields(fragment.selection_set, type_name))
+        return fields
+
+    def get_node_fields(self, connection_fields, type_name):
+        """Return fields selected on nodes of connections."""
+        fields = []
+        for connection_field in connection_fields:
+            for edges in self.get_fields(connection_field.selection_set):
+                if edges.name.value != 'edges':
+                    continue
+                for node in self.get_fields(edges.selection_set):
+                    if node.name.value == 'node':
+                        fields.extend(
+                            self.get_fields(node.selection_set, type_name))
+        return fields
+
+    def get_field_type(self, graphene_type, field_node):
+        """Return the Django type of a field and fields selected on it."""
+        schema_type = self.info.schema.get_type(graphene_type._meta.name)
+        schema_field = schema_type.fields.get(field_node.name.value)
+        if schema_field is None:
+            return None, []
+        field_type = getattr(
+            get_named_type(schema_field.type), 'graphene_type', None)
+        if field_type is None:
+            return None, []
+        if issubclass(field_type, Connection):
+            node_type = field_type._meta.node
+            return node_type, self.get_node_fields(
+                [field_node], node_type._meta.name)
+        if issubclass(field_type, DjangoObjectType):
+            return field_type, self.get_fields(
+                field_node.selection_set, field_type._meta.name)
+        return None, []
+
+    def add_type(self, graphene_type, fields, prefix=''):
+        model = graphene_type._meta.model
+        hints = getattr(graphene_type._meta, 'query_hints', None) or {}
+        self.models[prefix] = model
+        self.only.add(prefix + model._meta.pk.name)
+        for field_node in fields:
+            name = to_snake_case(field_node.name.value)
+            if name.startswith('__'):
+                continue
+            if name in hints:
+                self.add_hints(
+                    graphene_type, field_node, hints[name], prefix)
+                continue
+            model_field = get_model_field(model, name)
+            if model_field is None:
+                self.incomplete.add(prefix)
+            elif is_forward_relation(model_field):
+                self.add_forward_relation(
+                    graphene_type, field_node, model_field, prefix)
+            elif not model_field.is_relation:
+                self.only.add(prefix + model_field.name)
+            # relations to many objects are resolved by their own queries
+
+    def add_forward_relation(
+            self, graphene_type, field_node, model_field, prefix):
+        self.only.add(prefix + model_field.name)
+        field_type, fields = self.get_field_type(graphene_type, field_node)
+        if field_type is None or (
+                field_type._meta.model is not model_field.related_model):
+            return
+        lookup = prefix + model_field.name
+        self.select_related.add(lookup)
+        self.add_type(field_type, fields, lookup + '__')
+
+    def add_hints(self, graphene_type, field_node, hints, prefix):
+        if hints.only is None:
+            self.incomplete.add(prefix)
+        else:
+            self.only.update(prefix + name for name in hints.only)
+        self.select_related.update(
+            prefix + lookup for lookup in hints.select_related)
+        for lookup in hints.prefetch_related:
+            if lookup == to_snake_case(field_node.name.value):
+                self.add_prefetched_relation(
+                    graphene_type, field_node, lookup, prefix)
+            else:
+                self.prefetch_related.append(prefix + lookup)
+
+    def add_prefetched_relation(
+            self, graphene_type, field_node, lookup, prefix):
+        model_field = get_model_field(graphene_type._meta.model, lookup)
+        field_type, fields = self.get_field_type(graphene_type, field_node)
+        if field_type is None or (
+                field_type._meta.model is not model_field.related_model):
+            self.prefetch_related.append(prefix + lookup)
+            return
+        optimizer = QueryOptimizer(self.info)
+        optimizer.add_type(field_type, fields)
+        if model_field.one_to_many:
+            # objects are matched with the ones they were prefetched for
+            optimizer.only.add(model_field.field.name)
+        queryset = optimizer.optimize(
+            field_type._meta.model._default_manager.all())
+        self.prefetch_related.append(
+            Prefetch(prefix + lookup, queryset=queryset))
+
+    def get_only(self):
+        if '' in self.incomplete:
+            return None
+        only = set(self.only)
+        for prefix in self.incomplete:
+            only.update(
+                prefix + field.name
+                for field in self.models[prefix]._meta.concrete_fields)
+        return sorted(only)
+
+    def optimize(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        prefetched = {
+            getattr(lookup, 'prefetch_to', lookup)
+            for lookup in queryset._prefetch_related_lookups}
+        prefetch_related = OrderedDict()
+        for lookup in self.prefetch_related:
+            path = getattr(lookup, 'prefetch_to', lookup)
+            # plain lookups load complete objects some resolvers rely on
+            if path not in prefetched and (
+                    not isinstance(lookup, Prefetch)
+                    or path not in prefetch_related):
+                prefetch_related[path] = lookup
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related.values())
+        only = self.get_only()
+        deferred_fields, defer = queryset.query.deferred_loading
+        if only is not None and defer and not deferred_fields:
+            queryset = queryset.only(*only)
+        return queryset
+
+
+def optimize_queryset(queryset, info, graphene_type):
+    """Load only what the connection field being resolved asks for."""
+    if queryset.model is not graphene_type._meta.model:
+        return queryset
+    optimizer = QueryOptimizer(info)
+    optimizer.add_type(
+        graphene_type,
+        optimizer.get_node_fields(info.field_asts, graphene_type._meta.name))
+    return optimizer.optimize(queryset)
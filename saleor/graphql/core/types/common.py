@@ -3,6 +3,7 @@ import decimal
 import graphene
 from graphene.types import Scalar
 from graphene_django import DjangoObjectType
+from graphene_django.types import DjangoObjectTypeOptions
 from graphql.language import ast
 
 from ....core import weight
@@ -42,18 +43,29 @@ class CountryDisplay(graphene.ObjectType):
     country = graphene.String(description='Country.', required=True)
 
 
+class CountableDjangoObjectTypeOptions(DjangoObjectTypeOptions):
+    query_hints = None
+
+
 class CountableDjangoObjectType(DjangoObjectType):
     class Meta:
         abstract = True
 
     @classmethod
-    def __init_subclass_with_meta__(cls, *args, **kwargs):
+    def __init_subclass_with_meta__(
+            cls, *args, connection_class=CountableConnection,
+            query_hints=None, _meta=None, **kwargs):
         # Force it to use the countable connection
-        countable_conn = CountableConnection.create_type(
+        countable_conn = connection_class.create_type(
             "{}CountableConnection".format(cls.__name__),
             node=cls)
+        if not _meta:
+            _meta = CountableDjangoObjectTypeOptions(cls)
+        # `QueryHints` of fields which are not model fields, used by
+        # `OptimizedFilterConnectionField` to load what resolvers need
+        _meta.query_hints = query_hints or {}
         super().__init_subclass_with_meta__(
-            *args, connection=countable_conn, **kwargs)
+            *args, connection=countable_conn, _meta=_meta, **kwargs)
 
 
 class Error(graphene.ObjectType):
@@ -31,6 +31,7 @@ class Sale(CountableDjangoObjectType):
             'value': ['gte', 'lte'],
             'start_date': ['exact'],
             'end_date': ['exact']}
+        exclude_fields = ['prices_updated_on']
         model = models.Sale
 
 
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PERSISTED_QUERY_KEY = 'graphql:persisted-query:%s'
+# statistics of the document cache are logged every this many lookups
+STATS_LOG_INTERVAL = 10000
+
+_document_cache_lock = threading.Lock()
+_document_cache = None
+_registered_queries_lock = threading.Lock()
+_registered_queries = None
+
+
+class PersistedQueryError(Exception):
+    pass
+
+
+def get_document_hash(document_string):
+    return hashlib.sha256(document_string.encode('utf-8')).hexdigest()
+
+
+class DocumentCache:
+    """A bounded mapping of document hashes to parsed and validated documents.
+
+    Once full, the least recently used documents are dropped. Hits and
+    misses are counted to tell how well the cache size fits the traffic.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, document_hash):
+        return document_hash in self._documents
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get_stats(self):
+        return {
+            'size': len(self), 'max_size': self.max_size, 'hits': self.hits,
+            'misses': self.misses, 'hit_ratio': self.hit_ratio}
+
+    def get(self, document_hash):
+        with self._lock:
+            document = self._documents.get(document_hash)
+            if document is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._documents.move_to_end(document_hash)
+            lookups = self.hits + self.misses
+        if lookups % STATS_LOG_INTERVAL == 0:
+            logger.info(
+                'GraphQL document cache: %(hits)d hits, %(misses)d misses, '
+                '%(hit_ratio).2f hit ratio, %(size)d of %(max_size)d '
+                'documents', self.get_stats())
+        return document
+
+    def peek(self, document_hash):
+        """Return a cached document without counting it as used."""
+        return self._documents.get(document_hash)
+
+    def set(self, document_hash, document):
+        with self._lock:
+            self._documents[document_hash] = document
+            self._documents.move_to_end(document_hash)
+            while len(self._documents) > self.max_size:
+                self._documents.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self.hits = self.misses = 0
+
+
+def get_document_cache():
+    """Return the `DocumentCache` shared by requests of the process."""
+    global _document_cache  # pylint: disable=global-statement
+    if _document_cache is None:
+        with _document_cache_lock:
+            if _document_cache is None:
+                _document_cache = DocumentCache(
+                    settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+    return _document_cache
+
+
+def get_registered_queries():
+    """Return documents of `GRAPHQL_PERSISTED_QUERIES_PATH` by their hashes.
+
+    The file holds a JSON list of documents, it's read once per process.
+    """
+    global _registered_queries  # pylint: disable=global-statement
+    path = settings.GRAPHQL_PERSISTED_QUERIES_PATH
+    if not path:
+        return {}
+    registered = _registered_queries
+    if registered is None or registered[0] != path:
+        with _registered_queries_lock:
+            registered = _registered_queries
+            if registered is None or registered[0] != path:
+                with open(path) as queries_file:
+                    queries = json.load(queries_file)
+                registered = (path, {
+                    get_document_hash(query): query for query in queries})
+                _registered_queries = registered
+    return registered[1]
+
+
+def get_persisted_query(document_hash):
+    """Return the document registered under the hash, None if unknown."""
+    query = get_registered_queries().get(document_hash)
+    if query is not None or settings.GRAPHQL_PERSISTED_QUERIES_ONLY:
+        return query
+    document = get_document_cache().peek(document_hash)
+    if document is not None:
+        return document.document_string
+    return cache.get(PERSISTED_QUERY_KEY % (document_hash, ))
+
+
+def persist_query(document_hash, query):
+    """Register a document sent by a client, unless it's too long."""
+    if len(query) > settings.GRAPHQL_PERSISTED_QUERY_MAX_SIZE:
+        return
+    cache.set(
+        PERSISTED_QUERY_KEY % (document_hash, ), query,
+        timeout=settings.GRAPHQL_PERSISTED_QUERY_TIMEOUT)
+
+
+def get_persisted_query_hash(request, data):
+    extensions = request.GET.get('extensions') or data.get('extensions')
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            raise PersistedQueryError('Extensions are invalid JSON.')
+    persisted_query = (extensions or {}).get('persistedQuery') or {}
+    return persisted_query.get('sha256Hash')
+
+
+def resolve_query(request, data, query):
+    """Return the document a GraphQL request asks to execute.
+
+    Following the automatic persisted queries protocol of Apollo, clients
+    may send a SHA-256 hash of the document in the `persistedQuery`
+    extension instead of the document. Unknown hashes are answered with a
+    `PersistedQueryNotFound` error and clients send them again along with
+    their documents, which registers them for
+    `GRAPHQL_PERSISTED_QUERY_TIMEOUT` seconds.
+
+    With `GRAPHQL_PERSISTED_QUERIES_ONLY` set, users other than staff may
+    only execute documents listed in `GRAPHQL_PERSISTED_QUERIES_PATH`.
+    """
+    document_hash = get_persisted_query_hash(request, data)
+    if document_hash and not query:
+        query = get_persisted_query(document_hash)
+        if query is None:
+            raise PersistedQueryError('PersistedQueryNotFound')
+        return query
+    if not query:
+        return query
+    query_hash = get_document_hash(query)
+    if document_hash and document_hash != query_hash:
+        raise PersistedQueryError('Provided sha256Hash does not match query.')
+    if settings.GRAPHQL_PERSISTED_QUERIES_ONLY:
+        user = getattr(request, 'user', None)
+        is_staff = user is not None and user.is_staff
+        if not is_staff and query_hash not in get_registered_queries():
+            raise PersistedQueryError('Only persisted queries are allowed.')
+    elif document_hash and query_hash not in get_document_cache():
+        persist_query(document_hash, query)
+    return query
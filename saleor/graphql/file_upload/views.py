@@ -1,7 +1,11 @@
 from graphene_django.views import GraphQLView
+from graphql.execution import ExecutionResult
 import json
 import graphene
 
+from ..documents import PersistedQueryError, resolve_query
+from ..response_cache import patch_cacheable_response
+
 # This class is modified verion of the `ModifiedGraphQLView` class from
 # `graphene-file-upload` (https://github.com/lmcgartland/graphene-file-upload).
 
@@ -39,6 +43,21 @@ class FileUploadGraphQLView(GraphQLView):
                     request, data)
         return query, variables, operation_name, id
 
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if getattr(request, 'cacheable_response', False) and (
+                response.status_code == 200):
+            response = patch_cacheable_response(request, response)
+        return response
+
+    def execute_graphql_request(self, request, data, query, *args, **kwargs):
+        try:
+            query = resolve_query(request, data, query)
+        except PersistedQueryError as e:
+            return ExecutionResult(errors=[e], invalid=True)
+        return super().execute_graphql_request(
+            request, data, query, *args, **kwargs)
+
 
 def getKey(key):
     try:
@@ -3,6 +3,7 @@ from graphene import relay
 from graphene_django import DjangoObjectType
 
 from ...order import models
+from ..core.optimizer import QueryHints
 from ..core.types.common import CountableDjangoObjectType
 from ..core.types.money import Money, TaxedMoney
 
@@ -54,8 +55,12 @@ class Order(CountableDjangoObjectType):
         interfaces = [relay.Node]
         model = models.Order
         exclude_fields = [
-            'shipping_price_gross', 'shipping_price_net', 'total_gross',
-            'total_net']
+            'search_vector', 'shipping_price_gross', 'shipping_price_net',
+            'total_gross', 'total_net']
+        query_hints = {
+            'shipping_price': QueryHints(
+                only=['shipping_price_net', 'shipping_price_gross']),
+            'total': QueryHints(only=['total_net', 'total_gross'])}
 
     @staticmethod
     def resolve_subtotal(obj, info):
@@ -120,6 +125,9 @@ class OrderLine(CountableDjangoObjectType):
         interfaces = [relay.Node]
         exclude_fields = [
             'order', 'unit_price_gross', 'unit_price_net', 'variant']
+        query_hints = {
+            'unit_price': QueryHints(
+                only=['unit_price_net', 'unit_price_gross'])}
 
 
 class OrderNote(CountableDjangoObjectType):
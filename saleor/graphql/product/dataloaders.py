@@ -0,0 +1,67 @@
+from collections import defaultdict
+
+from django.db.models import F
+
+from ...product import models
+from ..core.dataloaders import DataLoader
+
+
+class ObjectByIdLoader(DataLoader):
+    model = None
+
+    def batch_load(self, keys):
+        objects = self.model.objects.in_bulk(keys)
+        return [objects.get(key) for key in keys]
+
+
+class ObjectsByForeignKeyLoader(DataLoader):
+    """Load lists of objects pointing to given primary keys."""
+
+    model = None
+    field = None
+
+    def get_queryset(self, keys):
+        return self.model.objects.filter(**{'%s__in' % self.field: keys})
+
+    def batch_load(self, keys):
+        objects = defaultdict(list)
+        for obj in self.get_queryset(keys):
+            objects[getattr(obj, self.field)].append(obj)
+        return [objects[key] for key in keys]
+
+
+class CategoryByIdLoader(ObjectByIdLoader):
+    model = models.Category
+
+
+class ProductByIdLoader(ObjectByIdLoader):
+    model = models.Product
+
+
+class ProductTypeByIdLoader(ObjectByIdLoader):
+    model = models.ProductType
+
+
+class AttributeValuesByAttributeIdLoader(ObjectsByForeignKeyLoader):
+    model = models.AttributeChoiceValue
+    field = 'attribute_id'
+
+
+class ImagesByProductIdLoader(ObjectsByForeignKeyLoader):
+    model = models.ProductImage
+    field = 'product_id'
+
+
+class ImagesByVariantIdLoader(ObjectsByForeignKeyLoader):
+    model = models.ProductImage
+    field = 'variant_id'
+
+    def get_queryset(self, keys):
+        return self.model.objects.filter(
+            variant_images__variant_id__in=keys).annotate(
+                variant_id=F('variant_images__variant_id'))
+
+
+class VariantsByProductIdLoader(ObjectsByForeignKeyLoader):
+    model = models.ProductVariant
+    field = 'product_id'
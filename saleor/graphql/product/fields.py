@@ -1,7 +1,14 @@
+from functools import partial
+
 import graphene
 from django import forms
+from django.db.models.query import QuerySet
+from graphene_django.filter import DjangoFilterConnectionField
 from graphene_django.forms.converter import convert_form_field
+from graphene_django.utils import maybe_queryset
+from promise import Promise
 
+from ..core.fields import OptimizedFilterConnectionField
 from .scalars import AttributeScalar
 
 
@@ -12,3 +19,51 @@ class AttributeField(forms.Field):
 @convert_form_field.register(AttributeField)
 def convert_form_field_to_list(field):
     return graphene.List(AttributeScalar)
+
+
+class FacetedFilterConnectionField(OptimizedFilterConnectionField):
+    """Filter connection field that allows its connection to count facets.
+
+    The resolved connection gets a `get_attribute_facets` callable returning
+    attribute facets of the products matching the filters and returned by
+    the field's resolver.
+    """
+
+    @classmethod
+    def connection_resolver(
+            cls, resolver, connection, default_manager, max_limit,
+            enforce_first_or_last, filterset_class, filtering_args, root,
+            info, **args):
+        filter_kwargs = {k: v for k, v in args.items() if k in filtering_args}
+        filterset = filterset_class(
+            data=filter_kwargs, queryset=default_manager.get_queryset(),
+            request=info.context)
+        resolved = {}
+
+        def keep_iterable(iterable):
+            resolved['iterable'] = iterable
+            return iterable
+
+        def resolve_iterable(root, info, **kwargs):
+            iterable = resolver(root, info, **kwargs)
+            if Promise.is_thenable(iterable):
+                return Promise.resolve(iterable).then(keep_iterable)
+            return keep_iterable(iterable)
+
+        def add_facets(result):
+            iterable = maybe_queryset(resolved.get('iterable'))
+            if not isinstance(iterable, QuerySet):
+                iterable = None
+            result.get_attribute_facets = partial(
+                filterset.get_attribute_facets, iterable)
+            return result
+
+        # The filter set is created above to keep it for facets, so skip
+        # the implementation of DjangoFilterConnectionField
+        # pylint: disable=bad-super-call
+        result = super(DjangoFilterConnectionField, cls).connection_resolver(
+            resolve_iterable, connection, filterset.qs, max_limit,
+            enforce_first_or_last, root, info, **args)
+        if Promise.is_thenable(result):
+            return Promise.resolve(result).then(add_facets)
+        return add_facets(result)
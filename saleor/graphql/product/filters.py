@@ -1,18 +1,41 @@
-import functools
-import operator
 from collections import defaultdict
 
-from django.db.models import Q
 from django_filters import OrderingFilter
 from django_filters.fields import Lookup
 from graphene_django.filter.filterset import Filter
 
-from ...product.filters import SORT_BY_FIELDS
-from ...product.models import Product, ProductAttribute
+from ...core.utils.filters import filter_queryset_excluding
+from ...product.filters import SORT_BY_FIELD_LABELS, SORT_BY_MODEL_FIELDS
+from ...product.models import Product
+from ...product.utils.attributes import (
+    get_attribute_registry, get_attributes_lookup)
+from ...product.utils.facets import get_attribute_facets
 from ..core.filters import DistinctFilterSet
 from .fields import AttributeField
 
 
+def get_attribute_selection(value):
+    """Return a `{attribute_pk: value_pks}` mapping for `attribute:value`
+    pairs.
+
+    Unknown values of a known attribute are skipped, they match no products.
+    """
+    registry = get_attribute_registry()
+    selection = defaultdict(list)
+    # Convert attribute:value pairs into a dictionary where
+    # attributes are keys and values are grouped in lists
+    for attr_name, val_slug in value:
+        attr_pk = registry.get_attribute_pk(attr_name)
+        if attr_pk is None:
+            raise ValueError('Unknown attribute name: %r' % (attr_name, ))
+        # an attribute with unknown values only still limits the products
+        values = selection[attr_pk]
+        attr_val_pk = registry.get_value_pk(attr_pk, val_slug)
+        if attr_val_pk is not None:
+            values.append(attr_val_pk)
+    return dict(selection)
+
+
 class ProductAttributeFilter(Filter):
     field_class = AttributeField
 
@@ -23,37 +46,15 @@ class ProductAttributeFilter(Filter):
         if not value:
             return qs.distinct() if self.distinct else qs
 
-        attributes = ProductAttribute.objects.prefetch_related('values')
-        attributes_map = {
-            attribute.slug: attribute.pk for attribute in attributes}
-        values_map = {
-            attr.slug: {value.slug: value.pk for value in attr.values.all()}
-            for attr in attributes}
-        queries = defaultdict(list)
-        # Convert attribute:value pairs into a dictionary where
-        # attributes are keys and values are grouped in lists
-        for attr_name, val_slug in value:
-            if attr_name not in attributes_map:
-                raise ValueError('Unknown attribute name: %r' % (attr_name, ))
-            attr_pk = attributes_map[attr_name]
-            attr_val_pk = values_map[attr_name].get(val_slug, val_slug)
-            queries[attr_pk].append(attr_val_pk)
-        # Combine filters of the same attribute with OR operator
-        # and then combine full query with AND operator.
-        combine_and = [
-            functools.reduce(
-                operator.or_, [
-                    Q(**{'variants__attributes__%s' % (key, ): v}) |
-                    Q(**{'attributes__%s' % (key, ): v}) for v in values])
-            for key, values in queries.items()]
-        query = functools.reduce(operator.and_, combine_and)
-        qs = self.get_method(qs)(query)
+        # Products have to use any of the selected values of every attribute
+        qs = self.get_method(qs)(
+            get_attributes_lookup(get_attribute_selection(value)))
         return qs.distinct() if self.distinct else qs
 
 
 class ProductFilterSet(DistinctFilterSet):
     sort_by = OrderingFilter(
-        fields=SORT_BY_FIELDS.keys(), field_labels=SORT_BY_FIELDS)
+        fields=SORT_BY_MODEL_FIELDS, field_labels=SORT_BY_FIELD_LABELS)
 
     class Meta:
         model = Product
@@ -65,11 +66,32 @@ class ProductFilterSet(DistinctFilterSet):
             'product_type__name': ['exact'],
             'is_published': ['exact']}
 
+    def get_attribute_facets(self, queryset=None):
+        """Return `{attribute_pk: {value_pk: count}}` for filtered products.
+
+        `queryset` further limits the products, eg. to the ones returned by
+        a resolver. Counts of attributes selected in the `attributes` filter
+        ignore their own selection.
+        """
+        products = filter_queryset_excluding(self, ['attributes'])
+        if queryset is not None:
+            products = products.filter(pk__in=queryset.values('pk'))
+        value = self.form.cleaned_data.get('attributes') if (
+            self.is_bound and self.form.is_valid()) else None
+        if isinstance(value, Lookup):
+            value = value.value
+        selection = get_attribute_selection(value) if value else {}
+        return get_attribute_facets(products, selection)
+
     @classmethod
     def filter_for_field(cls, f, field_name, lookup_expr='exact'):
         if field_name == 'attributes':
             return ProductAttributeFilter(
-                field_name=field_name, lookup_expr=lookup_expr, distinct=True)
+                field_name=field_name, lookup_expr=lookup_expr)
+        if field_name == 'price':
+            # filter by the price customers pay, with discounts applied
+            f = Product._meta.get_field('min_price')
+            field_name = 'min_price'
         # this class method is called during class construction so we can't
         # reference ProductFilterSet here yet
         # pylint: disable=E1003
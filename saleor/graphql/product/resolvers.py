@@ -1,15 +1,22 @@
 import graphene
 from django.db.models import Q
+from django.utils.translation import get_language
 
 from ...product import models
-from ...product.utils import products_with_details
+from ...product.utils import products_visible_to_user
+from ...product.utils.categories import get_category_tree
+from ...search import suggestions
 from ..utils import filter_by_query_param
-from .types import Category
+from .types import Category, SearchSuggestion
 
 PRODUCT_SEARCH_FIELDS = ('name', 'description', 'category__name')
 CATEGORY_SEARCH_FIELDS = ('name', 'slug', 'description', 'parent__name')
 COLLECTION_SEARCH_FIELDS = ('name', 'slug')
 ATTRIBUTES_SEARCH_FIELDS = ('name', 'slug')
+SEARCH_SUGGESTION_TYPES = {
+    suggestions.PRODUCT: 'Product',
+    suggestions.CATEGORY: 'Category',
+    suggestions.COLLECTION: 'Collection'}
 
 
 def resolve_attributes(info, category_id, query):
@@ -22,11 +29,12 @@ def resolve_attributes(info, category_id, query):
             info, category_id, Category)
         if category is None:
             return queryset.none()
-        tree = category.get_descendants(include_self=True)
+        category_ids = get_category_tree().get_descendant_ids(
+            category.pk, include_self=True)
         product_types = {
             obj[0]
             for obj in models.Product.objects.filter(
-                category__in=tree).values_list('product_type_id')}
+                category_id__in=category_ids).values_list('product_type_id')}
         queryset = queryset.filter(
             Q(product_types__in=product_types)
             | Q(product_variant_types__in=product_types))
@@ -52,7 +60,7 @@ def resolve_collections(info, query):
 
 def resolve_products(info, category_id, query):
     user = info.context.user
-    queryset = products_with_details(user=user).distinct()
+    queryset = products_visible_to_user(user=user).distinct()
     queryset = filter_by_query_param(queryset, query, PRODUCT_SEARCH_FIELDS)
     if category_id is not None:
         category = graphene.Node.get_node_from_global_id(
@@ -65,3 +73,15 @@ def resolve_products(info, category_id, query):
 
 def resolve_product_types():
     return models.ProductType.objects.all().distinct()
+
+
+def resolve_search_suggestions(query, first):
+    return [
+        SearchSuggestion(
+            id=graphene.Node.to_global_id(
+                SEARCH_SUGGESTION_TYPES[suggestion['kind']],
+                suggestion['pk']),
+            kind=suggestion['kind'], name=suggestion['name'],
+            url=suggestion['url'])
+        for suggestion in suggestions.get_suggestions(
+            query, get_language(), limit=first)]
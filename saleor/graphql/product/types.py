@@ -1,37 +1,38 @@
 import graphene
 from graphene import relay
-from graphene_django.filter import DjangoFilterConnectionField
 from graphql.error import GraphQLError
 
 from ...product import models
 from ...product.templatetags.product_images import get_thumbnail
-from ...product.utils import products_with_details
+from ...product.utils import products_visible_to_user
+from ...product.utils.attributes import get_attribute_registry
 from ...product.utils.availability import get_availability
+from ...product.utils.categories import get_category_tree
 from ...product.utils.costs import (
     get_margin_for_variant, get_product_costs_data)
+from ...search import suggestions
+from ..core.connection import CountableConnection
+from ..core.dataloaders import get_prefetched
 from ..core.decorators import permission_required
+from ..core.fields import OptimizedFilterConnectionField
 from ..core.filters import DistinctFilterSet
+from ..core.optimizer import QueryHints
 from ..core.types.common import CountableDjangoObjectType
 from ..core.types.money import (
     Money, MoneyRange, TaxedMoney, TaxedMoneyRange, TaxRateType)
 from ..utils import get_database_id
+from .dataloaders import (
+    AttributeValuesByAttributeIdLoader, CategoryByIdLoader,
+    ImagesByProductIdLoader, ImagesByVariantIdLoader, ProductByIdLoader,
+    ProductTypeByIdLoader, VariantsByProductIdLoader)
 from .filters import ProductFilterSet
 
 
 def resolve_attribute_list(attributes):
-    keys = list(attributes.keys())
-    values = list(attributes.values())
-
-    attributes_map = {
-        att.pk: att for att in models.ProductAttribute.objects.filter(
-            pk__in=keys)}
-    values_map = {
-        val.pk: val for val in models.AttributeChoiceValue.objects.filter(
-            pk__in=values)}
-
+    registry = get_attribute_registry()
     attributes_list = [SelectedAttribute(
-        attribute=attributes_map.get(int(k)),
-        value=values_map.get(int(v)))
+        attribute=registry.get_attribute(int(k)),
+        value=registry.get_value(int(v)))
         for k, v in attributes.items()]
     return attributes_list
 
@@ -62,9 +63,13 @@ class ProductAttribute(CountableDjangoObjectType):
         interfaces = [relay.Node]
         filter_fields = ['id', 'slug']
         model = models.ProductAttribute
+        query_hints = {'values': QueryHints(prefetch_related=['values'])}
 
     def resolve_values(self, info):
-        return self.values.all()
+        values = get_prefetched(self, 'values')
+        if values is not None:
+            return values
+        return AttributeValuesByAttributeIdLoader(info.context).load(self.pk)
 
 
 class Margin(graphene.ObjectType):
@@ -101,9 +106,14 @@ class ProductVariant(CountableDjangoObjectType):
     class Meta:
         description = """Represents a version of a product such as different
         size or color."""
-        exclude_fields = ['variant_images']
+        exclude_fields = ['variant_images', 'discounted_price']
         interfaces = [relay.Node]
         model = models.ProductVariant
+        query_hints = {
+            'stock_quantity': QueryHints(
+                only=['quantity', 'quantity_allocated']),
+            'margin': QueryHints(only=None, select_related=['product']),
+            'images': QueryHints(prefetch_related=['images'])}
 
     def resolve_stock_quantity(self, info):
         return self.quantity_available
@@ -114,6 +124,88 @@ class ProductVariant(CountableDjangoObjectType):
     def resolve_margin(self, info):
         return get_margin_for_variant(self)
 
+    def resolve_product(self, info):
+        if models.ProductVariant.product.is_cached(self):
+            return self.product
+        return ProductByIdLoader(info.context).load(self.product_id)
+
+    def resolve_images(self, info, **kwargs):
+        images = get_prefetched(self, 'images')
+        if images is not None:
+            return images
+        return ImagesByVariantIdLoader(info.context).load(self.pk)
+
+
+class AttributeValueCount(graphene.ObjectType):
+    value = graphene.Field(
+        ProductAttributeValue, description='Value of the attribute.')
+    count = graphene.Int(description='Number of products using the value.')
+
+    class Meta:
+        description = 'Represents the number of products using a value.'
+
+
+class AttributeFacet(graphene.ObjectType):
+    attribute = graphene.Field(
+        ProductAttribute, description='Attribute of the products.')
+    values = graphene.List(
+        AttributeValueCount,
+        description='Values of the attribute with product counts.')
+
+    class Meta:
+        description = 'Represents values of an attribute used by products.'
+
+
+class SearchSuggestionKindEnum(graphene.Enum):
+    PRODUCT = suggestions.PRODUCT
+    CATEGORY = suggestions.CATEGORY
+    COLLECTION = suggestions.COLLECTION
+
+
+class SearchSuggestion(graphene.ObjectType):
+    id = graphene.ID(
+        required=True, description='Global ID of the suggested object.')
+    kind = SearchSuggestionKindEnum(
+        required=True, description='Type of the suggested object.')
+    name = graphene.String(
+        required=True, description='Name of the suggested object.')
+    url = graphene.String(
+        required=True, description='Storefront URL of the object.')
+
+    class Meta:
+        description = 'Represents an object with a name matching a prefix.'
+
+
+class ProductConnection(CountableConnection):
+    class Meta:
+        abstract = True
+
+    facets = graphene.List(
+        AttributeFacet,
+        description="""Attribute values of the products matching the filters
+        with product counts. Counts of attributes used in the `attributes`
+        filter ignore their own selection.""")
+
+    @staticmethod
+    def resolve_facets(root, info):
+        get_attribute_facets = getattr(root, 'get_attribute_facets', None)
+        if get_attribute_facets is None:
+            return None
+        registry = get_attribute_registry()
+        facets = []
+        for attribute_pk, counts in get_attribute_facets().items():
+            attribute = registry.get_attribute(attribute_pk)
+            if attribute is None:
+                continue
+            values = []
+            for value_pk, count in counts.items():
+                value = registry.get_value(value_pk)
+                if value is not None:
+                    values.append(
+                        AttributeValueCount(value=value, count=count))
+            facets.append(AttributeFacet(attribute=attribute, values=values))
+        return facets
+
 
 class ProductAvailability(graphene.ObjectType):
     available = graphene.Boolean()
@@ -156,13 +248,36 @@ class Product(CountableDjangoObjectType):
     class Meta:
         description = """Represents an individual item for sale in the
         storefront."""
+        exclude_fields = [
+            'min_price', 'max_price', 'min_price_undiscounted',
+            'max_price_undiscounted', 'search_vector']
         interfaces = [relay.Node]
         model = models.Product
+        connection_class = ProductConnection
+        query_hints = {
+            'url': QueryHints(only=['name']),
+            'thumbnail_url': QueryHints(prefetch_related=['images']),
+            'availability': QueryHints(
+                only=None, select_related=['category'],
+                prefetch_related=['variants', 'collections']),
+            'purchase_cost': QueryHints(only=None),
+            'margin': QueryHints(only=None),
+            'image_by_id': QueryHints(),
+            'images': QueryHints(prefetch_related=['images']),
+            'variants': QueryHints(prefetch_related=['variants'])}
 
     def resolve_thumbnail_url(self, info, *, size=None):
         if not size:
             size = 255
-        return get_thumbnail(self.get_first_image(), size)
+
+        def get_first_thumbnail(images):
+            return get_thumbnail(images[0].image if images else None, size)
+
+        images = get_prefetched(self, 'images')
+        if images is not None:
+            return get_first_thumbnail(images)
+        return ImagesByProductIdLoader(info.context).load(self.pk).then(
+            get_first_thumbnail)
 
     def resolve_url(self, info):
         return self.get_absolute_url()
@@ -177,7 +292,26 @@ class Product(CountableDjangoObjectType):
         return resolve_attribute_list(self.attributes)
 
     def resolve_product_type(self, info):
-        return self.product_type
+        if models.Product.product_type.is_cached(self):
+            return self.product_type
+        return ProductTypeByIdLoader(info.context).load(self.product_type_id)
+
+    def resolve_category(self, info):
+        if models.Product.category.is_cached(self):
+            return self.category
+        return CategoryByIdLoader(info.context).load(self.category_id)
+
+    def resolve_images(self, info, **kwargs):
+        images = get_prefetched(self, 'images')
+        if images is not None:
+            return images
+        return ImagesByProductIdLoader(info.context).load(self.pk)
+
+    def resolve_variants(self, info, **kwargs):
+        variants = get_prefetched(self, 'variants')
+        if variants is not None:
+            return variants
+        return VariantsByProductIdLoader(info.context).load(self.pk)
 
     @permission_required('product.manage_products')
     def resolve_purchase_cost(self, info):
@@ -198,7 +332,7 @@ class Product(CountableDjangoObjectType):
 
 
 class ProductType(CountableDjangoObjectType):
-    products = DjangoFilterConnectionField(
+    products = OptimizedFilterConnectionField(
         Product,
         filterset_class=ProductFilterSet,
         description='List of products of this type.')
@@ -212,12 +346,12 @@ class ProductType(CountableDjangoObjectType):
 
     def resolve_products(self, info, **kwargs):
         user = info.context.user
-        return products_with_details(
+        return products_visible_to_user(
             user=user).filter(product_type=self).distinct()
 
 
 class Collection(CountableDjangoObjectType):
-    products = DjangoFilterConnectionField(
+    products = OptimizedFilterConnectionField(
         Product, filterset_class=ProductFilterSet,
         description='List of collection products.')
 
@@ -228,25 +362,26 @@ class Collection(CountableDjangoObjectType):
             'name': ['exact', 'icontains', 'istartswith']}
         interfaces = [relay.Node]
         model = models.Collection
+        query_hints = {'products': QueryHints()}
 
     def resolve_products(self, info, **kwargs):
         user = info.context.user
-        return products_with_details(
+        return products_visible_to_user(
             user=user).filter(collections=self).distinct()
 
 
 class Category(CountableDjangoObjectType):
-    products = DjangoFilterConnectionField(
+    products = OptimizedFilterConnectionField(
         Product,
         filterset_class=ProductFilterSet,
         description='List of products in the category.')
     url = graphene.String(
         description='The storefront\'s URL for the category.')
-    ancestors = DjangoFilterConnectionField(
+    ancestors = OptimizedFilterConnectionField(
         lambda: Category,
         filterset_class=DistinctFilterSet,
         description='List of ancestors of the category.')
-    children = DjangoFilterConnectionField(
+    children = OptimizedFilterConnectionField(
         lambda: Category,
         filterset_class=DistinctFilterSet,
         description='List of children of the category.')
@@ -261,12 +396,19 @@ class Category(CountableDjangoObjectType):
         interfaces = [relay.Node]
         filter_fields = ['id', 'name']
         model = models.Category
+        query_hints = {
+            'url': QueryHints(only=['slug']),
+            'ancestors': QueryHints()}
 
     def resolve_ancestors(self, info, **kwargs):
-        return self.get_ancestors().distinct()
+        ancestor_ids = get_category_tree().get_ancestor_ids(self.pk)
+        qs = models.Category.objects.filter(pk__in=ancestor_ids)
+        return qs.order_by('level').distinct()
 
     def resolve_children(self, info, **kwargs):
-        return self.children.distinct()
+        children_ids = get_category_tree().get_children_ids(self.pk)
+        qs = models.Category.objects.filter(pk__in=children_ids)
+        return qs.distinct()
 
     def resolve_url(self, info):
         return self.get_absolute_url()
@@ -290,6 +432,7 @@ class ProductImage(CountableDjangoObjectType):
             'variant_images']
         interfaces = [relay.Node]
         model = models.ProductImage
+        query_hints = {'url': QueryHints(only=['image'])}
 
     def resolve_url(self, info, *, size=None):
         if size:
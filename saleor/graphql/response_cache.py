@@ -0,0 +1,195 @@
+import hashlib
+import json
+from datetime import date
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+    set_response_etag)
+from django.utils.translation import get_language
+from graphene.relay import Connection
+from graphene_django import DjangoObjectType
+from graphql.language import ast
+from graphql.type.definition import get_named_type
+
+from ..core.utils.taxes import TAX_TABLES_VERSION_KEY
+from ..discount.utils import SALE_INDEX_VERSION_KEY
+from ..site.snapshot import SITE_SETTINGS_VERSION_KEY
+from .core.cost import get_operation
+
+RESPONSE_KEY = 'graphql:response:%s'
+TAG_VERSION_KEY = 'graphql:tag-version:%s'
+# root fields of queries returning the same data to all anonymous users
+# sharing a language, country, currency and active discounts
+CACHED_FIELDS = {
+    '__typename', 'categories', 'collections', 'menu', 'products', 'shop'}
+# saving objects of these apps evicts cached responses they are part of
+TAGGED_APPS = {'menu', 'page', 'product', 'site'}
+# saving only these fields never makes objects appear in or disappear from
+# cached lists, so lists of their model are kept
+UNLISTED_FIELDS = {'quantity', 'quantity_allocated'}
+
+_type_models = {}
+
+
+def get_model_tag(model):
+    return model._meta.label_lower
+
+
+def get_instance_tag(model, pk):
+    return '%s:%s' % (model._meta.label_lower, pk)
+
+
+def get_type_model(graphql_type):
+    """Return the model of objects a GraphQL type holds, None for others."""
+    named_type = get_named_type(graphql_type)
+    try:
+        return _type_models[named_type.name]
+    except KeyError:
+        pass
+    graphene_type = getattr(named_type, 'graphene_type', None)
+    model = None
+    if graphene_type is not None and issubclass(graphene_type, Connection):
+        graphene_type = graphene_type._meta.node
+    if graphene_type is not None and issubclass(
+            graphene_type, DjangoObjectType):
+        model = graphene_type._meta.model
+    _type_models[named_type.name] = model
+    return model
+
+
+class CacheTagCollector:
+    """GraphQL middleware collecting tags of data a response is built from.
+
+    Every object whose fields are resolved tags the response with its model
+    and primary key. Fields returning objects of a model tag it with the
+    model, so creating or deleting any of its objects evicts the response.
+    """
+
+    def __init__(self):
+        self.tags = set()
+
+    def resolve(self, next, root, info, **args):
+        if isinstance(root, Model):
+            self.tags.add(get_instance_tag(type(root), root.pk))
+        model = get_type_model(info.return_type)
+        if model is not None:
+            self.tags.add(get_model_tag(model))
+        return next(root, info, **args)
+
+
+def get_response_cache_key(document_hash, document_ast, request,
+                           variables=None, operation_name=None):
+    """Return the key of a cacheable response, None if it's not cacheable.
+
+    Only responses to anonymous queries selecting `CACHED_FIELDS` are
+    cached. Keys change with versions of tax rates, sales and site settings,
+    so any change to them invalidates all responses at once.
+    """
+    if not settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT:
+        return None
+    user = getattr(request, 'user', None)
+    if user is None or user.is_authenticated:
+        return None
+    operation = get_operation(document_ast, operation_name)
+    if operation is None or operation.operation != 'query':
+        return None
+    for selection in operation.selection_set.selections:
+        if not isinstance(selection, ast.Field) or (
+                selection.name.value not in CACHED_FIELDS):
+            return None
+    versions = cache.get_many([
+        TAX_TABLES_VERSION_KEY, SALE_INDEX_VERSION_KEY,
+        SITE_SETTINGS_VERSION_KEY])
+    country = getattr(request, 'country', None)
+    key_parts = [
+        document_hash, operation_name, variables or {}, get_language(),
+        getattr(country, 'code', None), getattr(request, 'currency', None),
+        date.today().isoformat(), versions]
+    key_data = json.dumps(key_parts, sort_keys=True, default=str)
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+def get_tag_version_timeout():
+    # versions outlive most responses cached along with them, responses
+    # whose tag versions are gone are not served
+    return 2 * settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT
+
+
+def get_tag_versions(tags):
+    """Return current versions of tags, creating them for new tags.
+
+    Versions are random tokens, so a version evicted and created again
+    never matches the one stored along with a response.
+    """
+    keys = {tag: TAG_VERSION_KEY % (tag, ) for tag in tags}
+    versions = cache.get_many(list(keys.values()))
+    missing = [key for key in keys.values() if key not in versions]
+    if missing:
+        for key in missing:
+            # versions created meanwhile by other processes are kept
+            cache.add(key, uuid4().hex, timeout=get_tag_version_timeout())
+        versions.update(cache.get_many(missing))
+    return {tag: versions.get(key) for tag, key in keys.items()}
+
+
+def get_cached_response(cache_key):
+    """Return cached response data unless any of its tags has changed."""
+    entry = cache.get(RESPONSE_KEY % (cache_key, ))
+    if entry is None:
+        return None
+    data, tag_versions = entry
+    current_versions = cache.get_many(
+        [TAG_VERSION_KEY % (tag, ) for tag in tag_versions])
+    for tag, version in tag_versions.items():
+        if current_versions.get(TAG_VERSION_KEY % (tag, )) != version:
+            return None
+    return data
+
+
+def cache_response(cache_key, data, tags):
+    tag_versions = get_tag_versions(tags)
+    if None in tag_versions.values():
+        return
+    cache.set(
+        RESPONSE_KEY % (cache_key, ), (data, tag_versions),
+        timeout=settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT)
+
+
+def get_changed_tags(model, instance, model_changed=False):
+    """Return tags of responses affected by a saved or deleted object.
+
+    Objects referred to by foreign keys are affected too, as their
+    translations, variants, images or members are part of them.
+    """
+    tags = {get_instance_tag(model, instance.pk)}
+    if model_changed:
+        tags.add(get_model_tag(model))
+    for field in model._meta.concrete_fields:
+        if field.many_to_one or field.one_to_one:
+            pk = getattr(instance, field.attname)
+            if pk is not None:
+                tags.add(get_instance_tag(field.related_model, pk))
+    return tags
+
+
+def invalidate_tags(tags):
+    """Evict cached responses tagged with any of the tags."""
+    cache.set_many(
+        {TAG_VERSION_KEY % (tag, ): uuid4().hex for tag in tags},
+        timeout=get_tag_version_timeout())
+
+
+def patch_cacheable_response(request, response):
+    """Let clients reuse a cacheable response for as long as it's current."""
+    patch_cache_control(
+        response, private=True, max_age=settings.GRAPHQL_RESPONSE_MAX_AGE)
+    patch_vary_headers(response, ['Accept-Language'])
+    set_response_etag(response)
+    if request.method in ('GET', 'HEAD'):
+        return get_conditional_response(
+            request, etag=response['ETag'], response=response)
+    return response
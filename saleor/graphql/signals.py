@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import transaction
+
+from .response_cache import (
+    TAGGED_APPS, UNLISTED_FIELDS, get_changed_tags, get_instance_tag,
+    get_model_tag, invalidate_tags)
+
+
+def invalidate_tags_on_commit(sender, tags):
+    if settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT and (
+            sender._meta.app_label in TAGGED_APPS):
+        transaction.on_commit(lambda: invalidate_tags(tags))
+
+
+def object_saved(sender, instance, created=False, raw=False,
+                 update_fields=None, **kwargs):
+    """Evict cached GraphQL responses built from a saved object.
+
+    Updated objects may start or stop matching filters of cached lists, like
+    products being published, so lists of their model are evicted as well.
+    """
+    if raw:
+        return
+    model_changed = created or not (
+        update_fields and set(update_fields) <= UNLISTED_FIELDS)
+    invalidate_tags_on_commit(
+        sender,
+        get_changed_tags(sender, instance, model_changed=model_changed))
+
+
+def object_deleted(sender, instance, **kwargs):
+    invalidate_tags_on_commit(
+        sender, get_changed_tags(sender, instance, model_changed=True))
+
+
+def relations_changed(sender, instance, action, model, pk_set, **kwargs):
+    if action not in {'post_add', 'post_remove', 'post_clear'}:
+        return
+    tags = {get_instance_tag(type(instance), instance.pk)}
+    if pk_set is None:
+        tags.add(get_model_tag(model))
+    else:
+        tags.update(get_instance_tag(model, pk) for pk in pk_set)
+    invalidate_tags_on_commit(type(instance), tags)
@@ -0,0 +1,34 @@
+# Generated by Django 2.0.8 on 2018-09-14 08:27
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from saleor.search.vectors import (
+    get_order_search_vector, update_search_vectors)
+
+
+def fill_search_vectors(apps, schema_editor):
+    Order = apps.get_model('order', 'Order')
+    update_search_vectors(Order.objects.all(), get_order_search_vector())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0024_user_search_vector'),
+        ('order', '0052_auto_20180822_0720'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='order_search_gin'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,8 @@ from operator import attrgetter
 from uuid import uuid4
 
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models import F, Max, Sum
@@ -98,6 +100,9 @@ class Order(models.Model):
     weight = MeasurementField(
         measurement=Weight, unit_choices=WeightUnits.CHOICES,
         default=zero_weight)
+    # kept up to date by `saleor.search.signals` for full text search
+    search_vector = SearchVectorField(
+        blank=True, null=True, editable=False)
     objects = OrderQueryset.as_manager()
 
     class Meta:
@@ -105,6 +110,7 @@ class Order(models.Model):
         permissions = ((
             'manage_orders',
             pgettext_lazy('Permission description', 'Manage orders.')),)
+        indexes = [GinIndex(fields=['search_vector'], name='order_search_gin')]
 
     def save(self, *args, **kwargs):
         if not self.token:
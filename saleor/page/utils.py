@@ -1,8 +1,9 @@
+from ..core.utils.translations import prefetch_translations
 from .models import Page
 
 
 def pages_visible_to_user(user):
-    qs = Page.objects.prefetch_related('translations')
+    qs = prefetch_translations(Page.objects.all(), 'translations')
     if user.is_authenticated and user.is_active and user.is_staff:
         return qs
     return qs.public()
@@ -1,6 +1,47 @@
+from django.apps import AppConfig
 from django.utils.translation import pgettext_lazy
 
 
+class ProductAppConfig(AppConfig):
+    name = 'saleor.product'
+
+    def ready(self):
+        from django.db.models.signals import (
+            m2m_changed, post_delete, post_save)
+        from mptt.signals import node_moved
+        from .models import (
+            AttributeChoiceValue, AttributeChoiceValueTranslation, Category,
+            Product, ProductAttribute, ProductAttributeTranslation,
+            ProductTranslation, ProductType, ProductVariant,
+            ProductVariantTranslation)
+        from .signals import (
+            attributes_changed, category_tree_changed, product_changed,
+            product_deleted, product_translation_changed, variant_changed,
+            variant_translation_changed)
+        post_save.connect(product_changed, sender=Product)
+        post_delete.connect(product_deleted, sender=Product)
+        post_save.connect(variant_changed, sender=ProductVariant)
+        post_delete.connect(variant_changed, sender=ProductVariant)
+        post_save.connect(
+            product_translation_changed, sender=ProductTranslation)
+        post_delete.connect(
+            product_translation_changed, sender=ProductTranslation)
+        post_save.connect(
+            variant_translation_changed, sender=ProductVariantTranslation)
+        post_delete.connect(
+            variant_translation_changed, sender=ProductVariantTranslation)
+        for model in [
+                ProductAttribute, ProductAttributeTranslation,
+                AttributeChoiceValue, AttributeChoiceValueTranslation]:
+            post_save.connect(attributes_changed, sender=model)
+            post_delete.connect(attributes_changed, sender=model)
+        m2m_changed.connect(
+            attributes_changed, sender=ProductType.variant_attributes.through)
+        post_save.connect(category_tree_changed, sender=Category)
+        post_delete.connect(category_tree_changed, sender=Category)
+        node_moved.connect(category_tree_changed, sender=Category)
+
+
 class ProductAvailabilityStatus:
     NOT_PUBLISHED = 'not-published'
     VARIANTS_MISSSING = 'variants-missing'
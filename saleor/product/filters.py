@@ -6,19 +6,54 @@ from django.utils.translation import pgettext_lazy
 from django_filters import MultipleChoiceFilter, OrderingFilter, RangeFilter
 
 from ..core.filters import SortedFilterSet
+from ..core.utils.filters import filter_queryset_excluding
 from .models import Product, ProductAttribute
+from .utils.attributes import get_attribute_registry, get_attributes_lookup
+from .utils.bitmaps import get_product_index
+from .utils.categories import get_category_tree
+from .utils.facets import get_attribute_facets
 
 SORT_BY_FIELDS = OrderedDict([
     ('name', pgettext_lazy('Product list sorting option', 'name')),
     ('price', pgettext_lazy('Product list sorting option', 'price'))])
 
+# Products are sorted and filtered by the stored price of their cheapest
+# variant with discounts applied, exposed under the `price` parameter
+SORT_BY_MODEL_FIELDS = OrderedDict([
+    ('name', 'name'),
+    ('min_price', 'price')])
+SORT_BY_FIELD_LABELS = {
+    field: SORT_BY_FIELDS[param]
+    for field, param in SORT_BY_MODEL_FIELDS.items()}
+
+
+class AttributeValuesFilter(MultipleChoiceFilter):
+    """Filter products using any of the selected values of an attribute.
+
+    Matching products are looked up in the product index instead of
+    comparing attributes of products and their variants in the database.
+    """
+
+    def __init__(self, *args, attribute_pk, **kwargs):
+        kwargs.setdefault('distinct', False)
+        super().__init__(*args, **kwargs)
+        self.attribute_pk = attribute_pk
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        scope = self.parent.get_index_scope(get_product_index())
+        return qs.filter(
+            get_attributes_lookup({self.attribute_pk: value}, scope))
+
 
 class ProductFilter(SortedFilterSet):
     sort_by = OrderingFilter(
         label=pgettext_lazy('Product list sorting form', 'Sort by'),
-        fields=SORT_BY_FIELDS.keys(),
-        field_labels=SORT_BY_FIELDS)
+        fields=SORT_BY_MODEL_FIELDS,
+        field_labels=SORT_BY_FIELD_LABELS)
     price = RangeFilter(
+        field_name='min_price',
         label=pgettext_lazy('Currency amount', 'Price'))
 
     class Meta:
@@ -32,20 +67,19 @@ class ProductFilter(SortedFilterSet):
         self.filters.update(self._get_product_attributes_filters())
         self.filters.update(self._get_product_variants_attributes_filters())
         self.filters = OrderedDict(sorted(self.filters.items()))
+        for filter_ in self.filters.values():
+            filter_.parent = self
 
     def _get_attributes(self):
+        registry = get_attribute_registry()
         q_product_attributes = self._get_product_attributes_lookup()
         q_variant_attributes = self._get_variant_attributes_lookup()
-        product_attributes = (
-            ProductAttribute.objects.all()
-            .prefetch_related('translations', 'values__translations')
-            .filter(q_product_attributes)
-            .distinct())
-        variant_attributes = (
-            ProductAttribute.objects.all()
-            .prefetch_related('translations', 'values__translations')
-            .filter(q_variant_attributes)
-            .distinct())
+        product_attributes = registry.get_attributes(
+            ProductAttribute.objects.filter(q_product_attributes).values_list(
+                'pk', flat=True).distinct())
+        variant_attributes = registry.get_attributes(
+            ProductAttribute.objects.filter(q_variant_attributes).values_list(
+                'pk', flat=True).distinct())
         return product_attributes, variant_attributes
 
     def _get_product_attributes_lookup(self):
@@ -57,8 +91,8 @@ class ProductFilter(SortedFilterSet):
     def _get_product_attributes_filters(self):
         filters = {}
         for attribute in self.product_attributes:
-            filters[attribute.slug] = MultipleChoiceFilter(
-                name='attributes__%s' % attribute.pk,
+            filters[attribute.slug] = AttributeValuesFilter(
+                attribute_pk=attribute.pk,
                 label=attribute.translated.name,
                 widget=CheckboxSelectMultiple,
                 choices=self._get_attribute_choices(attribute))
@@ -67,8 +101,8 @@ class ProductFilter(SortedFilterSet):
     def _get_product_variants_attributes_filters(self):
         filters = {}
         for attribute in self.variant_attributes:
-            filters[attribute.slug] = MultipleChoiceFilter(
-                name='variants__attributes__%s' % attribute.pk,
+            filters[attribute.slug] = AttributeValuesFilter(
+                attribute_pk=attribute.pk,
                 label=attribute.translated.name,
                 widget=CheckboxSelectMultiple,
                 choices=self._get_attribute_choices(attribute))
@@ -77,7 +111,37 @@ class ProductFilter(SortedFilterSet):
     def _get_attribute_choices(self, attribute):
         return [
             (choice.pk, choice.translated.name)
-            for choice in attribute.values.all()]
+            for choice in get_attribute_registry().get_values(attribute.pk)]
+
+    def get_index_scope(self, index):
+        """Return a bitmap of products the listed products are limited to.
+
+        Narrows down product ids looked up in the product index, `None`
+        means the index is not used to limit the products.
+        """
+        return None
+
+    def get_facets(self):
+        """Return `{attribute slug: {value pk: count}}` for filtered products.
+
+        Counts of an attribute with selected values ignore its own selection
+        to show how many products each of its values would match.
+        """
+        attributes = (
+            list(self.product_attributes) + list(self.variant_attributes))
+        selection = {}
+        if self.is_bound and self.form.is_valid():
+            selection = {
+                attribute.pk: self.form.cleaned_data[attribute.slug]
+                for attribute in attributes
+                if self.form.cleaned_data.get(attribute.slug)}
+        products = filter_queryset_excluding(
+            self, [attribute.slug for attribute in attributes])
+        counts = get_attribute_facets(
+            products, selection, [attribute.pk for attribute in attributes])
+        return {
+            attribute.slug: counts.get(attribute.pk, {})
+            for attribute in attributes}
 
     def validate_sort_by(self, value):
         if value.strip('-') not in SORT_BY_FIELDS:
@@ -93,6 +157,11 @@ class ProductCategoryFilter(ProductFilter):
         self.category = kwargs.pop('category')
         super().__init__(*args, **kwargs)
 
+    def get_index_scope(self, index):
+        return index.get_category_bitmap(
+            get_category_tree().get_descendant_ids(
+                self.category.pk, include_self=True))
+
     def _get_product_attributes_lookup(self):
         return Q(product_types__products__category=self.category)
 
@@ -12,11 +12,15 @@ from ..core.utils.taxes import display_gross_prices
 class VariantChoiceField(forms.ModelChoiceField):
     discounts = None
     taxes = None
+    price_sheet = None
     display_gross = True
 
     def label_from_instance(self, obj):
         variant_label = smart_text(obj)
-        price = obj.get_price(self.discounts, self.taxes)
+        if self.price_sheet is not None:
+            price = self.price_sheet.get_variant_prices(obj).price
+        else:
+            price = obj.get_price(self.discounts, self.taxes)
         price = price.gross if self.display_gross else price.net
         label = pgettext_lazy(
             'Variant choice field label',
@@ -24,11 +28,12 @@ class VariantChoiceField(forms.ModelChoiceField):
                 'variant_label': variant_label, 'price': amount(price)}
         return label
 
-    def update_field_data(self, variants, discounts, taxes):
+    def update_field_data(self, variants, discounts, taxes, price_sheet=None):
         """Initialize variant picker metadata."""
         self.queryset = variants
         self.discounts = discounts
         self.taxes = taxes
+        self.price_sheet = price_sheet
         self.empty_label = None
         self.display_gross = display_gross_prices()
         images_map = {
@@ -46,10 +51,12 @@ class ProductForm(AddToCartForm):
     variant = VariantChoiceField(queryset=None)
 
     def __init__(self, *args, **kwargs):
+        price_sheet = kwargs.pop('price_sheet', None)
         super().__init__(*args, **kwargs)
         variant_field = self.fields['variant']
         variant_field.update_field_data(
-            self.product.variants.all(), self.discounts, self.taxes)
+            self.product.variants.all(), self.discounts, self.taxes,
+            price_sheet)
 
     def get_variant(self, cleaned_data):
         return cleaned_data.get('variant')
@@ -0,0 +1,133 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from prices import Money
+
+from ...models import (
+    AttributeChoiceValue, Category, Product, ProductAttribute, ProductType,
+    ProductVariant)
+from ...utils.attributes import get_attributes_query
+
+GIN_INDEXES = ['product_attributes_gin', 'variant_attributes_gin']
+
+
+def get_key_lookup_query(selection):
+    """Return the attribute filter in its former key lookup form."""
+    query = Q()
+    for attribute_pk, value_pks in selection.items():
+        attribute_query = Q()
+        for value_pk in value_pks:
+            attribute_query |= (
+                Q(**{'attributes__%s' % (attribute_pk, ): str(value_pk)}) |
+                Q(**{'variants__attributes__%s' % (attribute_pk, ): str(
+                    value_pk)}))
+        query &= attribute_query
+    return query
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare query plans and latencies of attribute filters with and '
+        'without GIN indexes on a synthetic catalog, all created data is '
+        'rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products', type=int, default=100000,
+            help='Number of products in the synthetic catalog')
+        parser.add_argument(
+            '--attributes', type=int, default=4,
+            help='Number of product and variant attributes')
+        parser.add_argument(
+            '--values', type=int, default=20,
+            help='Number of values of each attribute')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Number of runs of each query')
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        with transaction.atomic():
+            selection = self.create_catalog(
+                options['products'], options['attributes'],
+                options['values'])
+            self.compare(selection, 'with GIN indexes')
+            with connection.cursor() as cursor:
+                for name in GIN_INDEXES:
+                    cursor.execute('DROP INDEX %s' % (name, ))
+            self.compare(selection, 'without GIN indexes')
+            transaction.set_rollback(True)
+
+    def create_catalog(self, products_count, attributes_count, values_count):
+        self.stdout.write(
+            'Creating %d products with variants...' % (products_count, ))
+        product_attributes = []
+        variant_attributes = []
+        for i in range(attributes_count * 2):
+            attribute = ProductAttribute.objects.create(
+                name='Benchmark %d' % (i, ), slug='benchmark-%d' % (i, ))
+            values = AttributeChoiceValue.objects.bulk_create([
+                AttributeChoiceValue(
+                    attribute=attribute, name='Value %d' % (j, ),
+                    slug='value-%d' % (j, ), sort_order=j)
+                for j in range(values_count)])
+            attributes = (
+                product_attributes if i % 2 else variant_attributes)
+            attributes.append(
+                (str(attribute.pk), [str(value.pk) for value in values]))
+        product_type = ProductType.objects.create(name='Benchmark')
+        category = Category.objects.create(name='Benchmark', slug='benchmark')
+        price = Money(10, settings.DEFAULT_CURRENCY)
+        products = Product.objects.bulk_create([
+            Product(
+                name='Product %d' % (i, ), description='', price=price,
+                product_type=product_type, category=category,
+                attributes=self.get_random_attributes(product_attributes))
+            for i in range(products_count)], batch_size=1000)
+        ProductVariant.objects.bulk_create([
+            ProductVariant(
+                product=product, sku='benchmark-%d' % (product.pk, ),
+                attributes=self.get_random_attributes(variant_attributes))
+            for product in products], batch_size=1000)
+        with connection.cursor() as cursor:
+            for model in [Product, ProductVariant]:
+                cursor.execute('ANALYZE %s' % (model._meta.db_table, ))
+        product_attribute, product_values = product_attributes[0]
+        variant_attribute, variant_values = variant_attributes[0]
+        return {
+            int(product_attribute): [int(product_values[0])],
+            int(variant_attribute): [
+                int(value) for value in variant_values[:2]]}
+
+    def get_random_attributes(self, attributes):
+        return {
+            attribute_pk: random.choice(value_pks)
+            for attribute_pk, value_pks in attributes}
+
+    def compare(self, selection, label):
+        queries = [
+            ('key lookups', Product.objects.filter(
+                get_key_lookup_query(selection)).distinct()),
+            ('containment', Product.objects.filter(
+                get_attributes_query(selection)))]
+        for name, queryset in queries:
+            queryset = queryset.order_by().values_list('pk', flat=True)
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN ANALYZE ' + sql, params)
+                plan = [row[0] for row in cursor.fetchall()]
+            timings = []
+            for dummy_i in range(self.repeat):
+                start = time.perf_counter()
+                count = len(list(queryset))
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                '\n%s, %s: %d products, median %.1f ms' % (
+                    name, label, count, statistics.median(timings)))
+            for line in plan:
+                self.stdout.write('    ' + line)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...utils.bitmaps import get_product_index, rebuild_product_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the index of products by attribute values and categories '
+        'used by product filters')
+
+    def handle(self, *args, **options):
+        rebuild_product_index()
+        self.stdout.write(
+            'Indexed products under %d keys' % len(get_product_index()))
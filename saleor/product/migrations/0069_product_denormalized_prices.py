@@ -0,0 +1,58 @@
+# Generated by Django 2.0.8 on 2018-09-03 10:12
+
+from django.db import migrations
+import django_prices.models
+
+
+def fill_undiscounted_prices(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    ProductVariant = apps.get_model('product', 'ProductVariant')
+    for product in Product.objects.prefetch_related('variants').iterator():
+        prices = []
+        for variant in product.variants.all():
+            price = variant.price_override or product.price
+            ProductVariant.objects.filter(pk=variant.pk).update(
+                discounted_price=price)
+            prices.append(price)
+        prices = prices or [product.price]
+        Product.objects.filter(pk=product.pk).update(
+            min_price=min(prices), max_price=max(prices),
+            min_price_undiscounted=min(prices),
+            max_price_undiscounted=max(prices))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0068_auto_20180822_0720'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='min_price',
+            field=django_prices.models.MoneyField(blank=True, currency='USD', db_index=True, decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='max_price',
+            field=django_prices.models.MoneyField(blank=True, currency='USD', decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='min_price_undiscounted',
+            field=django_prices.models.MoneyField(blank=True, currency='USD', decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='max_price_undiscounted',
+            field=django_prices.models.MoneyField(blank=True, currency='USD', decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='discounted_price',
+            field=django_prices.models.MoneyField(blank=True, currency='USD', decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.RunPython(
+            fill_undiscounted_prices, migrations.RunPython.noop),
+    ]
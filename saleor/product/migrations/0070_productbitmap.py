@@ -0,0 +1,53 @@
+# Generated by Django 2.0.8 on 2018-09-12 09:41
+
+import zlib
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def build_product_bitmaps(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    ProductVariant = apps.get_model('product', 'ProductVariant')
+    ProductBitmap = apps.get_model('product', 'ProductBitmap')
+    product_ids = defaultdict(set)
+    products = Product.objects.values_list(
+        'pk', 'category_id', 'is_published', 'attributes')
+    for pk, category_id, is_published, attributes in products.iterator():
+        if category_id:
+            product_ids['category:%s' % (category_id, )].add(pk)
+        if is_published:
+            product_ids['published'].add(pk)
+        for key, value in (attributes or {}).items():
+            product_ids['attribute:%s:%s' % (key, value)].add(pk)
+    variants = ProductVariant.objects.values_list('product_id', 'attributes')
+    for product_id, attributes in variants.iterator():
+        for key, value in (attributes or {}).items():
+            product_ids['attribute:%s:%s' % (key, value)].add(product_id)
+    bitmaps = []
+    for key, ids in product_ids.items():
+        data = bytearray(max(ids) // 8 + 1)
+        for pk in ids:
+            data[pk >> 3] |= 1 << (pk & 7)
+        bitmaps.append(ProductBitmap(key=key, bitmap=zlib.compress(data)))
+    ProductBitmap.objects.bulk_create(bitmaps, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0069_product_denormalized_prices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductBitmap',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=128, unique=True)),
+                ('bitmap', models.BinaryField()),
+            ],
+        ),
+        migrations.RunPython(
+            build_product_bitmaps, migrations.RunPython.noop),
+    ]
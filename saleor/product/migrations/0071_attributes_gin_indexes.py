@@ -0,0 +1,22 @@
+# Generated by Django 2.0.8 on 2018-09-13 11:02
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0070_productbitmap'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['attributes'], name='product_attributes_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['attributes'], name='variant_attributes_gin'),
+        ),
+    ]
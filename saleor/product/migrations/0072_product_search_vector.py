@@ -0,0 +1,37 @@
+# Generated by Django 2.0.8 on 2018-09-14 08:27
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from saleor.search.vectors import (
+    get_product_search_vector, update_search_vectors)
+
+
+def fill_search_vectors(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    update_search_vectors(Product.objects.all(), get_product_search_vector())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0071_attributes_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='product_search_gin'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX product_name_trgm ON product_product '
+            'USING gin (name gin_trgm_ops)',
+            'DROP INDEX product_name_trgm'),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+    ]
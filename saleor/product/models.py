@@ -3,6 +3,8 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.contrib.postgres.fields import HStoreField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import Q
@@ -127,6 +129,27 @@ class Product(SeoModel):
     weight = MeasurementField(
         measurement=Weight, unit_choices=WeightUnits.CHOICES,
         blank=True, null=True)
+    # Denormalized prices of the product's variants before taxes, kept up to
+    # date by `saleor.product.tasks` so they can be sorted and filtered on
+    min_price = MoneyField(
+        currency=settings.DEFAULT_CURRENCY, max_digits=12,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES, blank=True, null=True,
+        editable=False, db_index=True)
+    max_price = MoneyField(
+        currency=settings.DEFAULT_CURRENCY, max_digits=12,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES, blank=True, null=True,
+        editable=False)
+    min_price_undiscounted = MoneyField(
+        currency=settings.DEFAULT_CURRENCY, max_digits=12,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES, blank=True, null=True,
+        editable=False)
+    max_price_undiscounted = MoneyField(
+        currency=settings.DEFAULT_CURRENCY, max_digits=12,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES, blank=True, null=True,
+        editable=False)
+    # kept up to date by `saleor.search.signals` for full text search
+    search_vector = SearchVectorField(
+        blank=True, null=True, editable=False)
 
     objects = ProductQuerySet.as_manager()
     translated = TranslationProxy()
@@ -137,6 +160,10 @@ class Product(SeoModel):
             'manage_products', pgettext_lazy(
                 'Permission description',
                 'Manage products.')),)
+        # serve attribute containment (`@>`) and full text search lookups
+        indexes = [
+            GinIndex(fields=['attributes'], name='product_attributes_gin'),
+            GinIndex(fields=['search_vector'], name='product_search_gin')]
 
     def __iter__(self):
         if not hasattr(self, '__variants'):
@@ -224,10 +251,17 @@ class ProductVariant(models.Model):
     weight = MeasurementField(
         measurement=Weight, unit_choices=WeightUnits.CHOICES,
         blank=True, null=True)
+    discounted_price = MoneyField(
+        currency=settings.DEFAULT_CURRENCY, max_digits=12,
+        decimal_places=settings.DEFAULT_DECIMAL_PLACES, blank=True, null=True,
+        editable=False)
     translated = TranslationProxy()
 
     class Meta:
         app_label = 'product'
+        # serves attribute containment (`@>`) lookups
+        indexes = [
+            GinIndex(fields=['attributes'], name='variant_attributes_gin')]
 
     def __str__(self):
         return self.name or self.sku
@@ -464,3 +498,36 @@ class CollectionTranslation(SeoModelTranslation):
 
     def __str__(self):
         return self.name
+
+
+class ProductBitmap(models.Model):
+    """A compressed set of ids of products sharing an indexed property.
+
+    Maintained by `saleor.product.utils.bitmaps`, eg. products using an
+    attribute value or assigned to a category.
+    """
+
+    key = models.CharField(max_length=128, unique=True)
+    bitmap = models.BinaryField()
+    # incremented on every change, processes reload changed bitmaps only
+    version = models.PositiveIntegerField(default=0)
+
+    def __repr__(self):
+        class_ = type(self)
+        return '%s(pk=%r, key=%r)' % (class_.__name__, self.pk, self.key)
+
+
+class ProductIndexChange(models.Model):
+    """A product whose bitmaps wait for being updated.
+
+    Changes of a product are queued once, no matter how many times it is
+    saved before the queue is processed.
+    """
+
+    product_id = models.PositiveIntegerField(unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __repr__(self):
+        class_ = type(self)
+        return '%s(pk=%r, product_id=%r)' % (
+            class_.__name__, self.pk, self.product_id)
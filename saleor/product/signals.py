@@ -0,0 +1,61 @@
+from django.db import transaction
+
+from .utils.attributes import invalidate_attribute_registry
+from .utils.bitmaps import queue_product_index_update
+from .utils.categories import invalidate_category_tree
+from .utils.prices import update_products_prices
+from .utils.variants_picker import invalidate_variant_picker
+
+STOCK_FIELDS = {'quantity', 'quantity_allocated'}
+
+
+def invalidate_variant_picker_on_commit(product_id=None):
+    # Invalidate right away for the current transaction and once more after
+    # commit, so other processes cannot cache a payload built from data that
+    # was not yet committed
+    invalidate_variant_picker(product_id)
+    transaction.on_commit(lambda: invalidate_variant_picker(product_id))
+
+
+def product_changed(sender, instance, **kwargs):
+    """Refresh stored discounted prices after a product is saved."""
+    update_products_prices([instance.pk])
+    queue_product_index_update([instance.pk])
+    invalidate_variant_picker_on_commit(instance.pk)
+
+
+def product_deleted(sender, instance, **kwargs):
+    """Remove a deleted product from the product index."""
+    queue_product_index_update([instance.pk])
+    invalidate_variant_picker_on_commit(instance.pk)
+
+
+def variant_changed(sender, instance, update_fields=None, **kwargs):
+    """Refresh stored discounted prices after a variant changes."""
+    if update_fields and set(update_fields) <= STOCK_FIELDS:
+        # stock changes affect neither prices nor cached variant data
+        return
+    update_products_prices([instance.product_id])
+    queue_product_index_update([instance.product_id])
+    invalidate_variant_picker_on_commit(instance.product_id)
+
+
+def product_translation_changed(sender, instance, **kwargs):
+    invalidate_variant_picker_on_commit(instance.product_id)
+
+
+def variant_translation_changed(sender, instance, **kwargs):
+    invalidate_variant_picker_on_commit(instance.product_variant.product_id)
+
+
+def attributes_changed(sender, **kwargs):
+    """Drop data cached for attributes after attributes or values change."""
+    invalidate_attribute_registry()
+    transaction.on_commit(invalidate_attribute_registry)
+    invalidate_variant_picker_on_commit()
+
+
+def category_tree_changed(sender, **kwargs):
+    """Rebuild the category tree snapshot after categories change."""
+    invalidate_category_tree()
+    transaction.on_commit(invalidate_category_tree)
@@ -0,0 +1,52 @@
+from datetime import date
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q
+
+from ..discount.models import Sale
+from .utils.bitmaps import (
+    PRODUCT_INDEX_UPDATE_SCHEDULED_KEY, update_queued_products)
+from .utils.prices import get_products_of_sales, update_products_prices
+
+
+@shared_task
+def update_products_prices_task(product_ids):
+    """Refresh stored discounted prices of given products."""
+    update_products_prices(product_ids)
+
+
+@shared_task
+def update_prices_of_starting_and_ending_sales_task():
+    """Refresh prices of products whose sales started or ended.
+
+    Sales stay pending until prices are refreshed on or after their start
+    and after their end, so sales missed by earlier runs are caught up.
+    """
+    today = date.today()
+    not_updated = Q(prices_updated_on__isnull=True)
+    started = Q(start_date__lte=today) & (
+        not_updated | Q(prices_updated_on__lt=F('start_date')))
+    ended = Q(end_date__lt=today) & (
+        not_updated | Q(prices_updated_on__lte=F('end_date')))
+    sales = list(Sale.objects.filter(started | ended))
+    if not sales:
+        return
+    products = get_products_of_sales(sales)
+    update_products_prices(products.values_list('pk', flat=True))
+    Sale.objects.filter(pk__in=[sale.pk for sale in sales]).update(
+        prices_updated_on=today)
+
+
+@shared_task
+def update_product_index_task():
+    """Re-index queued products in batches.
+
+    While full batches are processed another task is started, so a backlog
+    is worked through by available workers one batch at a time.
+    """
+    cache.delete(PRODUCT_INDEX_UPDATE_SCHEDULED_KEY)
+    updated = update_queued_products(settings.PRODUCT_INDEX_BATCH_SIZE)
+    if updated == settings.PRODUCT_INDEX_BATCH_SIZE:
+        update_product_index_task.delay()
@@ -8,8 +8,9 @@ from ...checkout.utils import (
     get_cart_from_request, get_or_create_cart_from_request)
 from ...core.utils import get_paginator_items
 from ...core.utils.filters import get_now_sorted_by
+from ...core.utils.translations import prefetch_translations
 from ..forms import ProductForm
-from .availability import products_with_availability
+from .availability import price_products
 
 
 def products_visible_to_user(user):
@@ -23,9 +24,11 @@ def products_visible_to_user(user):
 def products_with_details(user):
     products = products_visible_to_user(user)
     products = products.prefetch_related(
-        'translations', 'category__translations', 'collections__translations',
         'images', 'variants__variant_images__image',
-        'attributes__values__translations',
+        'attributes__values__translations')
+    products = prefetch_translations(
+        products, 'translations', 'category__translations',
+        'collections__translations',
         'product_type__product_attributes__translations',
         'product_type__product_attributes__values__translations')
     return products
@@ -33,16 +36,18 @@ def products_with_details(user):
 
 def products_for_products_list(user):
     products = products_visible_to_user(user)
+    products = products.select_related('product_type', 'category')
     products = products.prefetch_related(
-        'translations', 'images', 'variants__variant_images__image')
-    return products
+        'images', 'variants__variant_images__image')
+    return prefetch_translations(products, 'translations')
 
 
 def products_for_homepage(homepage_collection):
     user = AnonymousUser()
     products = products_visible_to_user(user)
     products = products.prefetch_related(
-        'translations', 'images', 'variants__variant_images__image')
+        'images', 'variants__variant_images__image')
+    products = prefetch_translations(products, 'translations')
     products = products.filter(collections=homepage_collection)
     return products
 
@@ -52,14 +57,15 @@ def get_product_images(product):
     return list(product.images.all())
 
 
-def handle_cart_form(request, product, create_cart=False):
+def handle_cart_form(request, product, create_cart=False, price_sheet=None):
     if create_cart:
         cart = get_or_create_cart_from_request(request)
     else:
         cart = get_cart_from_request(request)
     form = ProductForm(
         cart=cart, product=product, data=request.POST or None,
-        discounts=request.discounts, taxes=request.taxes)
+        discounts=request.discounts, taxes=request.taxes,
+        price_sheet=price_sheet)
     return form, cart
 
 
@@ -116,13 +122,14 @@ def get_product_list_context(request, filter_set):
     from ..filters import SORT_BY_FIELDS
     products_paginated = get_paginator_items(
         filter_set.qs, settings.PAGINATE_BY, request.GET.get('page'))
-    products_and_availability = list(products_with_availability(
+    products_and_availability = price_products(
         products_paginated, request.discounts, request.taxes,
-        request.currency))
+        request.currency)
     now_sorted_by = get_now_sorted_by(filter_set)
     arg_sort_by = request.GET.get('sort_by')
     is_descending = arg_sort_by.startswith('-') if arg_sort_by else False
     return {
+        'facets': filter_set.get_facets(),
         'filter_set': filter_set,
         'products': products_and_availability,
         'products_paginated': products_paginated,
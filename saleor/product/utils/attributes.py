@@ -1,3 +1,23 @@
+import functools
+import operator
+import threading
+from collections import OrderedDict, defaultdict
+
+from django.db.models import Q
+
+from ...core.utils.cache import get_cache_version, increment_cache_version
+from .bitmaps import bitmap_to_ids, count_bitmap, get_product_index
+
+ATTRIBUTE_REGISTRY_VERSION_KEY = 'product:attribute-registry-version'
+
+# Above this number of products matching attribute filters a containment
+# query served by GIN indexes is cheaper than passing all their ids
+MAX_ATTRIBUTE_LOOKUP_IDS = 5000
+
+_attribute_registry_lock = threading.Lock()
+_attribute_registry = None
+
+
 def get_product_attributes_data(product):
     """Returns attributes associated with the product,
     as dict of ProductAttribute: AttributeChoiceValue values.
@@ -45,3 +65,120 @@ def generate_name_from_values(attributes_dict):
         for attribute_pk, attributechoice_value in sorted(
             attributes_dict.items(),
             key=lambda x: x[0]))
+
+
+class AttributeRegistry:
+    """All attributes and their values indexed by primary keys and slugs.
+
+    Attributes and values come with translations in all languages
+    prefetched, the registry is shared between requests and must be
+    treated as read-only.
+    """
+
+    def __init__(self, attributes, values, version=None):
+        self.version = version
+        self._attributes = OrderedDict(
+            (attribute.pk, attribute) for attribute in attributes)
+        self._attribute_pks = {
+            attribute.slug: attribute.pk
+            for attribute in self._attributes.values()}
+        self._values = {}
+        self._attribute_values = defaultdict(list)
+        self._value_pks = defaultdict(dict)
+        for value in values:
+            self._values[value.pk] = value
+            self._attribute_values[value.attribute_id].append(value)
+            self._value_pks[value.attribute_id][value.slug] = value.pk
+
+    def get_attribute(self, pk):
+        return self._attributes.get(pk)
+
+    def get_attribute_pk(self, slug):
+        return self._attribute_pks.get(slug)
+
+    def get_attributes(self, pks):
+        """Return attributes with given primary keys, ordered by slug."""
+        pks = set(pks)
+        return [
+            attribute for pk, attribute in self._attributes.items()
+            if pk in pks]
+
+    def get_value(self, pk):
+        return self._values.get(pk)
+
+    def get_value_pk(self, attribute_pk, slug):
+        return self._value_pks.get(attribute_pk, {}).get(slug)
+
+    def get_values(self, attribute_pk):
+        """Return values of the attribute in their sort order."""
+        return list(self._attribute_values.get(attribute_pk, []))
+
+
+def invalidate_attribute_registry():
+    """Force all processes to rebuild the attribute registry on next use."""
+    increment_cache_version(ATTRIBUTE_REGISTRY_VERSION_KEY)
+
+
+def get_attribute_registry():
+    """Return an `AttributeRegistry` of all attributes.
+
+    The registry is built once per process and shared between requests
+    until `invalidate_attribute_registry` is called.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import AttributeChoiceValue, ProductAttribute
+    global _attribute_registry  # pylint: disable=global-statement
+    version = get_cache_version(ATTRIBUTE_REGISTRY_VERSION_KEY)
+    registry = _attribute_registry
+    if registry is None or registry.version != version:
+        with _attribute_registry_lock:
+            registry = _attribute_registry
+            if registry is None or registry.version != version:
+                registry = AttributeRegistry(
+                    ProductAttribute.objects.prefetch_related('translations'),
+                    AttributeChoiceValue.objects.prefetch_related(
+                        'translations'),
+                    version=version)
+                _attribute_registry = registry
+    return registry
+
+
+def get_attributes_query(selection):
+    """Return a `Q` matching products using selected attribute values.
+
+    `selection` maps attribute pks to value pks, products have to use any of
+    the values of every attribute, either directly or through any of their
+    variants. Values are compared with the HStore containment operator `@>`
+    which, unlike key lookups, can be served by GIN indexes.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import ProductVariant
+    query = Q()
+    for attribute_pk, value_pks in selection.items():
+        if not value_pks:
+            # no known value of the attribute, nothing can match
+            return Q(pk__in=[])
+        containment = functools.reduce(operator.or_, [
+            Q(attributes__contains={str(attribute_pk): str(value_pk)})
+            for value_pk in value_pks])
+        variants = ProductVariant.objects.filter(containment)
+        query &= containment | Q(pk__in=variants.values('product_id'))
+    return query
+
+
+def get_attributes_lookup(selection, scope=None):
+    """Return a `Q` matching products using selected attribute values.
+
+    Products are looked up in the product index, `scope` is a bitmap of
+    products the result is limited to. Ids of matching products are passed
+    to the database unless there are more than `MAX_ATTRIBUTE_LOOKUP_IDS` of
+    them, then the database compares attributes itself.
+    """
+    bitmap = get_product_index().get_selection_bitmap(selection)
+    if bitmap is None:
+        return Q()
+    if scope is not None:
+        bitmap &= scope
+    if count_bitmap(bitmap) > MAX_ATTRIBUTE_LOOKUP_IDS:
+        return get_attributes_query(selection)
+    return Q(pk__in=bitmap_to_ids(bitmap))
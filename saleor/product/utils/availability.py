@@ -1,18 +1,113 @@
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
+
+from prices import TaxedMoneyRange
 
 from .. import ProductAvailabilityStatus, VariantAvailabilityStatus
 from ...core.utils import to_local_currency
+from ...core.utils.taxes import apply_tax_to_price, include_taxes_in_prices
+from ...discount.utils import get_product_discounts
 
 ProductAvailability = namedtuple(
     'ProductAvailability', (
         'available', 'on_sale', 'price_range', 'price_range_undiscounted',
         'discount', 'price_range_local_currency', 'discount_local_currency'))
 
+VariantPrices = namedtuple(
+    'VariantPrices', ('price', 'price_undiscounted', 'price_local_currency'))
+
 
 def products_with_availability(products, discounts, taxes, local_currency):
+    return price_products(products, discounts, taxes, local_currency)
+
+
+def price_products(products, discounts=None, taxes=None, local_currency=None):
+    """Return a list of `(product, availability)` pairs for many products.
+
+    Produces the same results as calling `get_availability` for every
+    product but resolves site settings once per call and matches every
+    product against the discounts only once, regardless of the number of
+    its variants.
+    """
+    keep_gross = include_taxes_in_prices() if taxes else None
+    results = []
     for product in products:
-        yield (product, get_availability(
-            product, discounts, taxes, local_currency))
+        variant_prices = list(
+            _price_variants(product, discounts, taxes, keep_gross))
+        price_range, undiscounted = _get_price_ranges(variant_prices)
+        results.append((product, get_availability_from_price_ranges(
+            product, price_range, undiscounted, local_currency)))
+    return results
+
+
+class ProductPriceSheet:
+    """Prices of all variants of a single product computed in one pass.
+
+    Holds the discounted, undiscounted and local currency price of every
+    variant along with the availability of the whole product, so the
+    product page can share them between the availability summary,
+    the variant picker and the JSON-LD offers.
+    """
+
+    def __init__(
+            self, product, discounts=None, taxes=None, local_currency=None):
+        self.product = product
+        self.taxes = taxes
+        keep_gross = include_taxes_in_prices() if taxes else None
+        variant_prices = list(
+            _price_variants(product, discounts, taxes, keep_gross))
+        self.variant_prices = OrderedDict()
+        for variant, price, price_undiscounted in variant_prices:
+            if variant is None:
+                continue
+            if local_currency:
+                price_local_currency = to_local_currency(
+                    price, local_currency)
+            else:
+                price_local_currency = None
+            self.variant_prices[variant.pk] = VariantPrices(
+                price=price, price_undiscounted=price_undiscounted,
+                price_local_currency=price_local_currency)
+        price_range, undiscounted = _get_price_ranges(variant_prices)
+        self.availability = get_availability_from_price_ranges(
+            product, price_range, undiscounted, local_currency)
+
+    def get_variant_prices(self, variant):
+        return self.variant_prices[variant.pk]
+
+
+def _price_variants(product, discounts, taxes, keep_gross):
+    """Yield `(variant, price, undiscounted_price)` for a product.
+
+    Products without variants yield a single entry with `None` in place of
+    the variant, priced at the product's base price.
+    """
+    product_discounts = (
+        list(get_product_discounts(product, discounts))
+        if discounts else [])
+    product_taxes = taxes if product.charge_taxes else None
+    tax_rate = product.tax_rate or product.product_type.tax_rate
+    base_prices = [
+        (variant, variant.price_override or product.price)
+        for variant in product.variants.all()] or [(None, product.price)]
+    for variant, base_price in base_prices:
+        undiscounted_price = apply_tax_to_price(
+            product_taxes, tax_rate, base_price, keep_gross)
+        if product_discounts:
+            discounted_price = min(
+                discount(base_price) for discount in product_discounts)
+            price = apply_tax_to_price(
+                product_taxes, tax_rate, discounted_price, keep_gross)
+        else:
+            price = undiscounted_price
+        yield variant, price, undiscounted_price
+
+
+def _get_price_ranges(variant_prices):
+    prices = [price for _, price, _ in variant_prices]
+    undiscounted_prices = [price for _, _, price in variant_prices]
+    return (
+        TaxedMoneyRange(min(prices), max(prices)),
+        TaxedMoneyRange(min(undiscounted_prices), max(undiscounted_prices)))
 
 
 def get_product_availability_status(product):
@@ -46,9 +141,15 @@ def get_variant_availability_status(variant):
 
 
 def get_availability(product, discounts=None, taxes=None, local_currency=None):
-    # In default currency
     price_range = product.get_price_range(discounts=discounts, taxes=taxes)
     undiscounted = product.get_price_range(taxes=taxes)
+    return get_availability_from_price_ranges(
+        product, price_range, undiscounted, local_currency)
+
+
+def get_availability_from_price_ranges(
+        product, price_range, undiscounted, local_currency=None):
+    # In default currency
     if undiscounted.start > price_range.start:
         discount = undiscounted.start - price_range.start
     else:
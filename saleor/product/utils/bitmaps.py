@@ -0,0 +1,376 @@
+import threading
+import zlib
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ...core.utils.cache import get_cache_version, increment_cache_version
+
+PRODUCT_INDEX_VERSION_KEY = 'product:product-index-version'
+PRODUCT_INDEX_UPDATE_SCHEDULED_KEY = 'product:product-index-update-scheduled'
+# an update lost along with its worker stops blocking new ones after that time
+PRODUCT_INDEX_UPDATE_SCHEDULED_TIMEOUT = 300
+PUBLISHED_KEY = 'published'
+
+_product_index_lock = threading.Lock()
+_product_index = None
+
+
+def get_attribute_key(attribute_pk, value_pk):
+    return 'attribute:%s:%s' % (attribute_pk, value_pk)
+
+
+def get_category_key(category_id):
+    return 'category:%s' % (category_id, )
+
+
+def bitmap_from_ids(ids):
+    """Return an integer with bits of given product ids set."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    data = bytearray(max(ids) // 8 + 1)
+    for pk in ids:
+        data[pk >> 3] |= 1 << (pk & 7)
+    return int.from_bytes(data, 'little')
+
+
+def bitmap_to_ids(bitmap):
+    """Return a sorted list of product ids set in the bitmap."""
+    ids = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for position, byte in enumerate(data):
+        if byte:
+            ids.extend(
+                position * 8 + bit for bit in range(8) if byte >> bit & 1)
+    return ids
+
+
+def count_bitmap(bitmap):
+    return bin(bitmap).count('1')
+
+
+def compress_bitmap(bitmap):
+    return zlib.compress(
+        bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little'))
+
+
+def decompress_bitmap(data):
+    return int.from_bytes(zlib.decompress(bytes(data)), 'little')
+
+
+class ProductIndex:
+    """An inverted index of products by attribute values and categories.
+
+    Every key maps to a bitmap, an integer with a bit set for the id of each
+    product having the property. Products using an attribute value either
+    directly or through any of their variants share its key. The index is
+    shared between requests and must be treated as read-only.
+    """
+
+    def __init__(self, bitmaps, version=None, row_versions=None):
+        self.version = version
+        # `{key: (row_id, row_version)}` of stored bitmaps the index holds
+        self.row_versions = row_versions or {}
+        self._bitmaps = dict(bitmaps)
+        self._attribute_values = defaultdict(dict)
+        for key, bitmap in self._bitmaps.items():
+            if key.startswith('attribute:'):
+                attribute_pk, value_pk = key.split(':')[1:]
+                if attribute_pk.isdigit() and value_pk.isdigit():
+                    self._attribute_values[int(attribute_pk)][
+                        int(value_pk)] = bitmap
+
+    def __len__(self):
+        return len(self._bitmaps)
+
+    def get_bitmap(self, key):
+        return self._bitmaps.get(key, 0)
+
+    def get_keys(self, bitmap):
+        """Return keys of bitmaps having any of the bitmap's products."""
+        return {key for key, value in self._bitmaps.items() if value & bitmap}
+
+    def get_published_bitmap(self):
+        return self.get_bitmap(PUBLISHED_KEY)
+
+    def get_category_bitmap(self, category_ids):
+        """Return products assigned to any of given categories."""
+        bitmap = 0
+        for category_id in category_ids:
+            bitmap |= self.get_bitmap(get_category_key(category_id))
+        return bitmap
+
+    def get_attribute_bitmap(self, attribute_pk, value_pks):
+        """Return products using any of given values of the attribute."""
+        values = self._attribute_values.get(int(attribute_pk), {})
+        bitmap = 0
+        for value_pk in value_pks:
+            bitmap |= values.get(int(value_pk), 0)
+        return bitmap
+
+    def get_selection_bitmap(self, selection):
+        """Return products matching `{attribute_pk: value_pks}` selection.
+
+        Products have to use any of the selected values of every attribute.
+        Returns `None` for an empty selection.
+        """
+        bitmap = None
+        for attribute_pk, value_pks in selection.items():
+            attribute_bitmap = self.get_attribute_bitmap(
+                attribute_pk, value_pks)
+            bitmap = (
+                attribute_bitmap if bitmap is None
+                else bitmap & attribute_bitmap)
+        return bitmap
+
+    def count_attribute_values(self, candidates, attribute_pks=None):
+        """Return `{attribute_pk: {value_pk: count}}` for candidate products.
+
+        Counting can be limited to attributes with given primary keys.
+        """
+        if attribute_pks is None:
+            attribute_pks = self._attribute_values.keys()
+        facets = {}
+        for attribute_pk in attribute_pks:
+            counts = {}
+            for value_pk, bitmap in self._attribute_values.get(
+                    attribute_pk, {}).items():
+                count = count_bitmap(bitmap & candidates)
+                if count:
+                    counts[value_pk] = count
+            if counts:
+                facets[attribute_pk] = counts
+        return facets
+
+
+def get_product_keys(product_ids=None):
+    """Return `{product_id: keys}` of products with given ids.
+
+    All products are indexed when no ids are given.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import Product, ProductVariant
+    products = Product.objects.all()
+    variants = ProductVariant.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+        variants = variants.filter(product_id__in=product_ids)
+    product_keys = {}
+    products = products.values_list(
+        'pk', 'category_id', 'is_published', 'attributes')
+    for pk, category_id, is_published, attributes in products.iterator():
+        keys = product_keys[pk] = set()
+        if category_id:
+            keys.add(get_category_key(category_id))
+        if is_published:
+            keys.add(PUBLISHED_KEY)
+        keys.update(
+            get_attribute_key(key, value)
+            for key, value in (attributes or {}).items())
+    variants = variants.values_list('product_id', 'attributes')
+    for product_id, attributes in variants.iterator():
+        keys = product_keys.get(product_id)
+        if keys is not None:
+            keys.update(
+                get_attribute_key(key, value)
+                for key, value in (attributes or {}).items())
+    return product_keys
+
+
+def notify_product_index_changed():
+    """Make all processes reload changed bitmaps on next use."""
+    increment_cache_version(PRODUCT_INDEX_VERSION_KEY)
+
+
+def invalidate_product_index():
+    """Force all processes to reload the whole product index on next use."""
+    global _product_index  # pylint: disable=global-statement
+    _product_index = None
+    notify_product_index_changed()
+
+
+def load_product_index(version, previous=None):
+    """Return a `ProductIndex` of stored bitmaps.
+
+    Bitmaps whose rows haven't changed since they were loaded into the
+    previous index are reused, only changed ones are fetched and
+    decompressed.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import ProductBitmap
+    rows = ProductBitmap.objects.values_list('key', 'pk', 'version')
+    previous_versions = previous.row_versions if previous else {}
+    bitmaps = {}
+    row_versions = {}
+    changed_keys = []
+    for key, pk, row_version in rows.iterator():
+        if previous_versions.get(key) == (pk, row_version):
+            bitmaps[key] = previous.get_bitmap(key)
+            row_versions[key] = (pk, row_version)
+        else:
+            changed_keys.append(key)
+    if changed_keys:
+        changed_rows = ProductBitmap.objects.values_list(
+            'key', 'pk', 'version', 'bitmap')
+        if previous is not None:
+            changed_rows = changed_rows.filter(key__in=changed_keys)
+        for key, pk, row_version, data in changed_rows.iterator():
+            bitmaps[key] = decompress_bitmap(data)
+            row_versions[key] = (pk, row_version)
+    return ProductIndex(bitmaps, version=version, row_versions=row_versions)
+
+
+def get_product_index():
+    """Return a `ProductIndex` loaded from stored product bitmaps.
+
+    The index is loaded once per process and shared between requests. Once
+    any process changes stored bitmaps, the changed ones are reloaded.
+    """
+    global _product_index  # pylint: disable=global-statement
+    version = get_cache_version(PRODUCT_INDEX_VERSION_KEY)
+    index = _product_index
+    if index is None or index.version != version:
+        with _product_index_lock:
+            index = _product_index
+            if index is None or index.version != version:
+                index = load_product_index(version, previous=index)
+                _product_index = index
+    return index
+
+
+def _save_bitmaps(bitmaps, rows):
+    # pylint: disable=cyclic-import
+    from ..models import ProductBitmap
+    new_rows = []
+    for key, bitmap in bitmaps.items():
+        row = rows.get(key)
+        if row is None:
+            if bitmap:
+                new_rows.append(
+                    ProductBitmap(key=key, bitmap=compress_bitmap(bitmap)))
+        elif not bitmap:
+            row.delete()
+        elif bitmap != decompress_bitmap(row.bitmap):
+            row.bitmap = compress_bitmap(bitmap)
+            row.version += 1
+            row.save(update_fields=['bitmap', 'version'])
+    ProductBitmap.objects.bulk_create(new_rows)
+
+
+def update_product_index(product_ids):
+    """Re-index products with given ids, removing the deleted ones.
+
+    Only bitmaps the products are added to or removed from are stored
+    again. Saved products are queued and passed here in batches by
+    `update_queued_products`.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import ProductBitmap
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    mask = bitmap_from_ids(product_ids)
+    product_keys = get_product_keys(product_ids)
+    keys = get_product_index().get_keys(mask)
+    for product_keys_set in product_keys.values():
+        keys.update(product_keys_set)
+    with transaction.atomic():
+        rows = {
+            row.key: row
+            for row in ProductBitmap.objects.select_for_update().filter(
+                key__in=keys).order_by('key')}
+        bitmaps = {}
+        for key in keys:
+            row = rows.get(key)
+            bitmap = decompress_bitmap(row.bitmap) if row else 0
+            bitmaps[key] = (bitmap & ~mask) | bitmap_from_ids(
+                pk for pk, pk_keys in product_keys.items() if key in pk_keys)
+        _save_bitmaps(bitmaps, rows)
+    notify_product_index_changed()
+    transaction.on_commit(notify_product_index_changed)
+
+
+def schedule_product_index_update():
+    """Start an update of queued products unless one is waiting to run."""
+    # pylint: disable=cyclic-import
+    from ..tasks import update_product_index_task
+    if cache.add(
+            PRODUCT_INDEX_UPDATE_SCHEDULED_KEY, True,
+            timeout=PRODUCT_INDEX_UPDATE_SCHEDULED_TIMEOUT):
+        update_product_index_task.apply_async(
+            countdown=settings.PRODUCT_INDEX_UPDATE_DELAY)
+
+
+def queue_product_index_update(product_ids):
+    """Queue products for being re-indexed after the commit.
+
+    Products queued again while being indexed get a new timestamp, so
+    their queued change outlives the update that started before. With
+    `PRODUCT_INDEX_QUEUE_UPDATES` disabled products are indexed at once.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import ProductIndexChange
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    if not settings.PRODUCT_INDEX_QUEUE_UPDATES:
+        update_product_index(product_ids)
+        return
+    now = timezone.now()
+    query = (
+        'INSERT INTO %s (product_id, created) VALUES (%%s, %%s) '
+        'ON CONFLICT (product_id) DO UPDATE SET created = EXCLUDED.created'
+        % (connection.ops.quote_name(ProductIndexChange._meta.db_table), ))
+    with connection.cursor() as cursor:
+        cursor.executemany(query, [(pk, now) for pk in product_ids])
+    transaction.on_commit(schedule_product_index_update)
+
+
+def update_queued_products(batch_size):
+    """Re-index a batch of queued products, return the number of them.
+
+    Queued changes are locked while being processed, so workers process
+    the queue in parallel without indexing the same products twice.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import ProductIndexChange
+    with transaction.atomic():
+        changes = list(
+            ProductIndexChange.objects.select_for_update(
+                skip_locked=True).order_by('pk')[:batch_size])
+        if not changes:
+            return 0
+        update_product_index([change.product_id for change in changes])
+        # changes queued again meanwhile are kept for the next update
+        ProductIndexChange.objects.filter(reduce(or_, [
+            Q(pk=change.pk, created=change.created)
+            for change in changes])).delete()
+    return len(changes)
+
+
+def rebuild_product_index():
+    """Index all products from scratch."""
+    # pylint: disable=cyclic-import
+    from ..models import ProductBitmap
+    product_ids = defaultdict(list)
+    for pk, keys in get_product_keys().items():
+        for key in keys:
+            product_ids[key].append(pk)
+    with transaction.atomic():
+        rows = {
+            row.key: row
+            for row in ProductBitmap.objects.select_for_update().order_by(
+                'key')}
+        bitmaps = dict.fromkeys(rows, 0)
+        bitmaps.update(
+            (key, bitmap_from_ids(ids)) for key, ids in product_ids.items())
+        _save_bitmaps(bitmaps, rows)
+    notify_product_index_changed()
+    transaction.on_commit(notify_product_index_changed)
@@ -0,0 +1,128 @@
+import threading
+from array import array
+from collections import defaultdict
+
+from ...core.utils.cache import get_cache_version, increment_cache_version
+
+CATEGORY_TREE_VERSION_KEY = 'product:category-tree-version'
+
+_category_tree_lock = threading.Lock()
+_category_tree = None
+
+
+class CategoryTree:
+    """A compact, read-only snapshot of the category hierarchy.
+
+    Nodes are stored in tree order (by `tree_id` and `lft`) in parallel
+    arrays, so descendants of a node always directly follow it. Unknown
+    category ids have no relatives.
+    """
+
+    def __init__(self, rows, version=None):
+        """Build the tree from `(id, parent_id, lft, rght, tree_id, level,
+        slug, name)` rows.
+        """
+        rows = sorted(rows, key=lambda row: (row[4], row[2]))
+        self.version = version
+        self.ids = array('l', [row[0] for row in rows])
+        self.parents = array('l', [row[1] or 0 for row in rows])
+        self.lfts = array('l', [row[2] for row in rows])
+        self.rghts = array('l', [row[3] for row in rows])
+        self.tree_ids = array('l', [row[4] for row in rows])
+        self.levels = array('l', [row[5] for row in rows])
+        self.slugs = [row[6] for row in rows]
+        self.names = [row[7] for row in rows]
+        self._positions = {pk: pos for pos, pk in enumerate(self.ids)}
+        self._children = defaultdict(list)
+        self._by_slug = defaultdict(list)
+        for pos, pk in enumerate(self.ids):
+            if self.parents[pos]:
+                self._children[self.parents[pos]].append(pk)
+            self._by_slug[self.slugs[pos]].append(pk)
+
+    def __contains__(self, category_id):
+        return category_id in self._positions
+
+    def __len__(self):
+        return len(self.ids)
+
+    def get_name(self, category_id):
+        return self.names[self._positions[category_id]]
+
+    def get_slug(self, category_id):
+        return self.slugs[self._positions[category_id]]
+
+    def get_ids_by_slug(self, slug):
+        """Return ids of all categories using the slug, in tree order."""
+        return list(self._by_slug.get(slug, []))
+
+    def get_children_ids(self, category_id):
+        return list(self._children.get(category_id, []))
+
+    def get_descendant_ids(self, category_id, include_self=False):
+        """Return ids of all descendants of the category, in tree order."""
+        pos = self._positions.get(category_id)
+        if pos is None:
+            return []
+        size = (self.rghts[pos] - self.lfts[pos] - 1) // 2
+        start = pos if include_self else pos + 1
+        return list(self.ids[start:pos + 1 + size])
+
+    def get_ancestor_ids(self, category_id, include_self=False):
+        """Return ids of all ancestors of the category, root first."""
+        pos = self._positions.get(category_id)
+        if pos is None:
+            return []
+        ancestors = [category_id] if include_self else []
+        parent_id = self.parents[pos]
+        while parent_id:
+            ancestors.append(parent_id)
+            parent_id = self.parents[self._positions[parent_id]]
+        ancestors.reverse()
+        return ancestors
+
+    def is_descendant_of(self, category_id, ancestor_id, include_self=False):
+        pos = self._positions.get(category_id)
+        ancestor_pos = self._positions.get(ancestor_id)
+        if pos is None or ancestor_pos is None:
+            return False
+        if pos == ancestor_pos:
+            return include_self
+        return (
+            self.tree_ids[pos] == self.tree_ids[ancestor_pos] and
+            self.lfts[ancestor_pos] < self.lfts[pos] and
+            self.rghts[pos] < self.rghts[ancestor_pos])
+
+    def get_path(self, category_id):
+        """Return names of the category and its ancestors, root first."""
+        return [
+            self.get_name(pk)
+            for pk in self.get_ancestor_ids(category_id, include_self=True)]
+
+
+def invalidate_category_tree():
+    """Force all processes to rebuild the category tree on next use."""
+    increment_cache_version(CATEGORY_TREE_VERSION_KEY)
+
+
+def get_category_tree():
+    """Return a `CategoryTree` of all categories.
+
+    The tree is built once per process and shared between requests until
+    `invalidate_category_tree` is called.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import Category
+    global _category_tree  # pylint: disable=global-statement
+    version = get_cache_version(CATEGORY_TREE_VERSION_KEY)
+    tree = _category_tree
+    if tree is None or tree.version != version:
+        with _category_tree_lock:
+            tree = _category_tree
+            if tree is None or tree.version != version:
+                rows = Category.objects.values_list(
+                    'id', 'parent_id', 'lft', 'rght', 'tree_id', 'level',
+                    'slug', 'name')
+                tree = CategoryTree(rows, version=version)
+                _category_tree = tree
+    return tree
@@ -0,0 +1,32 @@
+from .bitmaps import bitmap_from_ids, get_product_index
+
+
+def get_attribute_facets(products, selection=None, attribute_pks=None):
+    """Return `{attribute_pk: {value_pk: count}}` for given products.
+
+    Counts how many of the products use each attribute value, either directly
+    or through any of their variants. `selection` maps attribute pks to
+    selected value pks the counted products have to match, counts of a
+    selected attribute ignore its own selection to show how many products
+    each of its values would match. Counting can be limited to attributes
+    with given primary keys.
+    """
+    index = get_product_index()
+    candidates = bitmap_from_ids(
+        products.order_by().values_list('pk', flat=True))
+    selection = selection or {}
+    matching = index.get_selection_bitmap(selection)
+    facets = index.count_attribute_values(
+        candidates if matching is None else candidates & matching,
+        attribute_pks)
+    for attribute_pk in selection:
+        if attribute_pks is not None and attribute_pk not in attribute_pks:
+            continue
+        matching = index.get_selection_bitmap({
+            pk: value_pks for pk, value_pks in selection.items()
+            if pk != attribute_pk})
+        counts = index.count_attribute_values(
+            candidates if matching is None else candidates & matching,
+            [attribute_pk])
+        facets[attribute_pk] = counts.get(attribute_pk, {})
+    return facets
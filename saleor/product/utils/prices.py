@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.db.models import Q
+
+from ...discount.utils import get_active_sale_index, get_product_discounts
+
+
+def get_products_of_sales(sales):
+    """Return products that any of the given sales can apply to."""
+    # pylint: disable=cyclic-import
+    from ..models import Category, Product
+    product_ids = set()
+    category_ids = set()
+    collection_ids = set()
+    for sale in sales:
+        product_ids.update(sale.products.values_list('pk', flat=True))
+        category_ids.update(sale.categories.values_list('pk', flat=True))
+        collection_ids.update(sale.collections.values_list('pk', flat=True))
+    categories = Category.tree.get_queryset_descendants(
+        Category.objects.filter(pk__in=category_ids), include_self=True)
+    return Product.objects.filter(
+        Q(pk__in=product_ids) | Q(category__in=categories) |
+        Q(collections__in=collection_ids)).distinct()
+
+
+def update_product_prices(product, discounts):
+    """Store prices of the product and its variants with discounts applied.
+
+    Stored prices do not include taxes, as those depend on the customer's
+    country.
+    """
+    # pylint: disable=cyclic-import
+    from ..models import Product, ProductVariant
+    product_discounts = (
+        list(get_product_discounts(product, discounts)) if discounts else [])
+    prices = []
+    undiscounted_prices = []
+    for variant in product.variants.all():
+        base_price = variant.price_override or product.price
+        price = min(
+            [discount(base_price) for discount in product_discounts],
+            default=base_price)
+        if variant.discounted_price != price:
+            ProductVariant.objects.filter(pk=variant.pk).update(
+                discounted_price=price)
+        prices.append(price)
+        undiscounted_prices.append(base_price)
+    if not undiscounted_prices:
+        undiscounted_prices = [product.price]
+        prices = [min(
+            [discount(product.price) for discount in product_discounts],
+            default=product.price)]
+    Product.objects.filter(pk=product.pk).update(
+        min_price=min(prices), max_price=max(prices),
+        min_price_undiscounted=min(undiscounted_prices),
+        max_price_undiscounted=max(undiscounted_prices))
+
+
+def update_products_prices(product_ids, chunk_size=500):
+    """Store discounted prices of given products using active sales."""
+    # pylint: disable=cyclic-import
+    from ..models import Product
+    discounts = get_active_sale_index(date.today())
+    product_ids = sorted(set(product_ids))
+    for offset in range(0, len(product_ids), chunk_size):
+        products = Product.objects.filter(
+            pk__in=product_ids[offset:offset + chunk_size])
+        products = products.select_related('category').prefetch_related(
+            'variants', 'collections')
+        for product in products:
+            update_product_prices(product, discounts)
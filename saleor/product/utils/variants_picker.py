@@ -1,52 +1,117 @@
 from collections import defaultdict
+from uuid import uuid4
 
+from django.core.cache import cache
+from django.utils.translation import get_language
 from django_prices.templatetags import prices_i18n
 
-from ...core.utils import to_local_currency
+from ...core.utils.cache import get_cache_version, increment_cache_version
 from ...core.utils.taxes import display_gross_prices, get_tax_rate_by_name
+from ...core.utils.translations import prefetch_translations
 from ...seo.schema.product import variant_json_ld
-from .availability import get_availability
+from .availability import ProductPriceSheet
 
+VARIANT_PICKER_VERSION_KEY = 'product:variant-picker-version'
+VARIANT_PICKER_CACHE_TIMEOUT = 60 * 60 * 24
 
-def get_variant_picker_data(
-        product, discounts=None, taxes=None, local_currency=None):
-    availability = get_availability(product, discounts, taxes, local_currency)
-    variants = product.variants.all()
-    data = {'variantAttributes': [], 'variants': []}
 
-    variant_attributes = product.product_type.variant_attributes.all()
+def get_variant_picker_data(
+        product, discounts=None, taxes=None, local_currency=None,
+        price_sheet=None):
+    """Return the variant picker payload of a product.
 
-    # Collect only available variants
-    filter_available_variants = defaultdict(list)
+    Attributes, values and variant to value mapping come from a cached
+    skeleton, only prices and stock are computed for every call.
+    """
+    if price_sheet is None:
+        price_sheet = ProductPriceSheet(
+            product, discounts, taxes, local_currency)
+    availability = price_sheet.availability
+    skeleton = get_variant_picker_skeleton(product)
+    variants = {variant.pk: variant for variant in product.variants.all()}
+    data = {
+        'variantAttributes': skeleton['variantAttributes'], 'variants': []}
 
-    for variant in variants:
-        price = variant.get_price(discounts, taxes)
-        price_undiscounted = variant.get_price(taxes=taxes)
-        if local_currency:
-            price_local_currency = to_local_currency(price, local_currency)
-        else:
-            price_local_currency = None
+    for variant_skeleton in skeleton['variants']:
+        variant = variants[variant_skeleton['id']]
+        variant_prices = price_sheet.get_variant_prices(variant)
+        price = variant_prices.price
         in_stock = variant.is_in_stock()
         schema_data = variant_json_ld(price, variant, in_stock)
         variant_data = {
             'id': variant.id,
             'availability': in_stock,
             'price': price_as_dict(price),
-            'priceUndiscounted': price_as_dict(price_undiscounted),
-            'attributes': variant.attributes,
-            'priceLocalCurrency': price_as_dict(price_local_currency),
+            'priceUndiscounted': price_as_dict(
+                variant_prices.price_undiscounted),
+            'attributes': variant_skeleton['attributes'],
+            'priceLocalCurrency': price_as_dict(
+                variant_prices.price_local_currency),
             'schemaData': schema_data}
         data['variants'].append(variant_data)
 
+    data['availability'] = {
+        'discount': price_as_dict(availability.discount),
+        'taxRate': get_tax_rate_by_name(product.tax_rate, taxes),
+        'priceRange': price_range_as_dict(availability.price_range),
+        'priceRangeUndiscounted': price_range_as_dict(
+            availability.price_range_undiscounted),
+        'priceRangeLocalCurrency': price_range_as_dict(
+            availability.price_range_local_currency)}
+    data['priceDisplay'] = {
+        'displayGross': display_gross_prices(),
+        'handleTaxes': bool(taxes)}
+    return data
+
+
+def get_variant_picker_skeleton(product):
+    """Return the price independent part of the variant picker payload.
+
+    Skeletons are cached per product and language. A cached skeleton that
+    does not list exactly the variants of the product is rebuilt.
+    """
+    key = get_variant_picker_cache_key(product.pk, get_language())
+    skeleton = cache.get(key)
+    variant_ids = {variant.pk for variant in product.variants.all()}
+    if skeleton is None or variant_ids != {
+            variant['id'] for variant in skeleton['variants']}:
+        skeleton = build_variant_picker_skeleton(product)
+        cache.set(key, skeleton, VARIANT_PICKER_CACHE_TIMEOUT)
+    return skeleton
+
+
+def build_variant_picker_skeleton(product):
+    # pylint: disable=cyclic-import
+    from ..models import AttributeChoiceValue
+    skeleton = {'variantAttributes': [], 'variants': []}
+
+    # Collect only available variants
+    filter_available_variants = defaultdict(list)
+
+    for variant in product.variants.all():
+        skeleton['variants'].append({
+            'id': variant.id, 'attributes': variant.attributes})
         for variant_key, variant_value in variant.attributes.items():
             filter_available_variants[int(variant_key)].append(
                 int(variant_value))
 
+    variant_attributes = prefetch_translations(
+        product.product_type.variant_attributes.all(), 'translations')
+    values = prefetch_translations(AttributeChoiceValue.objects.filter(
+        attribute__in=variant_attributes,
+        pk__in=[
+            value_pk for value_pks in filter_available_variants.values()
+            for value_pk in value_pks]), 'translations')
+    values_by_attribute = defaultdict(list)
+    for value in values:
+        if value.pk in filter_available_variants[value.attribute_id]:
+            values_by_attribute[value.attribute_id].append(value)
+
     for attribute in variant_attributes:
         available_variants = filter_available_variants.get(attribute.pk, None)
 
         if available_variants:
-            data['variantAttributes'].append({
+            skeleton['variantAttributes'].append({
                 'pk': attribute.pk,
                 'name': attribute.translated.name,
                 'slug': attribute.translated.slug,
@@ -54,22 +119,38 @@ def get_variant_picker_data(
                     {
                         'pk': value.pk, 'name': value.translated.name,
                         'slug': value.translated.slug}
-                    for value in attribute.values.filter(
-                        pk__in=available_variants).prefetch_related(
-                            'translations')]})
+                    for value in values_by_attribute[attribute.pk]]})
+    return skeleton
 
-    data['availability'] = {
-        'discount': price_as_dict(availability.discount),
-        'taxRate': get_tax_rate_by_name(product.tax_rate, taxes),
-        'priceRange': price_range_as_dict(availability.price_range),
-        'priceRangeUndiscounted': price_range_as_dict(
-            availability.price_range_undiscounted),
-        'priceRangeLocalCurrency': price_range_as_dict(
-            availability.price_range_local_currency)}
-    data['priceDisplay'] = {
-        'displayGross': display_gross_prices(),
-        'handleTaxes': bool(taxes)}
-    return data
+
+def _get_product_version_key(product_id):
+    return '%s:%s' % (VARIANT_PICKER_VERSION_KEY, product_id)
+
+
+def _get_product_version(product_id):
+    # versions are random and expire like skeletons, so a version created
+    # again never matches skeletons cached before
+    return cache.get_or_set(
+        _get_product_version_key(product_id), lambda: uuid4().hex,
+        timeout=VARIANT_PICKER_CACHE_TIMEOUT)
+
+
+def get_variant_picker_cache_key(product_id, language):
+    return 'product:variant-picker:%s:%s:%s:%s' % (
+        product_id, language, get_cache_version(VARIANT_PICKER_VERSION_KEY),
+        _get_product_version(product_id))
+
+
+def invalidate_variant_picker(product_id=None):
+    """Drop cached variant picker skeletons of a product.
+
+    Without a product all skeletons are dropped, which is needed when
+    attributes or their values change.
+    """
+    if product_id is None:
+        increment_cache_version(VARIANT_PICKER_VERSION_KEY)
+    else:
+        cache.delete(_get_product_version_key(product_id))
 
 
 def price_as_dict(price):
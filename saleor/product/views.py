@@ -8,6 +8,7 @@ from django.urls import reverse
 
 from ..checkout.utils import set_cart_cookie
 from ..core.utils import serialize_decimal
+from ..core.utils.translations import prefetch_translations
 from ..seo.schema.product import product_json_ld
 from .filters import ProductCategoryFilter, ProductCollectionFilter
 from .models import Category
@@ -16,7 +17,8 @@ from .utils import (
     handle_cart_form, products_for_cart, products_with_details,
     products_for_products_list)
 from .utils.attributes import get_product_attributes_data
-from .utils.availability import get_availability
+from .utils.availability import ProductPriceSheet
+from .utils.categories import get_category_tree
 from .utils.variants_picker import get_variant_picker_data
 
 
@@ -57,18 +59,23 @@ def product_details(request, slug, product_id, form=None):
     today = datetime.date.today()
     is_visible = (
         product.available_on is None or product.available_on <= today)
-    if form is None:
-        form = handle_cart_form(request, product, create_cart=False)[0]
-    availability = get_availability(
+    # every variant is priced once and shared by all parts of the page
+    price_sheet = ProductPriceSheet(
         product, discounts=request.discounts, taxes=request.taxes,
         local_currency=request.currency)
+    if form is None:
+        form = handle_cart_form(
+            request, product, create_cart=False, price_sheet=price_sheet)[0]
+    availability = price_sheet.availability
     product_images = get_product_images(product)
     variant_picker_data = get_variant_picker_data(
-        product, request.discounts, request.taxes, request.currency)
+        product, request.discounts, request.taxes, request.currency,
+        price_sheet=price_sheet)
     product_attributes = get_product_attributes_data(product)
     # show_variant_picker determines if variant picker is used or select input
     show_variant_picker = all([v.attributes for v in product.variants.all()])
-    json_ld_data = product_json_ld(product, product_attributes)
+    json_ld_data = product_json_ld(
+        product, product_attributes, price_sheet=price_sheet)
     ctx = {
         'is_visible': is_visible,
         'form': form,
@@ -113,16 +120,17 @@ def product_add_to_cart(request, slug, product_id):
 
 
 def category_index(request, slug, category_id):
-    categories = Category.objects.prefetch_related('translations')
+    categories = prefetch_translations(Category.objects.all(), 'translations')
     category = get_object_or_404(categories, id=category_id)
     if slug != category.slug:
         return redirect(
             'product:category', permanent=True, slug=category.slug,
             category_id=category_id)
     # Check for subcategories
-    categories = category.get_descendants(include_self=True)
+    category_ids = get_category_tree().get_descendant_ids(
+        category.pk, include_self=True)
     products = products_for_products_list(user=request.user).filter(
-        category__in=categories).order_by('name')
+        category_id__in=category_ids).order_by('name')
     product_filter = ProductCategoryFilter(
         request.GET, queryset=products, category=category)
     ctx = get_product_list_context(request, product_filter)
@@ -131,8 +139,8 @@ def category_index(request, slug, category_id):
 
 
 def collection_index(request, slug, pk):
-    collections = collections_visible_to_user(request.user).prefetch_related(
-        'translations')
+    collections = prefetch_translations(
+        collections_visible_to_user(request.user), 'translations')
     collection = get_object_or_404(collections, id=pk)
     if collection.slug != slug:
         return HttpResponsePermanentRedirect(collection.get_absolute_url())
@@ -0,0 +1,31 @@
+from django.apps import AppConfig, apps
+
+
+class SearchAppConfig(AppConfig):
+    name = 'saleor.search'
+
+    def ready(self):
+        from django.db.models.signals import (
+            post_delete, post_save, pre_delete)
+        from ..account.models import Address, User
+        from ..order.models import Order
+        from ..product.models import Product
+        from .signals import (
+            LOCAL_INDEX_SOURCES, SUGGESTION_SOURCES, address_deleted,
+            address_deleting, address_saved, local_index_source_changed,
+            order_saved, product_saved, suggestion_source_changed,
+            user_saved)
+        post_save.connect(product_saved, sender=Product)
+        post_save.connect(order_saved, sender=Order)
+        post_save.connect(user_saved, sender=User)
+        post_save.connect(address_saved, sender=Address)
+        pre_delete.connect(address_deleting, sender=Address)
+        post_delete.connect(address_deleted, sender=Address)
+        for label in SUGGESTION_SOURCES:
+            model = apps.get_model(label)
+            post_save.connect(suggestion_source_changed, sender=model)
+            post_delete.connect(suggestion_source_changed, sender=model)
+        for label in LOCAL_INDEX_SOURCES:
+            model = apps.get_model(label)
+            post_save.connect(local_index_source_changed, sender=model)
+            post_delete.connect(local_index_source_changed, sender=model)
@@ -1,8 +1,8 @@
 from . import elasticsearch_dashboard, elasticsearch_storefront
 
 
-def search_storefront(phrase):
-    return elasticsearch_storefront.search(phrase)
+def search_storefront(phrase, queryset=None):
+    return elasticsearch_storefront.search(phrase, queryset)
 
 
 def search_dashboard(phrase):
@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.db.models import Case, When
+from elasticsearch_dsl import MultiSearch
 from elasticsearch_dsl.query import MultiMatch
 
 from ..documents import OrderDocument, ProductDocument, UserDocument
@@ -39,12 +42,32 @@ def get_search_queries(phrase):
         'orders': _search_orders(phrase)}
 
 
+def _hits_to_queryset(model, response):
+    """Return objects of the response's hits, keeping their order."""
+    pks = [hit.meta.id for hit in response] if response is not None else []
+    preserved_order = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(pks)])
+    return model.objects.filter(pk__in=pks).order_by(preserved_order)
+
+
 def search(phrase):
     """Return all matching objects for dashboard views.
 
-    Composes independent search querysets into a single dictionary.
+    Composes independent search querysets into a single dictionary. All
+    searches are sent in a single multi search request and run by
+    Elasticsearch in parallel, each one returns hits found within
+    `DASHBOARD_SEARCH_TIMEOUT`. A failed search has no results.
 
     Args:
         phrase (str): searched phrase
     """
-    return {k: s.to_queryset() for k, s in get_search_queries(phrase).items()}
+    searches = get_search_queries(phrase)
+    timeout = '%dms' % (settings.DASHBOARD_SEARCH_TIMEOUT * 1000, )
+    multi_search = MultiSearch()
+    for s in searches.values():
+        multi_search = multi_search.add(
+            s[:settings.DASHBOARD_SEARCH_LIMIT].extra(timeout=timeout))
+    responses = multi_search.execute(raise_on_error=False)
+    return {
+        key: _hits_to_queryset(s._model, response)
+        for (key, s), response in zip(searches.items(), responses)}
@@ -1,17 +1,63 @@
-from elasticsearch_dsl.query import MultiMatch
+from datetime import date
 
+from elasticsearch_dsl.query import MultiMatch, Q
+
+from ...product.models import Product
 from ..documents import ProductDocument
 
 
+class ProductSearchResults:
+    """Products matching an Elasticsearch query, fetched a slice at a time.
+
+    Slicing requests only the hits within the slice using `from` and `size`
+    and loads their products from the database in the order of hits. Every
+    response carries the total number of hits, so counting results after
+    fetching a slice costs no request.
+    """
+
+    def __init__(self, search, queryset):
+        self.search = search
+        self.queryset = queryset
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.search[:0].execute().hits.total
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        response = self.search[key].execute()
+        self._count = response.hits.total
+        pks = [int(hit.meta.id) for hit in response]
+        products = self.queryset.in_bulk(pks)
+        return [products[pk] for pk in pks if pk in products]
+
+
 def get_search_query(phrase):
-    """Return matching products for storefront views."""
+    """Return matching products for storefront views.
+
+    Only products available today are matched, like the ones returned by
+    `Product.objects.available_products`, so the total number of hits
+    agrees with the products listed.
+    """
     query = MultiMatch(fields=['title', 'name', 'description'], query=phrase)
+    available = Q('bool', should=[
+        Q('range', available_on={'lte': date.today().isoformat()}),
+        Q('bool', must_not=[Q('exists', field='available_on')])])
     return (
         ProductDocument.search()
         .query(query)
         .source(False)
-        .filter('term', is_published=True))
+        .filter('term', is_published=True)
+        .filter(available))
 
 
-def search(phrase):
-    return get_search_query(phrase).to_queryset()
+def search(phrase, queryset=None):
+    if queryset is None:
+        queryset = Product.objects.all()
+    return ProductSearchResults(get_search_query(phrase), queryset)
@@ -0,0 +1,9 @@
+from . import local_dashboard, local_storefront
+
+
+def search_storefront(phrase, queryset=None):
+    return local_storefront.search(phrase, queryset)
+
+
+def search_dashboard(phrase):
+    return local_dashboard.search(phrase)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db.models import Case, When
+
+from ..local_documents import OrderDocument, ProductDocument, UserDocument
+from .local_index import get_local_index
+
+
+def _search(document, phrase, **kwargs):
+    """Return best matching objects of the document, keeping their order."""
+    pks = get_local_index(document).search(phrase, **kwargs)
+    pks = pks[:settings.DASHBOARD_SEARCH_LIMIT]
+    preserved_order = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(pks)])
+    return document.get_queryset().filter(pk__in=pks).order_by(
+        preserved_order)
+
+
+def search(phrase):
+    """Return all matching objects for dashboard views.
+
+    Composes independent search querysets into a single dictionary. Users
+    have to match every word of the phrase.
+
+    Args:
+        phrase (str): searched phrase
+    """
+    return {
+        'products': _search(ProductDocument(), phrase),
+        'users': _search(UserDocument(), phrase, require_all=True),
+        'orders': _search(OrderDocument(), phrase)}
@@ -0,0 +1,500 @@
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+
+from ..index_log import (
+    IndexFileLock, get_log_version, get_logged_changes,
+    invalidate_logged_index, new_log_state)
+
+MAGIC = b'SALEORIX'
+HEADER = struct.Struct('<8sIII')
+OFFSET = struct.Struct('<I')
+DOCUMENT = struct.Struct('<IB')
+TERM = struct.Struct('<HI')
+POSTING = struct.Struct('<IHH')
+MAX_SHORT = 2 ** 16 - 1
+MANIFEST = 'manifest.json'
+# BM25 term frequency saturation and document length normalization
+K1 = 1.2
+B = 0.75
+# segments written by incremental updates are merged into a single one
+# once there are more of them
+MAX_SEGMENTS = 8
+# objects loaded from the database at once while building an index
+BATCH_SIZE = 2000
+
+WORD_RE = re.compile(r'\w+')
+EMAIL_RE = re.compile(r'[^\s@]+@[^\s@]+\.\w+')
+
+_indexes_lock = threading.Lock()
+_indexes = {}
+
+
+def fold(text):
+    """Return text without accents and case differences."""
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(
+        char for char in text if not unicodedata.combining(char)).casefold()
+
+
+def is_cjk(char):
+    return (
+        '\u3040' <= char <= '\u30ff' or '\u3400' <= char <= '\u9fff' or
+        '\uac00' <= char <= '\ud7af' or '\uf900' <= char <= '\ufaff')
+
+
+def standard_tokens(text):
+    """Split text into words of any script.
+
+    Chinese, Japanese and Korean text is written without spaces, runs of
+    their characters are split into overlapping pairs of characters.
+    """
+    for word in WORD_RE.findall(fold(text)):
+        if len(word) > 1 and all(is_cjk(char) for char in word):
+            for position in range(len(word) - 1):
+                yield word[position:position + 2]
+        else:
+            yield word
+
+
+def edge_ngram_tokens(text, min_gram=3, max_gram=15):
+    """Return beginnings of words, like `documents.title_analyzer`."""
+    for token in standard_tokens(text):
+        for size in range(min_gram, min(len(token), max_gram) + 1):
+            yield token[:size]
+
+
+def email_tokens(text):
+    """Keep email addresses whole and split the rest into words."""
+    for part in text.split():
+        if EMAIL_RE.fullmatch(part):
+            yield fold(part)
+        else:
+            yield from standard_tokens(part)
+
+
+class Field:
+    def __init__(self, analyzer=standard_tokens, boost=1):
+        self.analyzer = analyzer
+        self.boost = boost
+
+    def analyze(self, text):
+        return list(self.analyzer(text or ''))
+
+
+def get_term_key(field_name, term):
+    return ('%s\0%s' % (field_name, term)).encode()
+
+
+class Segment:
+    """An immutable, memory-mapped part of an index.
+
+    The file holds a header, JSON statistics, offsets of term records,
+    a table of documents sorted by primary key and term records. Every term
+    record holds postings of documents using the term in a field: their
+    primary key, term frequency and length of the field.
+    """
+
+    def __init__(self, path, deleted=()):
+        self.name = os.path.basename(path)
+        self.deleted = frozenset(deleted)
+        with open(path, 'rb') as segment_file:
+            self._data = mmap.mmap(
+                segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_size, self._term_count, self._document_count = (
+            HEADER.unpack_from(self._data))
+        if magic != MAGIC:
+            raise ValueError('%s is not an index segment' % (path, ))
+        self.meta = json.loads(
+            self._data[HEADER.size:HEADER.size + meta_size].decode())
+        self._offsets_start = HEADER.size + meta_size
+        self._documents_start = (
+            self._offsets_start + self._term_count * OFFSET.size)
+
+    def _get_term(self, position):
+        offset = OFFSET.unpack_from(
+            self._data, self._offsets_start + position * OFFSET.size)[0]
+        key_size, postings_count = TERM.unpack_from(self._data, offset)
+        start = offset + TERM.size
+        return self._data[start:start + key_size], start + key_size, (
+            postings_count)
+
+    def _get_document(self, position):
+        return DOCUMENT.unpack_from(
+            self._data, self._documents_start + position * DOCUMENT.size)
+
+    def get_postings(self, key):
+        """Return `(pk, frequency, length)` of documents using the term."""
+        low, high = 0, self._term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_term(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._term_count:
+            return []
+        term_key, start, postings_count = self._get_term(low)
+        if term_key != key:
+            return []
+        return list(POSTING.iter_unpack(
+            self._data[start:start + postings_count * POSTING.size]))
+
+    def get_flags(self, pk):
+        """Return filter flags of the document or `None` if it's missing."""
+        low, high = 0, self._document_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_document(middle)[0] < pk:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._document_count:
+            document_pk, flags = self._get_document(low)
+            if document_pk == pk:
+                return flags
+        return None
+
+    def __contains__(self, pk):
+        return self.get_flags(pk) is not None
+
+    def documents(self):
+        for position in range(self._document_count):
+            yield self._get_document(position)
+
+    def terms(self):
+        for position in range(self._term_count):
+            key, start, postings_count = self._get_term(position)
+            yield key.decode(), list(POSTING.iter_unpack(
+                self._data[start:start + postings_count * POSTING.size]))
+
+
+def write_segment(path, documents, postings, lengths):
+    """Store documents' flags and postings of their terms.
+
+    `documents` maps primary keys to filter flags, `postings` maps term
+    keys to lists of `(pk, frequency, length)` and `lengths` holds total
+    lengths of fields.
+    """
+    terms = sorted(
+        (key.encode(), sorted(entries)) for key, entries in postings.items())
+    documents = sorted(documents.items())
+    meta = json.dumps(
+        {'documents': len(documents), 'lengths': lengths}).encode()
+    directory = os.path.dirname(path)
+    with tempfile.NamedTemporaryFile(
+            dir=directory, delete=False) as segment_file:
+        segment_file.write(
+            HEADER.pack(MAGIC, len(meta), len(terms), len(documents)))
+        segment_file.write(meta)
+        offset = (
+            HEADER.size + len(meta) + len(terms) * OFFSET.size +
+            len(documents) * DOCUMENT.size)
+        for key, entries in terms:
+            segment_file.write(OFFSET.pack(offset))
+            offset += TERM.size + len(key) + len(entries) * POSTING.size
+        for pk, flags in documents:
+            segment_file.write(DOCUMENT.pack(pk, flags))
+        for key, entries in terms:
+            segment_file.write(TERM.pack(len(key), len(entries)))
+            segment_file.write(key)
+            segment_file.write(b''.join(
+                POSTING.pack(*entry) for entry in entries))
+    os.chmod(segment_file.name, 0o644)
+    os.replace(segment_file.name, path)
+
+
+def invert_documents(document, instances):
+    """Return documents, postings and field lengths of model instances."""
+    documents = {}
+    postings = defaultdict(list)
+    lengths = Counter()
+    for instance in instances:
+        data = document.prepare(instance)
+        documents[instance.pk] = document.get_flags(instance)
+        for field_name, field in document.fields.items():
+            terms = field.analyze(data.get(field_name))
+            length = min(len(terms), MAX_SHORT)
+            lengths[field_name] += length
+            for term, frequency in Counter(terms).items():
+                postings['%s\0%s' % (field_name, term)].append(
+                    (instance.pk, min(frequency, MAX_SHORT), length))
+    return documents, postings, dict(lengths)
+
+
+class LocalIndex:
+    """Segments of a document type searched with BM25 scoring.
+
+    Like in Lucene, statistics used for scoring include updated and deleted
+    documents until their segments get merged.
+    """
+
+    def __init__(self, document, segments, version=None):
+        self.document = document
+        self.segments = segments
+        self.version = version
+        self.document_count = sum(
+            segment.meta['documents'] for segment in segments)
+        self.lengths = Counter()
+        for segment in segments:
+            self.lengths.update(segment.meta['lengths'])
+
+    def _score_field(
+            self, field_name, field, clauses, scores, owners,
+            matched_clauses):
+        average_length = (
+            self.lengths.get(field_name, 0) / self.document_count) or 1
+        field_scores = defaultdict(float)
+        for position, clause in enumerate(clauses):
+            terms = set(field.analyze(clause))
+            term_matches = Counter()
+            for term in terms:
+                key = get_term_key(field_name, term)
+                frequency = 0
+                live_postings = []
+                for segment in self.segments:
+                    postings = segment.get_postings(key)
+                    frequency += len(postings)
+                    live_postings.extend(
+                        (segment, posting) for posting in postings
+                        if posting[0] not in segment.deleted)
+                idf = math.log(
+                    1 + (self.document_count - frequency + 0.5) /
+                    (frequency + 0.5))
+                for segment, (pk, term_frequency, length) in live_postings:
+                    normalized_frequency = (
+                        term_frequency * (K1 + 1) / (
+                            term_frequency + K1 * (
+                                1 - B + B * length / average_length)))
+                    field_scores[pk] += field.boost * idf * (
+                        normalized_frequency)
+                    term_matches[pk] += 1
+                    owners[pk] = segment
+            for pk, count in term_matches.items():
+                if count == len(terms):
+                    matched_clauses[pk].add(position)
+        for pk, score in field_scores.items():
+            scores[pk] = max(scores.get(pk, 0), score)
+
+    def search(self, phrase, filters=None, require_all=False):
+        """Return primary keys of matching documents, best ones first.
+
+        Every word of the phrase is analyzed like each field of the document
+        and a document gets the score of its best matching field. With
+        `require_all` every word has to be matched by all of its terms in
+        any field. `filters` maps names of the document's filters to
+        required values.
+        """
+        clauses = phrase.split()
+        if not clauses or not self.document_count:
+            return []
+        scores = {}
+        owners = {}
+        matched_clauses = defaultdict(set)
+        for field_name, field in self.document.fields.items():
+            self._score_field(
+                field_name, field, clauses, scores, owners, matched_clauses)
+        mask, expected = self.document.get_filter_mask(filters or {})
+        results = []
+        for pk, score in scores.items():
+            if require_all and len(matched_clauses[pk]) < len(clauses):
+                continue
+            if mask and owners[pk].get_flags(pk) & mask != expected:
+                continue
+            results.append((-score, pk))
+        return [pk for dummy_score, pk in sorted(results)]
+
+
+def get_index_directory(document):
+    return os.path.join(settings.LOCAL_SEARCH_PATH, document.name)
+
+
+def get_lock_path(directory):
+    # readers take a shared lock, so segments they load are not removed by
+    # a concurrent write
+    return os.path.join(directory, 'index.lock')
+
+
+def get_log_index_name(document):
+    """Return the name changes of the document are logged under."""
+    return 'local:%s' % (document.name, )
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(directory, manifest):
+    """Replace the list of segments, removing files no longer listed.
+
+    Processes still reading removed segments keep them mapped until they
+    load the new manifest.
+    """
+    with tempfile.NamedTemporaryFile(
+            'w', dir=directory, delete=False) as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.chmod(manifest_file.name, 0o644)
+    os.replace(manifest_file.name, os.path.join(directory, MANIFEST))
+    names = {segment['name'] for segment in manifest['segments']}
+    for name in os.listdir(directory):
+        if name.startswith('segment-') and name not in names:
+            os.remove(os.path.join(directory, name))
+
+
+def _add_segment(directory, manifest, documents, postings, lengths):
+    manifest['generation'] += 1
+    name = 'segment-%08d' % (manifest['generation'], )
+    write_segment(os.path.join(directory, name), documents, postings, lengths)
+    manifest['segments'].append({'name': name, 'deleted': []})
+
+
+def _merge_segments(directory, manifest):
+    """Replace all segments with one holding only their live documents."""
+    segments = [
+        Segment(os.path.join(directory, entry['name']), entry['deleted'])
+        for entry in manifest['segments']]
+    documents = {}
+    postings = defaultdict(list)
+    field_lengths = {}
+    for segment in segments:
+        documents.update(
+            (pk, flags) for pk, flags in segment.documents()
+            if pk not in segment.deleted)
+        for key, entries in segment.terms():
+            field_name = key.split('\0', 1)[0]
+            for pk, frequency, length in entries:
+                if pk not in segment.deleted:
+                    postings[key].append((pk, frequency, length))
+                    field_lengths[field_name, pk] = length
+    lengths = Counter()
+    for (field_name, dummy_pk), length in field_lengths.items():
+        lengths[field_name] += length
+    manifest['segments'] = []
+    _add_segment(directory, manifest, documents, postings, dict(lengths))
+
+
+def invalidate_local_index(document):
+    """Make processes of all hosts check their indexes on next use."""
+    invalidate_logged_index(get_log_index_name(document))
+
+
+def _add_all_segments(directory, manifest, document, batch_size):
+    manifest['log'] = new_log_state()
+    manifest['segments'] = []
+    queryset = document.get_queryset().order_by('pk')
+    last_pk = 0
+    while True:
+        instances = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not instances:
+            break
+        _add_segment(
+            directory, manifest, *invert_documents(document, instances))
+        last_pk = instances[-1].pk
+    if len(manifest['segments']) != 1:
+        _merge_segments(directory, manifest)
+
+
+def _add_changed_segment(directory, manifest, document, pks):
+    for entry in manifest['segments']:
+        segment = Segment(os.path.join(directory, entry['name']))
+        entry['deleted'] = sorted(
+            set(entry['deleted']) | {pk for pk in pks if pk in segment})
+    instances = document.get_queryset().filter(pk__in=pks)
+    documents, postings, lengths = invert_documents(document, instances)
+    if documents:
+        _add_segment(directory, manifest, documents, postings, lengths)
+    if len(manifest['segments']) > MAX_SEGMENTS:
+        _merge_segments(directory, manifest)
+
+
+def rebuild_local_index(document, batch_size=BATCH_SIZE):
+    """Index all objects of the document from scratch."""
+    directory = get_index_directory(document)
+    with IndexFileLock(get_lock_path(directory)):
+        manifest = _read_manifest(directory) or {'generation': 0}
+        _add_all_segments(directory, manifest, document, batch_size)
+        _write_manifest(directory, manifest)
+    invalidate_local_index(document)
+
+
+def update_local_index(document, pks):
+    """Re-index objects with given primary keys, removing the deleted ones.
+
+    Updated objects are written to a new segment and their previous
+    versions are marked as deleted in older segments. Only the index of the
+    current host is updated, saved objects are logged with
+    `log_index_changes` to update indexes of all hosts.
+    """
+    directory = get_index_directory(document)
+    if _read_manifest(directory) is None:
+        rebuild_local_index(document)
+        return
+    with IndexFileLock(get_lock_path(directory)):
+        manifest = _read_manifest(directory)
+        _add_changed_segment(directory, manifest, document, set(pks))
+        _write_manifest(directory, manifest)
+    invalidate_local_index(document)
+
+
+def apply_logged_local_changes(document):
+    """Update the index of the host with changes logged by all hosts.
+
+    The index is built when missing and rebuilt once log entries it misses
+    are pruned. The manifest keeps the state of the log along with the
+    segments it describes.
+    """
+    directory = get_index_directory(document)
+    with IndexFileLock(get_lock_path(directory)):
+        manifest = _read_manifest(directory)
+        state = manifest.get('log') if manifest else None
+        changes, state = get_logged_changes(
+            get_log_index_name(document), state)
+        if changes is None:
+            manifest = manifest or {'generation': 0}
+            _add_all_segments(directory, manifest, document, BATCH_SIZE)
+        elif changes:
+            pks = set().union(*changes.values())
+            _add_changed_segment(directory, manifest, document, pks)
+            manifest['log'] = state
+        else:
+            return
+        _write_manifest(directory, manifest)
+
+
+def get_local_index(document):
+    """Return the `LocalIndex` of a document shared by the process.
+
+    Every host keeps its own index, it's built on first use and updated
+    with logged changes once they are reported.
+    """
+    version = get_log_version(get_log_index_name(document))
+    index = _indexes.get(document.name)
+    if index is None or index.version != version:
+        with _indexes_lock:
+            index = _indexes.get(document.name)
+            if index is None or index.version != version:
+                apply_logged_local_changes(document)
+                directory = get_index_directory(document)
+                with IndexFileLock(get_lock_path(directory), shared=True):
+                    manifest = _read_manifest(directory)
+                    segments = [
+                        Segment(
+                            os.path.join(directory, entry['name']),
+                            entry['deleted'])
+                        for entry in manifest['segments']]
+                index = LocalIndex(document, segments, version=version)
+                _indexes[document.name] = index
+    return index
@@ -0,0 +1,53 @@
+from datetime import date
+
+from ...product.models import Product
+from ..local_documents import ProductDocument
+from .local_index import get_local_index
+
+
+class ProductSearchResults:
+    """Products ranked by the local index, fetched a slice at a time.
+
+    Only products within a slice are loaded from the database, in the order
+    of their ranks.
+    """
+
+    def __init__(self, pks, queryset):
+        self.pks = pks
+        self.queryset = queryset
+
+    def count(self):
+        return len(self.pks)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        pks = self.pks[key]
+        products = self.queryset.in_bulk(pks)
+        return [products[pk] for pk in pks if pk in products]
+
+
+def search(phrase, queryset=None):
+    """Return matching products for storefront views.
+
+    Product names are matched by beginnings of their words, names and
+    descriptions by whole words. Only published products available today
+    are returned, so the number of results agrees with the products listed.
+
+    Args:
+        phrase (str): searched phrase
+        queryset (QuerySet): products the results are limited to
+
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+    pks = get_local_index(ProductDocument()).search(
+        phrase, filters={'is_published': True})
+    # availability changes over time, so it's not stored in the index
+    unavailable = set(Product.objects.filter(
+        available_on__gt=date.today()).values_list('pk', flat=True))
+    pks = [pk for pk in pks if pk not in unavailable]
+    return ProductSearchResults(pks, queryset)
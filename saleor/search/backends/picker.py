@@ -5,7 +5,8 @@ from django.utils.module_loading import import_module
 def pick_backend():
     """Return the currently configured storefront search function.
 
-    Returns a callable that accepts the search phrase.
+    Returns a callable that accepts the search phrase and optionally
+    a queryset of products the results are limited to.
     """
     return import_module(settings.SEARCH_BACKEND).search_storefront
 
@@ -1,8 +1,8 @@
 from . import postgresql_dashboard, postgresql_storefront
 
 
-def search_storefront(phrase):
-    return postgresql_storefront.search(phrase)
+def search_storefront(phrase, queryset=None):
+    return postgresql_storefront.search(phrase, queryset)
 
 
 def search_dashboard(phrase):
@@ -1,23 +1,34 @@
-from django.contrib.postgres.search import TrigramSimilarity
+from django.contrib.postgres.search import SearchQuery, TrigramSimilarity
+from django.db import connection
 from django.db.models import Q
 
 from ...product.models import Product
 
+NAME_SIMILARITY_THRESHOLD = 0.2
 
-def search(phrase):
+
+def search(phrase, queryset=None):
     """Return matching products for storefront views.
 
     Fuzzy storefront search that is resistant to small typing errors made
-    by user. Name is matched using trigram similarity, description uses
-    standard postgres full text search.
+    by user. Name is matched using trigram similarity, name and description
+    use standard postgres full text search of stored search vectors. Both
+    lookups are served by GIN indexes. Products with the most similar
+    names come first.
 
     Args:
         phrase (str): searched phrase
+        queryset (QuerySet): products the results are limited to
 
     """
-    name_sim = TrigramSimilarity('name', phrase)
+    # the trigram similarity operator uses a threshold set per session
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT set_limit(%s)', [NAME_SIMILARITY_THRESHOLD])
+    if queryset is None:
+        queryset = Product.objects.all()
     published = Q(is_published=True)
-    ft_in_description = Q(description__search=phrase)
-    name_similar = Q(name_sim__gt=0.2)
-    return Product.objects.annotate(name_sim=name_sim).filter(
-        (ft_in_description | name_similar) & published)
+    full_text_match = Q(search_vector=SearchQuery(phrase))
+    name_similar = Q(name__trigram_similar=phrase)
+    return queryset.filter(
+        (full_text_match | name_similar) & published).order_by(
+            TrigramSimilarity('name', phrase).desc(), 'pk')
@@ -1,3 +1,6 @@
+from datetime import date
+from unittest.mock import MagicMock, Mock
+
 from . import elasticsearch_storefront
 
 PHRASE = 'How fortunate man with none'
@@ -18,4 +21,27 @@ QUERY = {
 
 
 def test_storefront_product_search_query_syntax():
-    assert QUERY == elasticsearch_storefront.get_search_query(PHRASE).to_dict()
+    query = elasticsearch_storefront.get_search_query(PHRASE).to_dict()
+    available = query['query']['bool']['filter'].pop()
+    assert QUERY == query
+    assert available == {'bool': {'should': [
+        {'range': {'available_on': {'lte': date.today().isoformat()}}},
+        {'bool': {'must_not': [{'exists': {'field': 'available_on'}}]}}]}}
+
+
+def test_storefront_search_results_fetch_requested_slice():
+    hits = [Mock(meta=Mock(id='7')), Mock(meta=Mock(id='3'))]
+    response = MagicMock()
+    response.__iter__.return_value = hits
+    response.hits.total = 12
+    search = MagicMock()
+    search.__getitem__.return_value.execute.return_value = response
+    queryset = Mock()
+    queryset.in_bulk.return_value = {3: 'product 3', 7: 'product 7'}
+    results = elasticsearch_storefront.ProductSearchResults(search, queryset)
+
+    assert results[4:6] == ['product 7', 'product 3']
+    search.__getitem__.assert_called_once_with(slice(4, 6))
+    queryset.in_bulk.assert_called_once_with([7, 3])
+    assert results.count() == 12
+    assert search.__getitem__.call_count == 1
@@ -27,7 +27,7 @@ class ProductDocument(DocType):
 
     class Meta:
         model = Product
-        fields = ['name', 'description', 'is_published']
+        fields = ['name', 'description', 'is_published', 'available_on']
 
 
 users = Index('users')
@@ -40,6 +40,9 @@ class UserDocument(DocType):
     first_name = fields.StringField()
     last_name = fields.StringField()
 
+    def get_queryset(self):
+        return User.objects.select_related('default_billing_address')
+
     def prepare_user(self, instance):
         return instance.email
 
@@ -68,6 +71,9 @@ orders.settings(number_of_shards=1, number_of_replicas=0)
 class OrderDocument(DocType):
     user = fields.StringField(analyzer=email_analyzer)
 
+    def get_queryset(self):
+        return Order.objects.select_related('user')
+
     def prepare_user(self, instance):
         if instance.user:
             return instance.user.email
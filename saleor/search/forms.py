@@ -8,6 +8,6 @@ class SearchForm(forms.Form):
     q = forms.CharField(
         label=pgettext('Search form label', 'Query'), required=True)
 
-    def search(self):
+    def search(self, queryset=None):
         search = picker.pick_backend()
-        return search(self.cleaned_data['q'])
+        return search(self.cleaned_data['q'], queryset)
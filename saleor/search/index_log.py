@@ -0,0 +1,148 @@
+"""Keep file-based indexes of every host in sync through a change log.
+
+Search suggestions and the local search backend keep their indexes in
+files every host builds for itself. Saved objects are recorded in the
+log and each host applies entries logged since it last updated its own
+copy, so index files don't have to be shared between hosts.
+"""
+import json
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import IndexLogEntry
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+LOG_VERSION_KEY = 'search:index-log-version:%s'
+# entries created that long before the last applied one are read again, as
+# clocks of hosts differ and late commits log changes out of order
+LOG_OVERLAP = timedelta(minutes=1)
+# older entries are pruned, indexes not updated for that long are rebuilt
+LOG_RETENTION = timedelta(days=1)
+
+
+class IndexFileLock:
+    """Serialize index writes of all processes sharing the lock file.
+
+    Readers take a shared lock, so files they load are not removed by a
+    concurrent write. Without `fcntl`, as on Windows, only threads of the
+    current process are serialized.
+    """
+
+    _process_lock = threading.RLock()
+
+    def __init__(self, path, shared=False):
+        self.path = path
+        self.shared = shared
+
+    def __enter__(self):
+        if fcntl is None:
+            self._process_lock.acquire()
+            return
+        os.makedirs(
+            os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'a')
+        fcntl.flock(
+            self._file, fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        if fcntl is None:
+            self._process_lock.release()
+            return
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+def get_log_version(index):
+    """Return a token replaced whenever changes of the index are logged.
+
+    A token evicted from the cache is replaced as well, so processes look
+    for changes they might have missed along with it.
+    """
+    return cache.get_or_set(
+        LOG_VERSION_KEY % (index, ), lambda: uuid4().hex, timeout=None)
+
+
+def invalidate_logged_index(index):
+    """Make processes of all hosts update their copies of the index."""
+    cache.set(LOG_VERSION_KEY % (index, ), uuid4().hex, timeout=None)
+
+
+def log_index_changes(index, kind, pks):
+    """Record objects all hosts have to re-index in their copies."""
+    IndexLogEntry.objects.bulk_create([
+        IndexLogEntry(index=index, kind=kind, object_id=pk)
+        for pk in set(pks)])
+    invalidate_logged_index(index)
+
+
+def new_log_state():
+    """Return the log state of an index built from current data.
+
+    Entries logged shortly before are applied to the index once more, which
+    leaves it as it is.
+    """
+    return {'applied_at': timezone.now().timestamp(), 'applied_ids': []}
+
+
+def read_log_state(path):
+    try:
+        with open(path) as state_file:
+            return json.load(state_file)
+    except FileNotFoundError:
+        return None
+
+
+def write_log_state(path, state):
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(
+            'w', dir=directory, delete=False) as state_file:
+        json.dump(state, state_file)
+    os.chmod(state_file.name, 0o644)
+    os.replace(state_file.name, path)
+
+
+def get_logged_changes(index, state):
+    """Return `(changes, state)` of entries logged since the given state.
+
+    `changes` maps kinds to primary keys of objects to re-index, the new
+    state is stored along with the updated index. Returns `(None, None)`
+    when the index has to be rebuilt, as it has no state or misses entries
+    that were pruned.
+    """
+    if state is None:
+        return None, None
+    applied_at = datetime.fromtimestamp(state['applied_at'], timezone.utc)
+    if applied_at < timezone.now() - LOG_RETENTION + LOG_OVERLAP:
+        return None, None
+    applied_ids = set(state['applied_ids'])
+    entries = list(IndexLogEntry.objects.filter(
+        index=index, created__gte=applied_at - LOG_OVERLAP).values_list(
+            'pk', 'kind', 'object_id', 'created'))
+    changes = defaultdict(set)
+    for entry_id, kind, object_id, dummy_created in entries:
+        if entry_id not in applied_ids:
+            changes[kind].add(object_id)
+    applied_at = max([applied_at] + [entry[3] for entry in entries])
+    state = {
+        'applied_at': applied_at.timestamp(),
+        'applied_ids': [
+            entry[0] for entry in entries
+            if entry[3] >= applied_at - LOG_OVERLAP]}
+    return dict(changes), state
+
+
+def prune_index_log():
+    """Remove entries old enough for all hosts to have applied them."""
+    IndexLogEntry.objects.filter(
+        created__lt=timezone.now() - LOG_RETENTION).delete()
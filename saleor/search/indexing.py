@@ -0,0 +1,272 @@
+"""Keep Elasticsearch indexes in sync through a queue of changed objects.
+
+Saving an object only records its model and primary key, documents are
+prepared and sent with bulk requests by `flush_index_changes_task`.
+"""
+import logging
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django_elasticsearch_dsl.apps import DEDConfig
+from django_elasticsearch_dsl.registries import registry
+from django_elasticsearch_dsl.signals import BaseSignalProcessor
+from elasticsearch.helpers import BulkIndexError, bulk
+from elasticsearch_dsl.connections import connections
+
+from .models import IndexChange
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SCHEDULED_KEY = 'search:index-flush-scheduled'
+# a flush lost along with its worker stops blocking new ones after that time
+FLUSH_SCHEDULED_TIMEOUT = 300
+# name of the index being built to replace the one behind an alias
+REINDEX_TARGET_KEY = 'search:reindex-target:%s'
+
+
+class IndexingRejected(Exception):
+    """Elasticsearch is overloaded and documents have to be sent later."""
+
+
+def is_indexed(model):
+    if not DEDConfig.autosync_enabled():
+        return False
+    return any(
+        not doc_class._doc_type.ignore_signals
+        for doc_class in registry.get_documents([model]))
+
+
+def schedule_index_flush():
+    """Start a flush of the queue unless one is already waiting to run.
+
+    Changes committed before the scheduled flush starts are sent along with
+    it, so the number of queued tasks doesn't grow with the number of saves.
+    """
+    # pylint: disable=cyclic-import
+    from django.conf import settings
+    from .tasks import flush_index_changes_task
+    if cache.add(FLUSH_SCHEDULED_KEY, True, timeout=FLUSH_SCHEDULED_TIMEOUT):
+        flush_index_changes_task.apply_async(
+            countdown=settings.SEARCH_INDEX_FLUSH_DELAY)
+
+
+def _insert_index_changes(keys):
+    """Insert `(model, object_id)` pairs not queued yet."""
+    now = timezone.now()
+    query = (
+        'INSERT INTO %s (model, object_id, created) VALUES (%%s, %%s, %%s) '
+        'ON CONFLICT (model, object_id) DO NOTHING' % (
+            connection.ops.quote_name(IndexChange._meta.db_table), ))
+    with connection.cursor() as cursor:
+        cursor.executemany(query, [(label, pk, now) for label, pk in keys])
+
+
+def queue_index_changes(model, pks):
+    """Queue objects of a model for being re-indexed after the commit.
+
+    Changes are removed from the queue before being sent, so objects queued
+    again while being flushed are sent by the next flush.
+    """
+    if not pks:
+        return
+    label = model._meta.label
+    _insert_index_changes([(label, pk) for pk in pks])
+    transaction.on_commit(schedule_index_flush)
+
+
+class QueuedSignalProcessor(BaseSignalProcessor):
+    """Queue saved and deleted objects instead of indexing them at once.
+
+    Enabled with the `ELASTICSEARCH_DSL_SIGNAL_PROCESSOR` setting.
+    """
+
+    def setup(self):
+        post_save.connect(self.handle_save)
+        post_delete.connect(self.handle_delete)
+
+    def teardown(self):
+        post_save.disconnect(self.handle_save)
+        post_delete.disconnect(self.handle_delete)
+
+    def handle_save(self, sender, instance, **kwargs):
+        if is_indexed(sender):
+            queue_index_changes(sender, [instance.pk])
+
+    def handle_delete(self, sender, instance, **kwargs):
+        # documents of objects missing from the database are deleted
+        self.handle_save(sender, instance)
+
+
+def get_index_names(index):
+    """Return names of indexes documents of an index are written to.
+
+    Indexes being rebuilt by `reindex_search` receive changes as well, so
+    they don't miss anything saved while they are populated.
+    """
+    target = cache.get(REINDEX_TARGET_KEY % (index, ))
+    if target:
+        return [index, target]
+    return [index]
+
+
+def get_index_actions(changes):
+    """Yield `(change, action)` pairs of bulk actions updating documents."""
+    pks_by_model = defaultdict(set)
+    for change in changes:
+        pks_by_model[change.model].add(change.object_id)
+    changes_by_key = {
+        (change.model, change.object_id): change for change in changes}
+    for label, pks in pks_by_model.items():
+        try:
+            model = apps.get_model(label)
+        except LookupError:
+            continue
+        for doc_class in registry.get_documents([model]):
+            document = doc_class()
+            instances = document.get_queryset().in_bulk(pks)
+            for pk in sorted(pks):
+                instance = instances.get(pk)
+                if instance is not None:
+                    action = document._prepare_action(instance, 'index')
+                else:
+                    action = {
+                        '_op_type': 'delete',
+                        '_index': str(doc_class._doc_type.index),
+                        '_type': doc_class._doc_type.mapping.doc_type,
+                        '_id': pk}
+                for index in get_index_names(action['_index']):
+                    yield changes_by_key[label, pk], dict(action, _index=index)
+
+
+def _is_retryable(status):
+    return status == 429 or status >= 500
+
+
+def _requeue_index_changes(changes):
+    _insert_index_changes(
+        [(change.model, change.object_id) for change in changes])
+
+
+def _send_index_changes(changes):
+    """Send changes in a bulk request, return the ones to send again."""
+    actions = []
+    action_changes = {}
+    for change, action in get_index_actions(changes):
+        actions.append(action)
+        action_changes[action['_type'], str(action['_id'])] = change
+    dummy_success, errors = bulk(
+        connections.get_connection(), actions, raise_on_error=False,
+        chunk_size=max(len(actions), 1),
+        refresh=DEDConfig.auto_refresh_enabled())
+    rejected = {}
+    for error in errors:
+        for op_type, result in error.items():
+            status = result.get('status', 500)
+            if op_type == 'delete' and status == 404:
+                continue
+            change = action_changes[result['_type'], result['_id']]
+            if _is_retryable(status):
+                rejected[change.pk] = change
+            else:
+                logger.error(
+                    'Could not index %s: %s', change, result.get('error'))
+    return list(rejected.values())
+
+
+def flush_index_changes(batch_size):
+    """Send a batch of queued changes to Elasticsearch in a bulk request.
+
+    A batch is taken off the queue in a short transaction before it's sent,
+    so workers flush the queue in parallel without sending the same changes
+    twice and saving objects never waits for Elasticsearch. Returns the
+    number of sent changes. Changes that failed to send or were rejected by
+    an overloaded cluster are queued again and `IndexingRejected` is raised
+    to send them later.
+    """
+    with transaction.atomic():
+        changes = list(
+            IndexChange.objects.select_for_update(
+                skip_locked=True).order_by('pk')[:batch_size])
+        IndexChange.objects.filter(
+            pk__in=[change.pk for change in changes]).delete()
+    if not changes:
+        return 0
+    try:
+        rejected = _send_index_changes(changes)
+    except Exception:
+        _requeue_index_changes(changes)
+        raise
+    if rejected:
+        _requeue_index_changes(rejected)
+        raise IndexingRejected(
+            '%d changes were rejected by Elasticsearch' % (len(rejected), ))
+    return len(changes)
+
+
+def create_index_version(index):
+    """Create an empty copy of an index named after the current time.
+
+    Returns the name of the new index. Refreshing is disabled until
+    `finish_index_version` is called, which speeds up bulk loading.
+    """
+    name = '%s-%s' % (index, timezone.now().strftime('%Y%m%d%H%M%S%f'))
+    index_version = index.clone(name)
+    index_version.settings(refresh_interval='-1')
+    index_version.create()
+    cache.set(REINDEX_TARGET_KEY % (index, ), name, timeout=None)
+    return name
+
+
+def populate_index_version(document, name, instances):
+    """Add documents of objects to an index built by `reindex_search`.
+
+    Documents written in the meantime by `flush_index_changes` are newer
+    and kept as they are. Returns the number of indexed objects.
+    """
+    actions = [
+        dict(document._prepare_action(instance, 'create'), _index=name)
+        for instance in instances]
+    dummy_success, errors = bulk(
+        connections.get_connection(), actions, raise_on_error=False,
+        chunk_size=max(len(actions), 1))
+    errors = [
+        error for error in errors if error['create'].get('status') != 409]
+    if errors:
+        raise BulkIndexError(
+            '%d document(s) failed to index.' % (len(errors), ), errors)
+    return len(actions)
+
+
+def finish_index_version(index, name):
+    """Point the alias named after an index to its new version.
+
+    Returns names of replaced indexes. Indexes created before aliases were
+    used are named like the alias and have to be removed beforehand, which
+    is the only time the index is unavailable.
+    """
+    client = connections.get_connection()
+    client.indices.put_settings(
+        index=name, body={'index': {'refresh_interval': None}})
+    client.indices.refresh(index=name)
+    alias = str(index)
+    actions = [{'add': {'index': name, 'alias': alias}}]
+    old_names = []
+    if client.indices.exists_alias(name=alias):
+        old_names = list(client.indices.get_alias(name=alias))
+        actions = [
+            {'remove': {'index': old_name, 'alias': alias}}
+            for old_name in old_names] + actions
+    elif client.indices.exists(index=alias):
+        client.indices.delete(index=alias)
+    client.indices.update_aliases(body={'actions': actions})
+    cache.delete(REINDEX_TARGET_KEY % (alias, ))
+    return old_names
+
+
+def abandon_index_version(index, name):
+    cache.delete(REINDEX_TARGET_KEY % (index, ))
+    connections.get_connection().indices.delete(index=name, ignore=404)
@@ -0,0 +1,130 @@
+from ..account.models import User
+from ..order.models import Order
+from ..product.models import Product
+from .backends.local_index import (
+    Field, edge_ngram_tokens, email_tokens, standard_tokens)
+
+
+class LocalDocument:
+    """Describe how objects of a model are indexed by the local backend.
+
+    Every field is filled by a `prepare_<field>` method or the model
+    attribute of the same name. `filters` name boolean attributes stored
+    along with documents to filter results by.
+    """
+
+    name = None
+    model = None
+    fields = {}
+    filters = []
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def prepare(self, instance):
+        data = {}
+        for field_name in self.fields:
+            prepare = getattr(self, 'prepare_%s' % (field_name, ), None)
+            data[field_name] = (
+                prepare(instance) if prepare
+                else getattr(instance, field_name))
+        return data
+
+    def get_flags(self, instance):
+        flags = 0
+        for bit, filter_name in enumerate(self.filters):
+            if getattr(instance, filter_name):
+                flags |= 1 << bit
+        return flags
+
+    def get_filter_mask(self, filters):
+        """Return `(mask, expected)` flags of documents matching filters."""
+        mask = expected = 0
+        for filter_name, value in filters.items():
+            bit = 1 << self.filters.index(filter_name)
+            mask |= bit
+            if value:
+                expected |= bit
+        return mask, expected
+
+    def get_changed_pks(self, sender, instance):
+        """Return primary keys of documents affected by a saved object."""
+        if sender is self.model:
+            return [instance.pk]
+        return []
+
+
+class ProductDocument(LocalDocument):
+    name = 'products'
+    model = Product
+    fields = {
+        'title': Field(edge_ngram_tokens),
+        'name': Field(standard_tokens),
+        'description': Field(standard_tokens)}
+    filters = ['is_published']
+
+    def prepare_title(self, instance):
+        return instance.name
+
+
+class UserDocument(LocalDocument):
+    name = 'users'
+    model = User
+    fields = {
+        'user': Field(email_tokens),
+        'email': Field(standard_tokens),
+        'first_name': Field(standard_tokens),
+        'last_name': Field(standard_tokens)}
+
+    def get_queryset(self):
+        return User.objects.select_related('default_billing_address')
+
+    def prepare_user(self, instance):
+        return instance.email
+
+    def prepare_first_name(self, instance):
+        address = instance.default_billing_address
+        if address:
+            return address.first_name
+        return None
+
+    def prepare_last_name(self, instance):
+        address = instance.default_billing_address
+        if address:
+            return address.last_name
+        return None
+
+    def get_changed_pks(self, sender, instance):
+        if sender._meta.label == 'account.Address':
+            # users of a deleted address are remembered before its removal
+            user_ids = getattr(instance, '_search_user_ids', None)
+            if user_ids is not None:
+                return user_ids
+            return list(User.objects.filter(
+                default_billing_address=instance).values_list(
+                    'pk', flat=True))
+        return super().get_changed_pks(sender, instance)
+
+
+class OrderDocument(LocalDocument):
+    name = 'orders'
+    model = Order
+    fields = {
+        'user': Field(email_tokens),
+        'discount_name': Field(standard_tokens)}
+
+    def get_queryset(self):
+        return Order.objects.select_related('user')
+
+    def prepare_user(self, instance):
+        if instance.user:
+            return instance.user.email
+        return instance.user_email
+
+    def get_changed_pks(self, sender, instance):
+        if sender is User:
+            return list(instance.orders.values_list('pk', flat=True))
+        return super().get_changed_pks(sender, instance)
+
+
+DOCUMENTS = [ProductDocument(), UserDocument(), OrderDocument()]
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django_elasticsearch_dsl.registries import registry
+from elasticsearch_dsl.connections import connections
+
+from ...indexing import (
+    abandon_index_version, create_index_version, finish_index_version,
+    populate_index_version)
+
+
+def index_chunk(document, name, start, end):
+    try:
+        return populate_index_version(
+            document, name,
+            document.get_queryset().filter(pk__gte=start, pk__lt=end))
+    finally:
+        # every worker thread opens its own connection
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild Elasticsearch indexes in the background and switch to them '
+        'once they are complete')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of chunks indexed in parallel')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of objects sent in a single bulk request')
+        parser.add_argument(
+            '--keep-old', action='store_true',
+            help='Keep replaced indexes instead of deleting them')
+
+    def handle(self, *args, **options):
+        if not settings.ES_URL:
+            raise CommandError('Elasticsearch is not configured')
+        for index in registry.get_indices():
+            name = create_index_version(index)
+            self.stdout.write('Building %s as %s' % (index, name))
+            try:
+                for doc_class in registry.get_documents():
+                    if str(doc_class._doc_type.index) == str(index):
+                        self.populate(
+                            doc_class(), name, options['workers'],
+                            options['chunk_size'])
+                old_names = finish_index_version(index, name)
+            except BaseException:
+                abandon_index_version(index, name)
+                raise
+            if old_names and not options['keep_old']:
+                connections.get_connection().indices.delete(
+                    index=','.join(old_names), ignore=404)
+            self.stdout.write('Switched %s to %s' % (index, name))
+
+    def populate(self, document, name, workers, chunk_size):
+        queryset = document.get_queryset().order_by()
+        total = queryset.count()
+        max_pk = queryset.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        doc_type = document._doc_type.mapping.doc_type
+        indexed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    index_chunk, document, name, start, start + chunk_size)
+                for start in range(0, max_pk + 1, chunk_size)]
+            for future in as_completed(futures):
+                indexed += future.result()
+                self.stdout.write('%s: %d/%d (%d%%)' % (
+                    doc_type, indexed, total,
+                    100 * indexed // total if total else 100))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from ...backends.local_index import get_local_index, rebuild_local_index
+from ...local_documents import DOCUMENTS
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild indexes of products, users and orders of the local search '
+        'kept by this host')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Number of objects loaded from the database at once')
+
+    def handle(self, *args, **options):
+        for document in DOCUMENTS:
+            rebuild_local_index(document, batch_size=options['batch_size'])
+            self.stdout.write(
+                'Indexed %d %s' % (
+                    get_local_index(document).document_count,
+                    document.name))
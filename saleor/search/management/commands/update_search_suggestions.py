@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...suggestions import get_suggestion_index, rebuild_suggestion_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the prefix index of search suggestions of this host, run '
+        'it periodically on every host to rank suggestions by current '
+        'popularity')
+
+    def handle(self, *args, **options):
+        rebuild_suggestion_index()
+        self.stdout.write(
+            'Stored %d suggestion entries in %s' % (
+                len(get_suggestion_index()),
+                settings.SEARCH_SUGGESTIONS_PATH))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from ....account.models import User
+from ....order.models import Order
+from ....product.models import Product
+from ...vectors import (
+    get_order_search_vector, get_product_search_vector, get_user_search_vector,
+    update_search_vectors)
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill stored search vectors of products, orders and users used by '
+        'the PostgreSQL search backend')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of objects updated in a single query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, search_vector in [
+                (Product, get_product_search_vector()),
+                (User, get_user_search_vector()),
+                (Order, get_order_search_vector())]:
+            self.update_model(model, search_vector, batch_size)
+
+    def update_model(self, model, search_vector, batch_size):
+        queryset = model._default_manager.order_by()
+        max_pk = queryset.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        for start in range(0, max_pk + 1, batch_size):
+            update_search_vectors(
+                queryset.filter(pk__gte=start, pk__lt=start + batch_size),
+                search_vector)
+        self.stdout.write(
+            'Updated search vectors of %s' % (
+                model._meta.verbose_name_plural, ))
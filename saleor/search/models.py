@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class IndexChange(models.Model):
+    """An object whose Elasticsearch documents wait for being updated.
+
+    Changes of an object are queued once, no matter how many times it is
+    saved before the queue is flushed.
+    """
+
+    model = models.CharField(max_length=128)
+    object_id = models.PositiveIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = (('model', 'object_id'), )
+
+    def __str__(self):
+        return '%s:%s' % (self.model, self.object_id)
+
+
+class IndexLogEntry(models.Model):
+    """An object to re-index in the file-based index every host keeps.
+
+    Entries are read by all hosts, each of them applies the ones logged
+    since it last updated its copy of the index.
+    """
+
+    index = models.CharField(max_length=128)
+    kind = models.CharField(max_length=128)
+    object_id = models.PositiveIntegerField()
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return '%s:%s:%s' % (self.index, self.kind, self.object_id)
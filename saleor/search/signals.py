@@ -0,0 +1,89 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .backends.local_index import get_log_index_name
+from .index_log import log_index_changes
+from .local_documents import DOCUMENTS
+from .suggestions import CATEGORY, COLLECTION, PRODUCT, SUGGESTIONS_INDEX
+from .vectors import (
+    update_addresses_search_vectors, update_orders_search_vectors,
+    update_products_search_vectors, update_users_search_vectors)
+
+PRODUCT_SEARCH_FIELDS = {'name', 'description'}
+ORDER_SEARCH_FIELDS = {'user'}
+USER_SEARCH_FIELDS = {
+    'email', 'default_billing_address', 'default_shipping_address'}
+LOCAL_BACKEND = 'saleor.search.backends.local'
+LOCAL_INDEX_SOURCES = [
+    'product.Product', 'account.User', 'account.Address', 'order.Order']
+# models named in search suggestions, mapped to the suggested kind and the
+# field holding primary key of the suggested object
+SUGGESTION_SOURCES = {
+    'product.Product': (PRODUCT, 'pk'),
+    'product.ProductTranslation': (PRODUCT, 'product_id'),
+    'product.Category': (CATEGORY, 'pk'),
+    'product.CategoryTranslation': (CATEGORY, 'category_id'),
+    'product.Collection': (COLLECTION, 'pk'),
+    'product.CollectionTranslation': (COLLECTION, 'collection_id')}
+
+
+def _search_fields_changed(update_fields, search_fields):
+    return not update_fields or bool(set(update_fields) & search_fields)
+
+
+def product_saved(sender, instance, update_fields=None, **kwargs):
+    if _search_fields_changed(update_fields, PRODUCT_SEARCH_FIELDS):
+        update_products_search_vectors(
+            sender.objects.filter(pk=instance.pk))
+
+
+def order_saved(sender, instance, update_fields=None, **kwargs):
+    if _search_fields_changed(update_fields, ORDER_SEARCH_FIELDS):
+        update_orders_search_vectors(sender.objects.filter(pk=instance.pk))
+
+
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if _search_fields_changed(update_fields, USER_SEARCH_FIELDS):
+        update_users_search_vectors(sender.objects.filter(pk=instance.pk))
+
+
+def address_saved(sender, instance, **kwargs):
+    update_addresses_search_vectors(sender.objects.filter(pk=instance.pk))
+
+
+def address_deleting(sender, instance, **kwargs):
+    """Remember users of an address, they lose it without being saved."""
+    # pylint: disable=cyclic-import
+    from ..account.models import User
+    instance._search_user_ids = list(User.objects.filter(
+        Q(default_billing_address=instance) |
+        Q(default_shipping_address=instance)).values_list('pk', flat=True))
+
+
+def address_deleted(sender, instance, **kwargs):
+    # pylint: disable=cyclic-import
+    from ..account.models import User
+    user_ids = getattr(instance, '_search_user_ids', None)
+    if user_ids:
+        update_users_search_vectors(User.objects.filter(pk__in=user_ids))
+
+
+def suggestion_source_changed(sender, instance, **kwargs):
+    kind, field = SUGGESTION_SOURCES[sender._meta.label]
+    pk = getattr(instance, field)
+    transaction.on_commit(
+        lambda: log_index_changes(SUGGESTIONS_INDEX, kind, [pk]))
+
+
+def local_index_source_changed(sender, instance, **kwargs):
+    if settings.SEARCH_BACKEND != LOCAL_BACKEND:
+        return
+    for document in DOCUMENTS:
+        pks = document.get_changed_pks(sender, instance)
+        if pks:
+            transaction.on_commit(partial(
+                log_index_changes, get_log_index_name(document),
+                document.name, pks))
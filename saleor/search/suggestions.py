@@ -0,0 +1,353 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from .index_log import (
+    IndexFileLock, get_log_version, get_logged_changes,
+    invalidate_logged_index, new_log_state, read_log_state, write_log_state)
+
+# name of the index in the change log
+SUGGESTIONS_INDEX = 'suggestions'
+MAGIC = b'SALEORSG'
+HEADER = struct.Struct('<8sI')
+OFFSET = struct.Struct('<I')
+RECORD = struct.Struct('<IHH')
+DEFAULT_LANGUAGE = ''
+
+PRODUCT = 'product'
+CATEGORY = 'category'
+COLLECTION = 'collection'
+
+_suggestion_index_lock = threading.Lock()
+_suggestion_index = None
+
+
+def normalize(text):
+    """Return text in the form names and prefixes are compared in.
+
+    Accents and punctuation are dropped and letters case-folded, so
+    "Café-Crème" is found by typing "cafe cr".
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(
+        char if char.isalnum() else ' ' for char in text
+        if not unicodedata.combining(char))
+    return ' '.join(text.casefold().split())
+
+
+def get_entries(kind, pk, url, popularity, names):
+    """Return index entries of an object named in multiple languages.
+
+    `names` maps language codes to names, the untranslated name is stored
+    under `DEFAULT_LANGUAGE`. Every word of a name starts an entry, so names
+    are also found by their later words.
+    """
+    entries = []
+    for language, name in names.items():
+        words = normalize(name).split()
+        for position in range(len(words)):
+            key = '%s\0%s' % (language, ' '.join(words[position:]))
+            entries.append((key, popularity, (kind, pk, name, url)))
+    return entries
+
+
+class SuggestionIndex:
+    """A sorted array of name prefixes looked up with binary search.
+
+    Entries are stored in a file as records sorted by their keys and an
+    array of record offsets. The file is memory-mapped, so all processes of
+    a host share a single copy of it in the page cache.
+    """
+
+    def __init__(self, path, version=None):
+        self.version = version
+        with open(path, 'rb') as index_file:
+            self._data = mmap.mmap(
+                index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count = HEADER.unpack_from(self._data)
+        if magic != MAGIC:
+            raise ValueError('%s is not a suggestion index' % (path, ))
+
+    def __len__(self):
+        return self._count
+
+    def _get_offset(self, position):
+        return OFFSET.unpack_from(
+            self._data, HEADER.size + position * OFFSET.size)[0]
+
+    def _get_popularity(self, position):
+        return RECORD.unpack_from(self._data, self._get_offset(position))[0]
+
+    def _get_key(self, position):
+        offset = self._get_offset(position)
+        dummy_popularity, key_size, dummy_payload_size = RECORD.unpack_from(
+            self._data, offset)
+        start = offset + RECORD.size
+        return self._data[start:start + key_size]
+
+    def _get_record(self, position):
+        offset = self._get_offset(position)
+        popularity, key_size, payload_size = RECORD.unpack_from(
+            self._data, offset)
+        start = offset + RECORD.size
+        key = self._data[start:start + key_size].decode()
+        start += key_size
+        payload = json.loads(self._data[start:start + payload_size].decode())
+        return key, popularity, tuple(payload)
+
+    def _find(self, prefix):
+        """Return position of the first key not lower than the prefix."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_key(middle) < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self._get_record(position)
+
+    def lookup(self, language, phrase, limit=None):
+        """Return `(popularity, payload)` of entries starting with phrase.
+
+        Entries are returned from the most popular ones, an object found by
+        multiple words only once. `limit` caps the number of objects.
+        """
+        prefix = ('%s\0%s' % (language, normalize(phrase))).encode()
+        start = self._find(prefix)
+        # UTF-8 never contains 0xff, so it sorts after all matching keys
+        end = self._find(prefix + b'\xff')
+        # only popularities are read to rank all matches, records of the
+        # most popular ones are decoded
+        positions = sorted(
+            range(start, end), key=self._get_popularity, reverse=True)
+        found = set()
+        for position in positions:
+            if limit is not None and len(found) >= limit:
+                break
+            dummy_key, popularity, payload = self._get_record(position)
+            kind, pk = payload[:2]
+            if (kind, pk) not in found:
+                found.add((kind, pk))
+                yield popularity, payload
+
+
+def write_suggestion_index(entries, path):
+    """Store entries sorted by their keys, replacing the file atomically."""
+    records = sorted(
+        (key.encode(), popularity, json.dumps(payload).encode())
+        for key, popularity, payload in entries)
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile(
+            dir=directory, delete=False) as index_file:
+        index_file.write(HEADER.pack(MAGIC, len(records)))
+        offset = HEADER.size + len(records) * OFFSET.size
+        for key, dummy_popularity, payload in records:
+            index_file.write(OFFSET.pack(offset))
+            offset += RECORD.size + len(key) + len(payload)
+        for key, popularity, payload in records:
+            index_file.write(
+                RECORD.pack(min(popularity, 2 ** 32 - 1), len(key),
+                            len(payload)))
+            index_file.write(key)
+            index_file.write(payload)
+    os.chmod(index_file.name, 0o644)
+    os.replace(index_file.name, path)
+
+
+def _get_names(obj, translations):
+    names = {DEFAULT_LANGUAGE: obj.name}
+    for translation in translations:
+        if translation.name:
+            names[translation.language_code] = translation.name
+    return names
+
+
+def get_product_entries(product_ids=None):
+    # pylint: disable=cyclic-import
+    from ..order.models import OrderLine
+    from ..product.models import Product
+    products = Product.objects.available_products().prefetch_related(
+        'translations')
+    sales = OrderLine.objects.values('variant__product_id')
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+        sales = sales.filter(variant__product_id__in=product_ids)
+    sales = dict(sales.annotate(sold=Sum('quantity')).values_list(
+        'variant__product_id', 'sold'))
+    entries = []
+    for product in products:
+        entries.extend(get_entries(
+            PRODUCT, product.pk, product.get_absolute_url(),
+            sales.get(product.pk) or 0,
+            _get_names(product, product.translations.all())))
+    return entries
+
+
+def get_category_entries(category_ids=None):
+    # pylint: disable=cyclic-import
+    from ..product.models import Category
+    categories = Category.objects.annotate(
+        popularity=Count('products')).prefetch_related('translations')
+    if category_ids is not None:
+        categories = categories.filter(pk__in=category_ids)
+    entries = []
+    for category in categories:
+        entries.extend(get_entries(
+            CATEGORY, category.pk, category.get_absolute_url(),
+            category.popularity,
+            _get_names(category, category.translations.all())))
+    return entries
+
+
+def get_collection_entries(collection_ids=None):
+    # pylint: disable=cyclic-import
+    from ..product.models import Collection
+    collections = Collection.objects.public().annotate(
+        popularity=Count('products')).prefetch_related('translations')
+    if collection_ids is not None:
+        collections = collections.filter(pk__in=collection_ids)
+    entries = []
+    for collection in collections:
+        entries.extend(get_entries(
+            COLLECTION, collection.pk, collection.get_absolute_url(),
+            collection.popularity,
+            _get_names(collection, collection.translations.all())))
+    return entries
+
+
+ENTRY_GETTERS = {
+    PRODUCT: get_product_entries,
+    CATEGORY: get_category_entries,
+    COLLECTION: get_collection_entries}
+
+
+def get_lock_path(path):
+    return path + '.lock'
+
+
+def get_log_state_path(path):
+    return path + '.log'
+
+
+def invalidate_suggestion_index():
+    """Make processes of all hosts check their indexes on next use."""
+    invalidate_logged_index(SUGGESTIONS_INDEX)
+
+
+def _write_all_entries(path):
+    state = new_log_state()
+    entries = []
+    for get_kind_entries in ENTRY_GETTERS.values():
+        entries.extend(get_kind_entries())
+    write_suggestion_index(entries, path)
+    write_log_state(get_log_state_path(path), state)
+
+
+def _write_changed_entries(path, changes):
+    entries = [
+        entry for entry in SuggestionIndex(path)
+        if entry[2][1] not in changes.get(entry[2][0], ())]
+    for kind, pks in changes.items():
+        entries.extend(ENTRY_GETTERS[kind](pks))
+    write_suggestion_index(entries, path)
+
+
+def rebuild_suggestion_index():
+    """Index all products, categories and collections from scratch."""
+    path = settings.SEARCH_SUGGESTIONS_PATH
+    with IndexFileLock(get_lock_path(path)):
+        _write_all_entries(path)
+    invalidate_suggestion_index()
+
+
+def update_suggestion_index(kind, pks):
+    """Re-index objects of a kind with given primary keys.
+
+    Entries of other objects are copied from the current index as they are,
+    removed and unpublished objects lose their entries. Only the index of
+    the current host is updated, saved objects are logged with
+    `log_index_changes` to update indexes of all hosts.
+    """
+    path = settings.SEARCH_SUGGESTIONS_PATH
+    if not os.path.exists(path):
+        rebuild_suggestion_index()
+        return
+    with IndexFileLock(get_lock_path(path)):
+        _write_changed_entries(path, {kind: set(pks)})
+    invalidate_suggestion_index()
+
+
+def apply_logged_suggestion_changes():
+    """Update the index of the host with changes logged by all hosts.
+
+    The index is built when missing and rebuilt once log entries it misses
+    are pruned.
+    """
+    path = settings.SEARCH_SUGGESTIONS_PATH
+    with IndexFileLock(get_lock_path(path)):
+        state = None
+        if os.path.exists(path):
+            state = read_log_state(get_log_state_path(path))
+        changes, state = get_logged_changes(SUGGESTIONS_INDEX, state)
+        if changes is None:
+            _write_all_entries(path)
+        elif changes:
+            _write_changed_entries(path, changes)
+            write_log_state(get_log_state_path(path), state)
+
+
+def get_suggestion_index():
+    """Return the `SuggestionIndex` shared by requests of the process.
+
+    Every host keeps its own index file, it's built on first use and
+    updated with logged changes once they are reported.
+    """
+    global _suggestion_index  # pylint: disable=global-statement
+    version = get_log_version(SUGGESTIONS_INDEX)
+    index = _suggestion_index
+    if index is None or index.version != version:
+        with _suggestion_index_lock:
+            index = _suggestion_index
+            if index is None or index.version != version:
+                apply_logged_suggestion_changes()
+                index = SuggestionIndex(
+                    settings.SEARCH_SUGGESTIONS_PATH, version=version)
+                _suggestion_index = index
+    return index
+
+
+def get_suggestions(phrase, language, limit=10):
+    """Return most popular objects with names starting with the phrase.
+
+    Names translated to the language take precedence over the untranslated
+    ones. Returns a list of dicts with kind, pk, name and url of objects.
+    """
+    if not normalize(phrase):
+        return []
+    index = get_suggestion_index()
+    languages = [DEFAULT_LANGUAGE]
+    if language:
+        languages.append(language)
+    matches = {}
+    for language_code in languages:
+        for popularity, payload in index.lookup(
+                language_code, phrase, limit=limit):
+            kind, pk, name, url = payload
+            matches[kind, pk] = {
+                'kind': kind, 'pk': pk, 'name': name, 'url': url,
+                'popularity': popularity}
+    suggestions = sorted(
+        matches.values(),
+        key=lambda match: (-match['popularity'], match['name']))
+    return suggestions[:limit]
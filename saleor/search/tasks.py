@@ -0,0 +1,35 @@
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from elasticsearch import ElasticsearchException
+
+from .index_log import prune_index_log
+from .indexing import (
+    FLUSH_SCHEDULED_KEY, FLUSH_SCHEDULED_TIMEOUT, IndexingRejected,
+    flush_index_changes)
+
+
+@shared_task(
+    autoretry_for=(ElasticsearchException, IndexingRejected),
+    retry_backoff=True, retry_backoff_max=600, max_retries=10)
+def flush_index_changes_task():
+    """Send queued search index changes to Elasticsearch.
+
+    While full batches are sent another task is started, so a backlog is
+    worked through by available workers one batch at a time. Failed flushes
+    are retried with growing delays and hold off new ones meanwhile.
+    """
+    cache.delete(FLUSH_SCHEDULED_KEY)
+    try:
+        sent = flush_index_changes(settings.SEARCH_INDEX_BATCH_SIZE)
+    except (ElasticsearchException, IndexingRejected):
+        cache.set(FLUSH_SCHEDULED_KEY, True, timeout=FLUSH_SCHEDULED_TIMEOUT)
+        raise
+    if sent == settings.SEARCH_INDEX_BATCH_SIZE:
+        flush_index_changes_task.delay()
+
+
+@shared_task
+def prune_index_log_task():
+    """Remove changes of file-based indexes applied by all hosts."""
+    prune_index_log()
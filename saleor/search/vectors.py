@@ -0,0 +1,64 @@
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models import OuterRef, Q, Subquery
+
+
+def get_product_search_vector():
+    return (
+        SearchVector('name', weight='A') +
+        SearchVector('description', weight='B'))
+
+
+def get_order_search_vector():
+    return (
+        SearchVector('user__email', weight='A') +
+        SearchVector(
+            'user__default_shipping_address__first_name', weight='B') +
+        SearchVector(
+            'user__default_shipping_address__last_name', weight='B'))
+
+
+def get_user_search_vector():
+    return (
+        SearchVector('email', weight='A') +
+        SearchVector('default_billing_address__first_name', weight='B') +
+        SearchVector('default_billing_address__last_name', weight='B'))
+
+
+def update_search_vectors(queryset, search_vector):
+    """Store search vectors of all objects in the queryset.
+
+    Vectors are computed by the database in a single `UPDATE`, they can
+    span related objects.
+    """
+    vectors = queryset.model._default_manager.filter(
+        pk=OuterRef('pk')).annotate(
+            new_search_vector=search_vector).values('new_search_vector')
+    queryset.update(search_vector=Subquery(
+        vectors[:1], output_field=SearchVectorField()))
+
+
+def update_products_search_vectors(products):
+    update_search_vectors(products, get_product_search_vector())
+
+
+def update_orders_search_vectors(orders):
+    update_search_vectors(orders, get_order_search_vector())
+
+
+def update_users_search_vectors(users):
+    """Store search vectors of users and orders placed by them."""
+    # pylint: disable=cyclic-import
+    from ..order.models import Order
+    update_search_vectors(users, get_user_search_vector())
+    update_orders_search_vectors(
+        Order.objects.filter(user__in=users.values('pk')))
+
+
+def update_addresses_search_vectors(addresses):
+    """Store search vectors of users and orders referring to addresses."""
+    # pylint: disable=cyclic-import
+    from ..account.models import User
+    address_ids = addresses.values('pk')
+    update_users_search_vectors(User.objects.filter(
+        Q(default_billing_address__in=address_ids) |
+        Q(default_shipping_address__in=address_ids)))
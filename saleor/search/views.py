@@ -1,28 +1,39 @@
 from django.conf import settings
-from django.core.paginator import InvalidPage, Paginator
-from django.http import Http404
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import render
+from django.utils.translation import get_language
 
 from ..product.utils import products_with_details
-from ..product.utils.availability import products_with_availability
+from ..product.utils.availability import price_products
 from .forms import SearchForm
+from .suggestions import get_suggestions
 
 
 def paginate_results(results, get_data, paginate_by=settings.PAGINATE_BY):
+    """Return a page of results fetching only the objects on that page.
+
+    The page is sliced before results are counted, so search backends can
+    return the number of results along with the page.
+    """
     paginator = Paginator(results, paginate_by)
-    page_number = get_data.get('page', 1)
     try:
-        page = paginator.page(page_number)
+        page_number = int(get_data.get('page', 1))
+    except (TypeError, ValueError):
+        raise Http404('No such page!')
+    object_list = []
+    if page_number > 0:
+        bottom = (page_number - 1) * paginate_by
+        object_list = results[bottom:bottom + paginate_by]
+    try:
+        paginator.validate_number(page_number)
     except InvalidPage:
         raise Http404('No such page!')
-    return page
+    return Page(object_list, page_number, paginator)
 
 
 def evaluate_search_query(form, request):
-    results = products_with_details(request.user) & form.search()
-    return products_with_availability(
-        results, discounts=request.discounts, taxes=request.taxes,
-        local_currency=request.currency)
+    return form.search(products_with_details(request.user))
 
 
 def search(request):
@@ -34,9 +45,23 @@ def search(request):
         results = evaluate_search_query(form, request)
     else:
         query, results = '', []
-    page = paginate_results(list(results), request.GET)
+    page = paginate_results(results, request.GET)
+    # only products on the page get priced
+    page.object_list = price_products(
+        page.object_list, discounts=request.discounts, taxes=request.taxes,
+        local_currency=request.currency)
     ctx = {
         'query': query,
         'results': page,
         'query_string': '?q=%s' % query}
     return render(request, 'search/results.html', ctx)
+
+
+def suggest(request):
+    if not settings.ENABLE_SEARCH:
+        raise Http404('No such page!')
+    suggestions = get_suggestions(request.GET.get('q', ''), get_language())
+    return JsonResponse({
+        'suggestions': [
+            {key: suggestion[key] for key in ['kind', 'name', 'url']}
+            for suggestion in suggestions]})
@@ -17,9 +17,13 @@ def get_brand_from_attributes(attributes):
     return brand
 
 
-def product_json_ld(product, attributes=None):
-    # type: (saleor.product.models.Product, saleor.product.utils.ProductAvailability, dict) -> dict  # noqa
-    """Generate JSON-LD data for product."""
+def product_json_ld(product, attributes=None, price_sheet=None):
+    # type: (saleor.product.models.Product, dict, saleor.product.utils.availability.ProductPriceSheet) -> dict  # noqa
+    """Generate JSON-LD data for product.
+
+    Offers are priced from the price sheet when one is given so they match
+    the prices displayed on the product page.
+    """
     data = {'@context': 'http://schema.org/',
             '@type': 'Product',
             'name': smart_text(product),
@@ -30,7 +34,10 @@ def product_json_ld(product, attributes=None):
             'offers': []}
 
     for variant in product.variants.all():
-        price = variant.get_price()
+        if price_sheet is not None:
+            price = price_sheet.get_variant_prices(variant).price
+        else:
+            price = variant.get_price()
         in_stock = True
         if not product.is_available() or not variant.is_in_stock():
             in_stock = False
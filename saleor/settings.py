@@ -1,9 +1,11 @@
 import ast
 import os.path
+import tempfile
 
 import dj_database_url
 import dj_email_url
 import django_cache_url
+from celery.schedules import crontab
 from django.contrib.messages import constants as messages
 from django.utils.translation import gettext_lazy as _, pgettext_lazy
 from django_prices.templatetags.prices_i18n import get_currency_fraction
@@ -201,18 +203,18 @@ INSTALLED_APPS = [
 
     # Local apps
     'saleor.account',
-    'saleor.discount',
-    'saleor.product',
+    'saleor.discount.DiscountAppConfig',
+    'saleor.product.ProductAppConfig',
     'saleor.checkout',
-    'saleor.core',
-    'saleor.graphql',
+    'saleor.core.CoreAppConfig',
+    'saleor.graphql.GraphQLAppConfig',
     'saleor.menu',
     'saleor.order.OrderAppConfig',
     'saleor.dashboard',
     'saleor.seo',
     'saleor.shipping',
-    'saleor.search',
-    'saleor.site',
+    'saleor.search.SearchAppConfig',
+    'saleor.site.SiteAppConfig',
     'saleor.data_feeds',
     'saleor.page',
 
@@ -362,6 +364,10 @@ MAX_CART_LINE_QUANTITY = int(os.environ.get('MAX_CART_LINE_QUANTITY', 50))
 PAGINATE_BY = 16
 DASHBOARD_PAGINATE_BY = 30
 DASHBOARD_SEARCH_LIMIT = 5
+DASHBOARD_SEARCH_TIMEOUT = float(
+    os.environ.get('DASHBOARD_SEARCH_TIMEOUT', 2))
+CONCURRENT_QUERIES_WORKERS = int(
+    os.environ.get('CONCURRENT_QUERIES_WORKERS', 8))
 
 bootstrap4 = {
     'set_placeholder': False,
@@ -442,7 +448,37 @@ ES_URL = (os.environ.get('ELASTICSEARCH_URL') or
 
 ENABLE_SEARCH = bool(ES_URL) or DB_SEARCH_ENABLED  # global search disabling
 
-SEARCH_BACKEND = 'saleor.search.backends.postgresql'
+# one of saleor.search.backends.postgresql, saleor.search.backends.local or
+# saleor.search.backends.elasticsearch, the latter is used when ES is set up
+SEARCH_BACKEND = os.environ.get(
+    'SEARCH_BACKEND', 'saleor.search.backends.postgresql')
+
+# index segments of the local search backend, every host keeps its own copy,
+# built when missing and updated with changes logged by all hosts
+LOCAL_SEARCH_PATH = os.environ.get(
+    'LOCAL_SEARCH_PATH',
+    os.path.join(tempfile.gettempdir(), 'saleor-search-index'))
+
+# prefix index of product, category and collection names, every host keeps
+# its own copy, built when missing and updated with changes logged by all
+# hosts
+SEARCH_SUGGESTIONS_PATH = os.environ.get(
+    'SEARCH_SUGGESTIONS_PATH',
+    os.path.join(tempfile.gettempdir(), 'saleor-search-suggestions.idx'))
+
+# saved objects are queued and their Elasticsearch documents sent in batches
+# by a Celery task, after collecting changes for the delay given in seconds
+SEARCH_INDEX_BATCH_SIZE = int(os.environ.get('SEARCH_INDEX_BATCH_SIZE', 500))
+SEARCH_INDEX_FLUSH_DELAY = float(
+    os.environ.get('SEARCH_INDEX_FLUSH_DELAY', 1))
+
+# saved products are queued and re-indexed for attribute filters in batches
+# by a Celery task, after collecting changes for the delay given in seconds
+PRODUCT_INDEX_QUEUE_UPDATES = get_bool_from_env(
+    'PRODUCT_INDEX_QUEUE_UPDATES', True)
+PRODUCT_INDEX_BATCH_SIZE = int(os.environ.get('PRODUCT_INDEX_BATCH_SIZE', 500))
+PRODUCT_INDEX_UPDATE_DELAY = float(
+    os.environ.get('PRODUCT_INDEX_UPDATE_DELAY', 1))
 
 if ES_URL:
     SEARCH_BACKEND = 'saleor.search.backends.elasticsearch'
@@ -450,6 +486,44 @@ if ES_URL:
     ELASTICSEARCH_DSL = {
         'default': {
             'hosts': ES_URL}}
+    ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = (
+        'saleor.search.indexing.QueuedSignalProcessor')
+
+# GraphQL queries are rejected before execution when their estimated cost or
+# nesting depth exceeds the limit for anonymous users, customers or staff
+GRAPHQL_QUERY_MAX_COST = {
+    'anonymous': int(os.environ.get('GRAPHQL_ANONYMOUS_MAX_COST', 50000)),
+    'customer': int(os.environ.get('GRAPHQL_CUSTOMER_MAX_COST', 50000)),
+    'staff': int(os.environ.get('GRAPHQL_STAFF_MAX_COST', 500000))}
+GRAPHQL_QUERY_MAX_DEPTH = {
+    'anonymous': int(os.environ.get('GRAPHQL_ANONYMOUS_MAX_DEPTH', 12)),
+    'customer': int(os.environ.get('GRAPHQL_CUSTOMER_MAX_DEPTH', 12)),
+    'staff': int(os.environ.get('GRAPHQL_STAFF_MAX_DEPTH', 20))}
+
+# parsed and validated GraphQL documents kept in memory by every process
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(
+    os.environ.get('GRAPHQL_DOCUMENT_CACHE_SIZE', 1000))
+# JSON list of GraphQL documents clients may refer to by their SHA-256
+# hashes, other documents are registered when first sent with their hashes
+GRAPHQL_PERSISTED_QUERIES_PATH = os.environ.get(
+    'GRAPHQL_PERSISTED_QUERIES_PATH')
+# only allow documents of the above file to be executed by non-staff users
+GRAPHQL_PERSISTED_QUERIES_ONLY = get_bool_from_env(
+    'GRAPHQL_PERSISTED_QUERIES_ONLY', False)
+# documents registered by clients are kept for this many seconds, documents
+# longer than the given number of characters are executed without being
+# registered
+GRAPHQL_PERSISTED_QUERY_TIMEOUT = int(
+    os.environ.get('GRAPHQL_PERSISTED_QUERY_TIMEOUT', 24 * 60 * 60))
+GRAPHQL_PERSISTED_QUERY_MAX_SIZE = int(
+    os.environ.get('GRAPHQL_PERSISTED_QUERY_MAX_SIZE', 20000))
+# responses to anonymous catalog queries are cached for this many seconds
+# unless objects they are built from change, 0 disables the cache
+GRAPHQL_RESPONSE_CACHE_TIMEOUT = int(
+    os.environ.get('GRAPHQL_RESPONSE_CACHE_TIMEOUT', 600))
+# clients may reuse cached responses for this many seconds before
+# revalidating them with their ETags
+GRAPHQL_RESPONSE_MAX_AGE = int(os.environ.get('GRAPHQL_RESPONSE_MAX_AGE', 0))
 
 AUTHENTICATION_BACKENDS = [
     'saleor.account.backends.facebook.CustomFacebookOAuth2',
@@ -484,6 +558,21 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_RESULT_BACKEND = 'django-db'
+CELERY_BEAT_SCHEDULE = {
+    'update-prices-of-starting-and-ending-sales': {
+        'task': (
+            'saleor.product.tasks.'
+            'update_prices_of_starting_and_ending_sales_task'),
+        'schedule': crontab(minute=0, hour=0)},
+    'flush-search-index-changes': {
+        'task': 'saleor.search.tasks.flush_index_changes_task',
+        'schedule': crontab()},
+    'prune-search-index-log': {
+        'task': 'saleor.search.tasks.prune_index_log_task',
+        'schedule': crontab(minute=30)},
+    'update-product-index': {
+        'task': 'saleor.product.tasks.update_product_index_task',
+        'schedule': crontab()}}
 
 # Impersonate module settings
 IMPERSONATE = {
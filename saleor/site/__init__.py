@@ -1,3 +1,19 @@
+from django.apps import AppConfig
+
+
+class SiteAppConfig(AppConfig):
+    name = 'saleor.site'
+
+    def ready(self):
+        from django.contrib.sites.models import Site
+        from django.db.models.signals import post_delete, post_save
+        from .models import SiteSettings
+        from .signals import site_settings_changed
+        for model in (Site, SiteSettings):
+            post_save.connect(site_settings_changed, sender=model)
+            post_delete.connect(site_settings_changed, sender=model)
+
+
 class AuthenticationBackends:
     GOOGLE = 'google-oauth2'
     FACEBOOK = 'facebook'
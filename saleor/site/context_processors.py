@@ -5,7 +5,9 @@ from django.db.models import prefetch_related_objects
 def site(request):
     # type: (django.http.request.HttpRequest) -> dict
     """Add site settings to the context under the 'site' key."""
-    site = get_current_site(request)
+    # the site assigned by the middleware is loaded for this request only,
+    # instances of the sites cache are shared with other requests
+    site = getattr(request, 'site', None) or get_current_site(request)
     prefetch_related_objects(
         [site], 'settings__translations')
     return {'site': site}
@@ -0,0 +1,9 @@
+from django.db import transaction
+
+from .snapshot import invalidate_site_settings
+
+
+def site_settings_changed(sender, **kwargs):
+    """Reload the site and its settings in all processes."""
+    invalidate_site_settings()
+    transaction.on_commit(invalidate_site_settings)
@@ -0,0 +1,81 @@
+"""Immutable, versioned snapshots of the current site's settings.
+
+Pricing code reads settings such as `include_taxes_in_prices` for every
+computed price. Instead of loading the `SiteSettings` instance each time,
+a snapshot is built once per process and replaced only when any process
+saves the site or its settings, which bumps a shared generation counter.
+While a request is being handled, the snapshot taken at its start is used
+without consulting the counter again.
+
+The snapshot only holds values used for pricing. Menus, translations and
+other settings are read from the `Site` loaded for each request.
+"""
+import threading
+from collections import namedtuple
+
+from django.contrib.sites.models import Site
+
+from ..core.utils.cache import get_cache_version, increment_cache_version
+
+SITE_SETTINGS_VERSION_KEY = 'site:settings-version'
+
+SiteSettingsSnapshot = namedtuple(
+    'SiteSettingsSnapshot', (
+        'version', 'site_id', 'include_taxes_in_prices',
+        'display_gross_prices', 'charge_taxes_on_shipping',
+        'track_inventory_by_default', 'default_weight_unit'))
+
+_lock = threading.Lock()
+_snapshot = None
+_active = threading.local()
+
+
+def create_snapshot(site_settings, version):
+    return SiteSettingsSnapshot(
+        version=version,
+        site_id=site_settings.site_id,
+        include_taxes_in_prices=site_settings.include_taxes_in_prices,
+        display_gross_prices=site_settings.display_gross_prices,
+        charge_taxes_on_shipping=site_settings.charge_taxes_on_shipping,
+        track_inventory_by_default=site_settings.track_inventory_by_default,
+        default_weight_unit=site_settings.default_weight_unit)
+
+
+def get_site_settings():
+    """Return a snapshot of the current site's settings.
+
+    Returns the snapshot of the request being handled by this thread if
+    there is one, otherwise checks the shared generation counter and
+    rebuilds the snapshot and the sites cache if settings have changed.
+    """
+    snapshot = getattr(_active, 'snapshot', None)
+    if snapshot is not None:
+        return snapshot
+    global _snapshot
+    version = get_cache_version(SITE_SETTINGS_VERSION_KEY)
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            Site.objects.clear_cache()
+            site = Site.objects.get_current()
+            snapshot = create_snapshot(site.settings, version)
+            _snapshot = snapshot
+    return snapshot
+
+
+def activate(snapshot):
+    """Use the given snapshot in this thread until `deactivate` is called."""
+    _active.snapshot = snapshot
+
+
+def deactivate():
+    _active.snapshot = None
+
+
+def invalidate_site_settings():
+    """Make all processes reload the site and its settings on next use."""
+    global _snapshot
+    deactivate()
+    _snapshot = None
+    Site.objects.clear_cache()
+    increment_cache_version(SITE_SETTINGS_VERSION_KEY)
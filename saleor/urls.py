@@ -15,6 +15,7 @@ from .core.urls import urlpatterns as core_urls
 from .dashboard.urls import urlpatterns as dashboard_urls
 from .data_feeds.urls import urlpatterns as feed_urls
 from .graphql.api import schema
+from .graphql.backend import SaleorGraphQLBackend
 from .graphql.file_upload.views import FileUploadGraphQLView
 from .order.urls import urlpatterns as order_urls
 from .page.urls import urlpatterns as page_urls
@@ -27,7 +28,8 @@ non_translatable_urlpatterns = [
     url(r'^dashboard/',
         include((dashboard_urls, 'dashboard'), namespace='dashboard')),
     url(r'^graphql/', csrf_exempt(FileUploadGraphQLView.as_view(
-        schema=schema, graphiql=settings.DEBUG)), name='api'),
+        schema=schema, graphiql=settings.DEBUG,
+        backend=SaleorGraphQLBackend())), name='api'),
     url(r'^sitemap\.xml$', sitemap, {'sitemaps': sitemaps},
         name='django.contrib.sitemaps.views.sitemap'),
     url(r'^i18n/$', set_language, name='set_language'),
@@ -4,18 +4,26 @@ from unittest.mock import Mock, patch
 import graphene
 import pytest
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.db.models import Q
 from django.http import HttpResponse
 from django.shortcuts import reverse
 from django.test import RequestFactory
+from graphql import parse
 from graphql_jwt.shortcuts import get_token
 from graphql_relay import to_global_id
 from tests.utils import get_graphql_content
 
+from saleor.graphql.api import schema
+from saleor.graphql.core.cost import get_query_cost
+from saleor.graphql.documents import (
+    DocumentCache, get_document_cache, get_document_hash)
 from saleor.graphql.middleware import jwt_middleware
 from saleor.graphql.product.types import Product
+from saleor.graphql.response_cache import TAG_VERSION_KEY, get_instance_tag
 from saleor.graphql.utils import (
     filter_by_query_param, generate_query_argument_description, get_nodes)
+from saleor.product.models import Collection
 
 
 def test_jwt_middleware(admin_user):
@@ -242,3 +250,298 @@ def test_generate_query_argument_description():
     expected = 'Supported filter parameters:\n* field_1\n* field_2\n'
     field_list = ['field_1', 'field_2']
     assert generate_query_argument_description(field_list) == expected
+
+
+NESTED_CONNECTIONS_QUERY = """
+query Categories($first: Int = 10) {
+    categories(first: $first) {
+        edges {
+            node {
+                ...CategoryName
+                products(first: 20) {
+                    edges {
+                        node {
+                            name
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+fragment CategoryName on Category {
+    name
+}
+"""
+
+
+def test_query_cost_multiplies_connection_sizes():
+    document_ast = parse(NESTED_CONNECTIONS_QUERY)
+    assert get_query_cost(schema, document_ast) == (10 + 10 * 20, 7)
+    assert get_query_cost(schema, document_ast, {'first': 2}) == (
+        2 + 2 * 20, 7)
+    document_ast = parse('{ categories { edges { node { name } } } }')
+    assert get_query_cost(schema, document_ast) == (100, 4)
+
+
+def test_query_cost_of_connections_to_few_objects():
+    document_ast = parse("""
+    {
+        products(first: 1) {
+            edges { node { variants { edges { node {
+                images { edges { node { url } } }
+            } } } } }
+        }
+    }
+    """)
+    assert get_query_cost(schema, document_ast) == (1 + 10 + 10 * 5, 10)
+
+
+def test_query_cost_limited_for_anonymous_users(
+        client, staff_api_client, category, settings):
+    settings.GRAPHQL_QUERY_MAX_COST = {
+        'anonymous': 100, 'customer': 100, 'staff': 1000}
+    data = json.dumps({'query': NESTED_CONNECTIONS_QUERY})
+    response = client.post(
+        reverse('api'), data, content_type='application/json')
+    assert response.status_code == 400
+    content = get_graphql_content(response)
+    assert content['errors'][0]['message'] == (
+        'Query cost of 210 exceeds the limit of 100.')
+    assert 'data' not in content
+
+    response = staff_api_client.post(
+        reverse('api'), {'query': NESTED_CONNECTIONS_QUERY})
+    content = get_graphql_content(response)
+    assert 'errors' not in content
+    categories = content['data']['categories']['edges']
+    assert categories[0]['node']['name'] == category.name
+
+
+def test_query_depth_limited(user_api_client, settings):
+    settings.GRAPHQL_QUERY_MAX_DEPTH = {
+        'anonymous': 5, 'customer': 5, 'staff': 10}
+    response = user_api_client.post(
+        reverse('api'), {'query': NESTED_CONNECTIONS_QUERY})
+    content = get_graphql_content(response)
+    assert content['errors'][0]['message'] == (
+        'Query depth of 7 exceeds the limit of 5.')
+
+
+def test_document_cache_drops_least_recently_used():
+    document_cache = DocumentCache(max_size=2)
+    document_cache.set('a', 'document a')
+    document_cache.set('b', 'document b')
+    assert document_cache.get('a') == 'document a'
+    document_cache.set('c', 'document c')
+    assert document_cache.get('b') is None
+    assert document_cache.get('c') == 'document c'
+    assert document_cache.get_stats() == {
+        'size': 2, 'max_size': 2, 'hits': 2, 'misses': 1,
+        'hit_ratio': 2 / 3}
+
+
+SHOP_QUERY = """
+query {
+    shop {
+        name
+    }
+}
+"""
+
+
+def get_persisted_query_data(query=None):
+    data = {'extensions': {'persistedQuery': {
+        'version': 1, 'sha256Hash': get_document_hash(SHOP_QUERY)}}}
+    if query:
+        data['query'] = query
+    return data
+
+
+def test_documents_parsed_once(client, site_settings):
+    document_cache = get_document_cache()
+    document_cache.clear()
+    data = json.dumps({'query': SHOP_QUERY})
+    for dummy_request in range(2):
+        response = client.post(
+            reverse('api'), data, content_type='application/json')
+        content = get_graphql_content(response)
+        assert content['data']['shop']['name'] == site_settings.site.name
+    assert document_cache.hits == 1
+    assert document_cache.misses == 1
+
+
+def test_persisted_query_registered(client, site_settings):
+    cache.clear()
+    get_document_cache().clear()
+    data = json.dumps(get_persisted_query_data())
+    response = client.post(
+        reverse('api'), data, content_type='application/json')
+    content = get_graphql_content(response)
+    assert content['errors'][0]['message'] == 'PersistedQueryNotFound'
+
+    response = client.post(
+        reverse('api'), json.dumps(get_persisted_query_data(SHOP_QUERY)),
+        content_type='application/json')
+    assert get_graphql_content(response)['data']['shop']
+
+    # documents are found after dropping them from the document cache
+    get_document_cache().clear()
+    response = client.get(reverse('api'), {
+        'extensions': json.dumps(get_persisted_query_data()['extensions'])})
+    content = get_graphql_content(response)
+    assert content['data']['shop']['name'] == site_settings.site.name
+
+
+def test_persisted_query_too_long_not_registered(
+        client, site_settings, settings):
+    settings.GRAPHQL_PERSISTED_QUERY_MAX_SIZE = len(SHOP_QUERY) - 1
+    cache.clear()
+    get_document_cache().clear()
+    response = client.post(
+        reverse('api'), json.dumps(get_persisted_query_data(SHOP_QUERY)),
+        content_type='application/json')
+    assert get_graphql_content(response)['data']['shop']
+
+    get_document_cache().clear()
+    response = client.post(
+        reverse('api'), json.dumps(get_persisted_query_data()),
+        content_type='application/json')
+    content = get_graphql_content(response)
+    assert content['errors'][0]['message'] == 'PersistedQueryNotFound'
+
+
+def test_persisted_query_hash_mismatch(client):
+    data = get_persisted_query_data('{ shop { domain { host } } }')
+    response = client.post(
+        reverse('api'), json.dumps(data), content_type='application/json')
+    content = get_graphql_content(response)
+    assert content['errors'][0]['message'] == (
+        'Provided sha256Hash does not match query.')
+
+
+def test_only_persisted_queries_allowed(
+        client, staff_api_client, site_settings, settings, tmpdir):
+    queries_file = tmpdir.join('queries.json')
+    queries_file.write(json.dumps([SHOP_QUERY]))
+    settings.GRAPHQL_PERSISTED_QUERIES_PATH = str(queries_file)
+    settings.GRAPHQL_PERSISTED_QUERIES_ONLY = True
+    response = client.post(
+        reverse('api'), json.dumps(get_persisted_query_data()),
+        content_type='application/json')
+    assert get_graphql_content(response)['data']['shop']
+
+    query = '{ shop { domain { host } } }'
+    response = client.post(
+        reverse('api'), json.dumps({'query': query}),
+        content_type='application/json')
+    content = get_graphql_content(response)
+    assert content['errors'][0]['message'] == (
+        'Only persisted queries are allowed.')
+
+    response = staff_api_client.post(reverse('api'), {'query': query})
+    content = get_graphql_content(response)
+    assert content['data']['shop']['domain']['host']
+
+
+PRODUCT_NAMES_QUERY = """
+query {
+    products(first: 10) {
+        edges {
+            node {
+                name
+            }
+        }
+    }
+}
+"""
+
+COLLECTION_NAMES_QUERY = """
+query {
+    collections(first: 10) {
+        edges {
+            node {
+                name
+            }
+        }
+    }
+}
+"""
+
+
+@pytest.fixture
+def response_cache_enabled(settings):
+    settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT = 600
+    cache.clear()
+
+
+def post_query(client, query):
+    response = client.post(
+        reverse('api'), json.dumps({'query': query}),
+        content_type='application/json')
+    names = [
+        edge['node']['name']
+        for edges in get_graphql_content(response)['data'].values()
+        for edge in edges['edges']]
+    return response, names
+
+
+def test_response_cache_serves_anonymous_queries(
+        client, product, response_cache_enabled):
+    response, names = post_query(client, PRODUCT_NAMES_QUERY)
+    assert names == [product.name]
+    assert 'private' in response['Cache-Control']
+    etag = response['ETag']
+
+    # updates bypassing signals are not noticed by the cache
+    type(product).objects.filter(pk=product.pk).update(name='Renamed')
+    response, names = post_query(client, PRODUCT_NAMES_QUERY)
+    assert names == [product.name]
+    assert response['ETag'] == etag
+
+    response = client.get(
+        reverse('api'), {'query': PRODUCT_NAMES_QUERY},
+        HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+def test_response_cache_bypassed_for_users(
+        user_api_client, product, response_cache_enabled):
+    response = user_api_client.post(
+        reverse('api'), {'query': PRODUCT_NAMES_QUERY})
+    assert get_graphql_content(response)['data']['products']
+    assert not response.has_header('ETag')
+
+
+def test_response_cache_misses_evicted_tag_versions(
+        client, product, response_cache_enabled):
+    post_query(client, PRODUCT_NAMES_QUERY)
+    type(product).objects.filter(pk=product.pk).update(name='Renamed')
+    tag = get_instance_tag(type(product), product.pk)
+    cache.delete(TAG_VERSION_KEY % (tag, ))
+    assert post_query(client, PRODUCT_NAMES_QUERY)[1] == ['Renamed']
+
+
+def test_response_cache_evicts_responses_of_saved_objects(
+        transactional_db, client, product, collection,
+        response_cache_enabled):
+    post_query(client, PRODUCT_NAMES_QUERY)
+    post_query(client, COLLECTION_NAMES_QUERY)
+
+    product.name = 'Renamed product'
+    product.save()
+    Collection.objects.filter(pk=collection.pk).update(
+        name='Renamed collection')
+    assert post_query(client, PRODUCT_NAMES_QUERY)[1] == ['Renamed product']
+    assert post_query(client, COLLECTION_NAMES_QUERY)[1] == [collection.name]
+
+
+def test_response_cache_evicts_lists_of_published_objects(
+        transactional_db, client, product, response_cache_enabled):
+    product.is_published = False
+    product.save()
+    assert post_query(client, PRODUCT_NAMES_QUERY)[1] == []
+
+    product.is_published = True
+    product.save()
+    assert post_query(client, PRODUCT_NAMES_QUERY)[1] == [product.name]
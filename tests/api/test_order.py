@@ -3,7 +3,9 @@ from unittest.mock import MagicMock, Mock
 
 import graphene
 import pytest
+from django.db import connection
 from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
 from tests.utils import get_graphql_content
 
 from saleor.account.models import Address
@@ -84,6 +86,36 @@ def test_order_query(admin_api_client, fulfilled_order):
     assert fulfillment_order == fulfillment
 
 
+def test_order_query_loads_only_selected_prices(
+        admin_api_client, order_with_lines):
+    order = order_with_lines
+    query = """
+    query {
+        orders(first: 1) {
+            edges {
+                node {
+                    total {
+                        gross {
+                            amount
+                        }
+                    }
+                }
+            }
+        }
+    }
+    """
+    with CaptureQueriesContext(connection) as queries:
+        response = admin_api_client.post(reverse('api'), {'query': query})
+    content = get_graphql_content(response)
+    order_data = content['data']['orders']['edges'][0]['node']
+    assert order_data['total']['gross']['amount'] == order.total.gross.amount
+    sql = [
+        captured['sql'] for captured in queries.captured_queries
+        if '"order_order"."total_gross"' in captured['sql']][-1]
+    assert '"order_order"."total_net"' in sql
+    assert '"order_order"."customer_note"' not in sql
+
+
 def test_non_staff_user_can_only_see_his_order(user_api_client, order):
     # FIXME: Remove client.login() when JWT authentication is re-enabled.
     user_api_client.login(username=order.user.email, password='password')
@@ -3,7 +3,9 @@ from unittest.mock import MagicMock, Mock
 
 import graphene
 import pytest
+from django.db import connection
 from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
 from django.utils.text import slugify
 from graphql_relay import to_global_id
 from prices import Money
@@ -13,7 +15,7 @@ from tests.utils import (
 from saleor.core import TaxRateType
 from saleor.graphql.product.utils import update_variants_names
 from saleor.product.models import (
-    Category, Collection, Product, ProductImage, ProductType)
+    Category, Collection, Product, ProductImage, ProductType, ProductVariant)
 
 from .utils import assert_no_permission, get_multipart_request_body
 
@@ -274,6 +276,47 @@ def test_filter_product_by_attributes(user_api_client, product):
     assert product_data['name'] == product.name
 
 
+def test_product_attribute_facets(user_api_client, product):
+    color = product.product_type.product_attributes.get()
+    red, blue = color.values.order_by('pk')
+    size = product.product_type.variant_attributes.get()
+    Product.objects.create(
+        name='Blue product', price=product.price,
+        product_type=product.product_type, category=product.category,
+        attributes={str(color.pk): str(blue.pk)})
+    query = '''
+    query {
+        products(attributes: ["%(filter_by)s"]) {
+            totalCount
+            facets {
+                attribute {
+                    slug
+                }
+                values {
+                    value {
+                        slug
+                    }
+                    count
+                }
+            }
+        }
+    }
+    ''' % {'filter_by': '%s:%s' % (color.slug, red.slug)}
+    response = user_api_client.post(reverse('api'), {'query': query})
+    content = get_graphql_content(response)
+    assert 'errors' not in content
+    data = content['data']['products']
+    assert data['totalCount'] == 1
+    facets = {
+        facet['attribute']['slug']: {
+            value['value']['slug']: value['count']
+            for value in facet['values']}
+        for facet in data['facets']}
+    # selected attribute keeps counts of its other values
+    assert facets[color.slug] == {red.slug: 1, blue.slug: 1}
+    assert facets[size.slug] == {size.values.first().slug: 1}
+
+
 def test_sort_products(user_api_client, product):
     # set price of the first product
     product.price = Money('10.00', 'USD')
@@ -1243,3 +1286,93 @@ def test_update_variants_changed_does_nothing_with_no_attributes():
     product_type.variant_attributes.all = Mock(return_value=[])
     saved_attributes = []
     assert update_variants_names(product_type, saved_attributes) is None
+
+
+PRODUCTS_PAGE_QUERY = """
+query ProductsPage($first: Int) {
+    products(first: $first) {
+        edges {
+            node {
+                thumbnailUrl
+                category { name }
+                productType { name }
+                attributes { attribute { name } value { name } }
+                images { edges { node { url } } }
+                variants {
+                    edges {
+                        node {
+                            name
+                            product { name }
+                            images { edges { node { url } } }
+                            attributes {
+                                attribute { name values { name } }
+                                value { name }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+
+def get_products_page_query_count(client, first):
+    variables = json.dumps({'first': first})
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            reverse('api'),
+            {'query': PRODUCTS_PAGE_QUERY, 'variables': variables})
+    content = get_graphql_content(response)
+    assert 'errors' not in content
+    assert len(content['data']['products']['edges']) == first
+    return len(queries)
+
+
+def test_products_query_count_does_not_grow_with_page_size(
+        user_api_client, product):
+    variant = product.variants.get()
+    for index in range(4):
+        other_product = Product.objects.create(
+            name='Product %d' % (index, ), price=product.price,
+            product_type=product.product_type, category=product.category,
+            attributes=product.attributes)
+        ProductVariant.objects.create(
+            product=other_product, sku='sku-%d' % (index, ),
+            attributes=variant.attributes)
+    # let caches shared between requests fill up first
+    get_products_page_query_count(user_api_client, 1)
+    assert get_products_page_query_count(user_api_client, 1) == (
+        get_products_page_query_count(user_api_client, 5))
+
+
+def test_products_query_loads_only_selected_fields(user_api_client, product):
+    query = """
+    query {
+        products(first: 10) {
+            edges {
+                node {
+                    ...ProductFields
+                }
+            }
+        }
+    }
+
+    fragment ProductFields on Product {
+        name
+        category {
+            name
+        }
+    }
+    """
+    with CaptureQueriesContext(connection) as queries:
+        response = user_api_client.post(reverse('api'), {'query': query})
+    content = get_graphql_content(response)
+    assert content['data']['products']['edges'] == [{'node': {
+        'name': product.name, 'category': {'name': product.category.name}}}]
+    sql = [
+        captured['sql'] for captured in queries.captured_queries
+        if '"product_product"."name"' in captured['sql']][-1]
+    assert '"product_category"."name"' in sql
+    assert '"product_product"."description"' not in sql
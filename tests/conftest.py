@@ -22,9 +22,11 @@ from saleor.account.models import Address, User
 from saleor.checkout import utils
 from saleor.checkout.models import Cart
 from saleor.checkout.utils import add_variant_to_cart
+from saleor.core.utils.taxes import invalidate_tax_tables
 from saleor.dashboard.menu.utils import update_menu
 from saleor.dashboard.order.utils import fulfill_order_line
 from saleor.discount.models import Sale, Voucher, VoucherTranslation
+from saleor.discount.utils import invalidate_sale_index
 from saleor.menu.models import Menu, MenuItem
 from saleor.order import OrderStatus
 from saleor.order.models import Order
@@ -34,9 +36,17 @@ from saleor.product.models import (
     AttributeChoiceValue, Category, Collection, Product, ProductAttribute,
     ProductAttributeTranslation, ProductImage, ProductTranslation, ProductType,
     ProductVariant)
+from saleor.product.utils.attributes import invalidate_attribute_registry
+from saleor.product.utils.bitmaps import invalidate_product_index
+from saleor.product.utils.categories import invalidate_category_tree
+from saleor.product.utils.variants_picker import invalidate_variant_picker
+from saleor.search.backends.local_index import invalidate_local_index
+from saleor.search.local_documents import DOCUMENTS as LOCAL_DOCUMENTS
+from saleor.search.suggestions import invalidate_suggestion_index
 from saleor.shipping.models import (
     ShippingMethod, ShippingMethodType, ShippingZone)
 from saleor.site.models import AuthorizationKey, SiteSettings
+from saleor.site.snapshot import invalidate_site_settings
 
 
 class ApiClient(Client):
@@ -75,6 +85,31 @@ class ApiClient(Client):
         return super().post(*args, **kwargs)
 
 
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    # Sale index, tax tables, site settings, category tree, attribute
+    # registry and variant picker data are cached between requests, make
+    # sure they are never built from data of a previous test
+    invalidate_sale_index()
+    invalidate_tax_tables()
+    invalidate_site_settings()
+    invalidate_category_tree()
+    invalidate_attribute_registry()
+    invalidate_product_index()
+    invalidate_variant_picker()
+
+
+@pytest.fixture(autouse=True)
+def search_index_paths(settings, tmpdir):
+    # every test gets its own suggestion and local search indexes built on
+    # first use
+    settings.SEARCH_SUGGESTIONS_PATH = str(tmpdir.join('suggestions.idx'))
+    settings.LOCAL_SEARCH_PATH = str(tmpdir.join('search-index'))
+    invalidate_suggestion_index()
+    for document in LOCAL_DOCUMENTS:
+        invalidate_local_index(document)
+
+
 @pytest.fixture
 def admin_api_client(admin_user):
     return ApiClient(user=admin_user)
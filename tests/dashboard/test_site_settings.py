@@ -6,7 +6,7 @@ from django.urls import reverse
 from django.utils.encoding import smart_text
 
 from saleor.dashboard.sites.forms import SiteForm, SiteSettingsForm
-from saleor.site import utils
+from saleor.site import snapshot, utils
 from saleor.site.models import AuthorizationKey, SiteSettings
 
 
@@ -158,3 +158,34 @@ def test_new_get_current_from_request():
     assert result.domain == 'mirumee.com'
     assert type(result.settings) == SiteSettings
     assert str(result.settings) == 'mirumee.com'
+
+
+def test_site_settings_snapshot_is_refreshed_on_save(site_settings):
+    settings_snapshot = snapshot.get_site_settings()
+    assert settings_snapshot.include_taxes_in_prices
+    assert snapshot.get_site_settings() is settings_snapshot
+    with pytest.raises(AttributeError):
+        settings_snapshot.include_taxes_in_prices = False
+
+    site_settings.include_taxes_in_prices = False
+    site_settings.save()
+    new_snapshot = snapshot.get_site_settings()
+    assert not new_snapshot.include_taxes_in_prices
+    assert new_snapshot.version != settings_snapshot.version
+
+
+def test_site_settings_snapshot_is_assigned_to_request(client, site_settings):
+    response = client.get(reverse('home'))
+    request = response.wsgi_request
+    assert request.site_settings.site_id == site_settings.site_id
+    assert request.site == site_settings.site
+
+
+def test_site_is_loaded_for_every_request(client, site_settings):
+    response = client.get(reverse('home'))
+    first_request = response.wsgi_request
+    assert response.context['site'] is first_request.site
+    second_request = client.get(reverse('home')).wsgi_request
+    assert first_request.site == second_request.site
+    assert first_request.site is not second_request.site
+    assert first_request.site.settings is not second_request.site.settings
@@ -1,3 +1,5 @@
+from unittest.mock import Mock
+
 import pytest
 from django.urls import reverse
 from django_countries.fields import Country
@@ -6,7 +8,8 @@ from prices import Money, MoneyRange, TaxedMoney, TaxedMoneyRange
 
 from saleor.core.utils import get_country_name_by_code
 from saleor.core.utils.taxes import (
-    apply_tax_to_price, get_taxes_for_address, get_taxes_for_country)
+    apply_tax_to_price, get_taxes_for_address, get_taxes_for_country,
+    tax_tables)
 from saleor.dashboard.taxes.filters import get_country_choices_for_vat
 
 from ..utils import compare_taxes, get_redirect_location
@@ -118,6 +121,37 @@ def test_get_taxes_for_country(vatlayer):
     compare_taxes(taxes, vatlayer)
 
 
+def test_get_taxes_for_country_is_cached(vatlayer):
+    stats = tax_tables.get_stats()
+    taxes = get_taxes_for_country(Country('PL'))
+    assert get_taxes_for_country(Country('PL')) is taxes
+    new_stats = tax_tables.get_stats()
+    assert new_stats['misses'] == stats['misses'] + 1
+    assert new_stats['hits'] == stats['hits'] + 1
+    with pytest.raises(TypeError):
+        taxes['standard'] = None
+
+
+def test_get_taxes_for_country_uses_activated_version(vatlayer, monkeypatch):
+    tax_tables.activate()
+    try:
+        taxes = get_taxes_for_country(Country('PL'))
+        monkeypatch.setattr(
+            'saleor.core.utils.taxes.get_cache_version', Mock(
+                side_effect=AssertionError('shared cache was consulted')))
+        assert get_taxes_for_country(Country('PL')) is taxes
+    finally:
+        tax_tables.deactivate()
+
+
+def test_get_taxes_for_country_invalidated_on_rates_update(vatlayer):
+    assert get_taxes_for_country(Country('PL'))['standard']['value'] == 23
+    vat = VAT.objects.get(country_code='PL')
+    vat.data = dict(vat.data, standard_rate=20)
+    vat.save()
+    assert get_taxes_for_country(Country('PL'))['standard']['value'] == 20
+
+
 def test_get_country_name_by_code():
     country_name = get_country_name_by_code('PL')
     assert country_name == 'Poland'
@@ -12,6 +12,11 @@ RECAPTCHA_PRIVATE_KEY = None
 
 VATLAYER_ACCESS_KEY = ''
 
+GRAPHQL_RESPONSE_CACHE_TIMEOUT = 0
+
+# products saved by fixtures are indexed at once
+PRODUCT_INDEX_QUEUE_UPDATES = False
+
 if 'sqlite' in DATABASES['default']['ENGINE']:  # noqa
     DATABASES['default']['TEST'] = {  # noqa
         'SERIALIZE': False,
@@ -1,4 +1,5 @@
 import io
+import threading
 from contextlib import redirect_stdout
 from unittest.mock import Mock, patch
 
@@ -15,6 +16,7 @@ from saleor.core.storages import S3MediaStorage
 from saleor.core.utils import (
     Country, create_superuser, create_thumbnails, format_money,
     get_country_by_ip, get_currency_for_country, random_data)
+from saleor.core.utils.concurrency import evaluate_concurrently
 from saleor.core.utils.text import get_cleaner, strip_html
 from saleor.core.weight import WeightUnits, convert_weight
 from saleor.discount.models import Sale, Voucher
@@ -299,3 +301,29 @@ def test_convert_weight():
     weight = Weight(kg=1)
     expected_result = Weight(g=1000)
     assert convert_weight(weight, WeightUnits.GRAM) == expected_result
+
+
+def test_evaluate_concurrently(transactional_db, customer_user):
+    results, timed_out = evaluate_concurrently({
+        'users': lambda: list(User.objects.all()),
+        'thread': lambda: threading.current_thread().name})
+    assert results['users'] == [customer_user]
+    assert results['thread'] != threading.current_thread().name
+    assert timed_out == []
+
+
+def test_evaluate_concurrently_skips_timed_out_functions(transactional_db):
+    event = threading.Event()
+    results, timed_out = evaluate_concurrently({
+        'fast': lambda: 1, 'slow': lambda: event.wait(1)}, timeout=0.1)
+    event.set()
+    assert results == {'fast': 1}
+    assert timed_out == ['slow']
+
+
+def test_evaluate_concurrently_in_transaction(customer_user):
+    results, _ = evaluate_concurrently({
+        'users': lambda: list(User.objects.all()),
+        'thread': lambda: threading.current_thread().name})
+    assert results['users'] == [customer_user]
+    assert results['thread'] == threading.current_thread().name
@@ -1,16 +1,22 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
 import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 
 from prices import Money, TaxedMoney
 from saleor.checkout.utils import get_voucher_discount_for_cart
 from saleor.discount import DiscountValueType, VoucherType
-from saleor.discount.models import NotApplicable, Sale, Voucher
+from saleor.discount.models import (
+    NotApplicable, Sale, Voucher, VoucherExpired, VoucherUsageLimitReached)
 from saleor.discount.utils import (
-    decrease_voucher_usage, get_product_discount_on_sale,
+    SaleIndex, calculate_discounted_price, decrease_voucher_usage,
+    get_active_sale_index, get_product_discount_on_sale,
     get_products_voucher_discount, get_shipping_voucher_discount,
-    get_value_voucher_discount, increase_voucher_usage)
-from saleor.product.models import Product, ProductVariant
+    get_value_voucher_discount, increase_voucher_usage, redeem_voucher)
+from saleor.product.models import Category, Product, ProductVariant
 
 
 def get_min_amount_spent(min_amount_spent):
@@ -225,3 +231,102 @@ def test_sale_active(current_date, is_active):
         end_date=date.today() + timedelta(days=1))
     sale_is_active = Sale.objects.active(date=current_date).exists()
     assert is_active == sale_is_active
+
+
+def test_sale_index_matches_products(product, product_list):
+    sale = Sale.objects.create(
+        name='Sale', type=DiscountValueType.FIXED, value=3)
+    sale.products.add(product)
+    index = SaleIndex(Sale.objects.prefetch_related('products'))
+    assert len(index.get_product_discounts(product)) == 1
+    assert not index.get_product_discounts(product_list[0])
+
+
+def test_sale_index_matches_category_descendants(product, category):
+    child = Category.objects.create(
+        name='Child', slug='child', parent=category)
+    sale = Sale.objects.create(
+        name='Sale', type=DiscountValueType.FIXED, value=3)
+    sale.categories.add(category)
+    product.category = child
+    product.save()
+    index = SaleIndex(Sale.objects.all())
+    assert len(index.get_product_discounts(product)) == 1
+    other = Category.objects.create(name='Other', slug='other')
+    product.category = other
+    assert not index.get_product_discounts(product)
+
+
+def test_sale_index_matches_collections(product, collection):
+    sale = Sale.objects.create(
+        name='Sale', type=DiscountValueType.PERCENTAGE, value=50)
+    sale.collections.add(collection)
+    index = SaleIndex(Sale.objects.all())
+    assert not index.get_product_discounts(product)
+    product.collections.add(collection)
+    price = calculate_discounted_price(product, product.price, index)
+    assert price == Money(5, 'USD')
+
+
+def test_active_sale_index_is_rebuilt_on_sale_change(product):
+    today = date.today()
+    sale = Sale.objects.create(
+        name='Sale', type=DiscountValueType.FIXED, value=3,
+        start_date=today, end_date=today)
+    index = get_active_sale_index(today)
+    assert get_active_sale_index(today) is index
+    assert not index.get_product_discounts(product)
+    sale.products.add(product)
+    index = get_active_sale_index(today)
+    assert len(index.get_product_discounts(product)) == 1
+
+
+def test_redeem_voucher(voucher):
+    voucher.usage_limit = 1
+    voucher.save()
+    redeemed = redeem_voucher(voucher.code, date.today())
+    assert redeemed == voucher
+    assert redeemed.used == 1
+    with pytest.raises(VoucherUsageLimitReached):
+        redeem_voucher(voucher.code, date.today())
+
+
+def test_redeem_voucher_expired(voucher):
+    voucher.end_date = date.today() - timedelta(days=1)
+    voucher.save()
+    with pytest.raises(VoucherExpired):
+        redeem_voucher(voucher.code, date.today())
+    with pytest.raises(VoucherExpired):
+        redeem_voucher('non-existing', date.today())
+
+
+@pytest.mark.integration
+def test_redeem_voucher_concurrently(transactional_db):
+    voucher = Voucher.objects.create(
+        code='shared', discount_value=10, usage_limit=5)
+    barrier = threading.Barrier(10)
+    updates = []
+
+    def redeem(dummy_index):
+        barrier.wait()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                with transaction.atomic():
+                    redeem_voucher(voucher.code, date.today())
+            return True
+        except VoucherUsageLimitReached:
+            return False
+        finally:
+            updates.extend(
+                query['sql'] for query in queries.captured_queries
+                if query['sql'].startswith('UPDATE'))
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(redeem, range(10)))
+    voucher.refresh_from_db()
+    assert sum(results) == 5
+    assert voucher.used == 5
+    # every redemption is a single conditional update of the voucher row
+    assert len(updates) == 10
+    assert all('"usage_limit"' in sql for sql in updates)
@@ -0,0 +1,185 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from saleor.account.models import Address, User
+from saleor.order.models import Order
+from saleor.product.models import Product
+from saleor.search.backends import local_index
+from saleor.search.backends.local_index import (
+    edge_ngram_tokens, email_tokens, get_local_index, get_log_index_name,
+    rebuild_local_index, standard_tokens, update_local_index)
+from saleor.search.index_log import log_index_changes
+from saleor.search.local_documents import (
+    OrderDocument, ProductDocument, UserDocument)
+
+
+@pytest.fixture(autouse=True)
+def local_search_enabled(settings):
+    settings.ENABLE_SEARCH = True
+    settings.SEARCH_BACKEND = 'saleor.search.backends.local'
+
+
+PRODUCTS = [('Arabica Coffee', 'The best grains in galactic'),
+            ('Cool T-Shirt', 'Blue and big coffee stain.'),
+            ('Roasted chicken', 'Fabulous vertebrate')]
+
+
+@pytest.fixture
+def named_products(category, product_type):
+    return [
+        Product.objects.create(
+            name=name, description=description, price=Decimal(6.6),
+            product_type=product_type, category=category)
+        for name, description in PRODUCTS]
+
+
+def test_standard_tokens():
+    assert list(standard_tokens('Crème Brûlée, 2 KG')) == [
+        'creme', 'brulee', '2', 'kg']
+    assert list(standard_tokens('東京タワー')) == [
+        '東京', '京タ', 'タワ', 'ワー']
+
+
+def test_edge_ngram_tokens():
+    assert list(edge_ngram_tokens('Big Coffee')) == [
+        'big', 'cof', 'coff', 'coffe', 'coffee']
+
+
+def test_email_tokens():
+    assert list(email_tokens('John.Doe@Example.com doe')) == [
+        'john.doe@example.com', 'doe']
+
+
+def test_search_ranks_best_matches_first(named_products):
+    index = get_local_index(ProductDocument())
+    assert index.search('coffee') == [
+        named_products[0].pk, named_products[1].pk]
+    assert index.search('roast') == [named_products[2].pk]
+    assert index.search('unknown') == []
+
+
+def test_search_filters(named_products):
+    Product.objects.filter(pk=named_products[0].pk).update(
+        is_published=False)
+    rebuild_local_index(ProductDocument())
+    index = get_local_index(ProductDocument())
+    assert index.search('coffee', filters={'is_published': True}) == [
+        named_products[1].pk]
+    assert index.search('coffee', filters={'is_published': False}) == [
+        named_products[0].pk]
+
+
+def test_update_local_index(named_products):
+    document = ProductDocument()
+    rebuild_local_index(document)
+    product = named_products[2]
+    product.name = 'Roasted coffee'
+    product.save()
+    deleted_pk = named_products[0].pk
+    named_products[0].delete()
+    update_local_index(document, [product.pk, deleted_pk])
+    index = get_local_index(document)
+    assert len(index.segments) == 2
+    assert index.search('coffee') == [product.pk, named_products[1].pk]
+    assert index.search('arabica') == []
+
+
+def test_update_local_index_merges_segments(named_products, monkeypatch):
+    monkeypatch.setattr(local_index, 'MAX_SEGMENTS', 2)
+    document = ProductDocument()
+    rebuild_local_index(document)
+    for product in named_products[:2]:
+        update_local_index(document, [product.pk])
+    index = get_local_index(document)
+    assert len(index.segments) == 1
+    assert index.document_count == len(named_products)
+    assert index.search('coffee') == [
+        named_products[0].pk, named_products[1].pk]
+
+
+def test_local_index_updated_on_save(transactional_db, named_products):
+    document = ProductDocument()
+    get_local_index(document)
+    product = named_products[2]
+    product.name = 'Roasted coffee'
+    product.save()
+    assert product.pk in get_local_index(document).search('coffee')
+
+
+def test_local_index_applies_logged_changes(named_products):
+    document = ProductDocument()
+    rebuild_local_index(document)
+    product = named_products[2]
+    Product.objects.filter(pk=product.pk).update(name='Roasted coffee')
+    log_index_changes(
+        get_log_index_name(document), document.name, [product.pk])
+    index = get_local_index(document)
+    assert len(index.segments) == 2
+    assert product.pk in index.search('coffee')
+
+
+def test_storefront_search(client, named_products):
+    response = client.get(reverse('search:search'), {'q': 'coffee'})
+    results = response.context['results']
+    assert results.paginator.count == 2
+    assert [product for product, _ in results.object_list] == [
+        named_products[0], named_products[1]]
+
+
+def test_storefront_search_counts_available_products(client, named_products):
+    product = named_products[1]
+    product.available_on = date.today() + timedelta(days=1)
+    product.save()
+    response = client.get(reverse('search:search'), {'q': 'coffee'})
+    results = response.context['results']
+    assert results.paginator.count == 1
+    assert [product for product, _ in results.object_list] == [
+        named_products[0]]
+
+
+@pytest.fixture
+def customers_with_orders():
+    address = Address.objects.create(
+        first_name='Rhonda', last_name='Ayala', country='PL')
+    user = User.objects.create(
+        email='rhonda.ayala@example.com', default_billing_address=address)
+    other_user = User.objects.create(email='john.doe@example.com')
+    order = Order.objects.create(user=user, billing_address=address)
+    return user, other_user, order
+
+
+def test_dashboard_search(admin_client, customers_with_orders):
+    user, other_user, order = customers_with_orders
+    response = admin_client.get(
+        reverse('dashboard:search'), {'q': 'rhonda.ayala@example.com'})
+    assert list(response.context['users']) == [user]
+    assert list(response.context['orders']) == [order]
+    response = admin_client.get(
+        reverse('dashboard:search'), {'q': 'Rhonda Doe'})
+    assert list(response.context['users']) == []
+    response = admin_client.get(
+        reverse('dashboard:search'), {'q': 'john doe'})
+    assert list(response.context['users']) == [other_user]
+
+
+def test_user_documents_follow_address(customers_with_orders):
+    user, dummy_other_user, order = customers_with_orders
+    document = UserDocument()
+    rebuild_local_index(document)
+    address = user.default_billing_address
+    address.first_name = 'Ronda'
+    address.save()
+    update_local_index(
+        document, document.get_changed_pks(Address, address))
+    assert get_local_index(document).search('ronda') == [user.pk]
+    assert OrderDocument().get_changed_pks(User, user) == [order.pk]
+
+
+def test_update_local_search_index_command(named_products):
+    call_command('update_local_search_index')
+    assert get_local_index(ProductDocument()).document_count == len(
+        named_products)
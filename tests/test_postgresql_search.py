@@ -1,11 +1,16 @@
 from decimal import Decimal
 
 import pytest
+from django.core.management import call_command
+from django.db.models.expressions import RawSQL
+from django.http import Http404
 from django.urls import reverse
 
 from saleor.account.models import Address, User
 from saleor.order.models import Order
 from saleor.product.models import Product
+from saleor.search.backends import postgresql_dashboard
+from saleor.search.views import paginate_results
 
 
 @pytest.fixture(scope='function', autouse=True)
@@ -51,6 +56,19 @@ def test_storefront_product_fuzzy_name_search(client, named_products, phrase,
     assert named_products[product_num] in results
 
 
+def test_paginate_results_fetches_single_page(named_products):
+    results = Product.objects.order_by('pk')
+    page = paginate_results(results, {'page': '2'}, paginate_by=2)
+    assert list(page) == named_products[2:]
+    assert page.paginator.count == 3
+    assert page.has_previous()
+    assert not page.has_next()
+    with pytest.raises(Http404):
+        paginate_results(results, {'page': '3'}, paginate_by=2)
+    with pytest.raises(Http404):
+        paginate_results(results, {'page': 'foo'}, paginate_by=2)
+
+
 def unpublish_product(product):
     prod_to_unpublish = product
     prod_to_unpublish.is_published = False
@@ -247,3 +265,44 @@ def test_show_users_search_result_when_access_granted(
     staff_user.user_permissions.add(permission_manage_users)
     _, _, users = search_dashboard(staff_client, USER_PHRASE_WITH_RESULT)
     assert 1 == len(users)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_find_order_after_address_change(admin_client, orders_with_addresses):
+    address = orders_with_addresses[0].user.default_shipping_address
+    address.last_name = 'Nowak'
+    address.save()
+    _, orders, _ = search_dashboard(admin_client, 'nowak')
+    assert list(orders) == [orders_with_addresses[0]]
+    _, orders, _ = search_dashboard(admin_client, 'knop')
+    assert not orders
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_update_search_vectors_command(admin_client, named_products):
+    Product.objects.update(search_vector=None)
+    products, _, _ = search_dashboard(admin_client, 'coffee')
+    assert not products
+    call_command('update_search_vectors')
+    products, _, _ = search_dashboard(admin_client, 'coffee')
+    assert list(products) == [named_products[0]]
+
+
+@pytest.mark.integration
+def test_dashboard_search_skips_timed_out_results(
+        transactional_db, admin_client, named_products, settings,
+        monkeypatch):
+    settings.DASHBOARD_SEARCH_TIMEOUT = 0.1
+    search_products = postgresql_dashboard.search_products
+
+    def slow_search_products(phrase):
+        return search_products(phrase).annotate(
+            delay=RawSQL('pg_sleep(1)', []))
+
+    monkeypatch.setattr(
+        postgresql_dashboard, 'search_products', slow_search_products)
+    response = admin_client.get(reverse('dashboard:search'), {'q': 'coffee'})
+    assert response.context['products'] == []
+    assert response.context['timed_out'] == ['products']
@@ -1,7 +1,7 @@
 import datetime
 import json
 from decimal import Decimal
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -13,11 +13,17 @@ from saleor.checkout.models import Cart
 from saleor.checkout.utils import add_variant_to_cart
 from saleor.discount.models import Sale
 from saleor.product import ProductAvailabilityStatus, models
+from saleor.product.tasks import (
+    update_prices_of_starting_and_ending_sales_task)
 from saleor.product.thumbnails import create_product_thumbnails
 from saleor.product.utils import (
     allocate_stock, deallocate_stock, decrease_stock, increase_stock)
 from saleor.product.utils.attributes import get_product_attributes_data
 from saleor.product.utils.availability import get_product_availability_status
+from saleor.product.utils.categories import get_category_tree
+from saleor.product.utils.prices import (
+    get_products_of_sales, update_product_prices)
+from saleor.product.utils import variants_picker
 from saleor.product.utils.variants_picker import get_variant_picker_data
 from saleor.menu.models import MenuItemTranslation
 from saleor.dashboard.menu.utils import update_menu
@@ -629,6 +635,43 @@ def test_product_json_deserialization(category, product_type):
     assert product.price == Money(Decimal('35.98'), 'USD')
 
 
+def test_variant_picker_skeleton_is_cached(product, monkeypatch):
+    build_mock = Mock(wraps=variants_picker.build_variant_picker_skeleton)
+    monkeypatch.setattr(
+        variants_picker, 'build_variant_picker_skeleton', build_mock)
+    first = get_variant_picker_data(product)
+    second = get_variant_picker_data(product)
+    assert build_mock.call_count == 1
+    assert first['variantAttributes'] == second['variantAttributes']
+
+    value = models.AttributeChoiceValue.objects.get(
+        pk=first['variantAttributes'][0]['values'][0]['pk'])
+    value.name = 'Renamed'
+    value.save()
+    data = get_variant_picker_data(product)
+    assert build_mock.call_count == 2
+    assert data['variantAttributes'][0]['values'][0]['name'] == 'Renamed'
+
+
+def test_variant_picker_skeleton_not_invalidated_by_stock(product):
+    get_variant_picker_data(product)
+    version = variants_picker.get_variant_picker_cache_key(product.pk, 'en')
+    variant = product.variants.get()
+    variant.quantity = 0
+    variant.save(update_fields=['quantity'])
+    assert variants_picker.get_variant_picker_cache_key(
+        product.pk, 'en') == version
+    data = get_variant_picker_data(product)
+    assert not data['variants'][0]['availability']
+
+
+def test_invalidated_variant_picker_version_is_not_reused(product):
+    key = variants_picker.get_variant_picker_cache_key(product.pk, 'en')
+    variants_picker.invalidate_variant_picker(product.pk)
+    assert variants_picker.get_variant_picker_cache_key(
+        product.pk, 'en') != key
+
+
 def test_variant_picker_data_with_translations(
         product, translated_variant_fr, settings):
     settings.LANGUAGE_CODE = 'fr'
@@ -658,3 +701,132 @@ def test_homepage_collection_render(
     products_available = {
         product for product in product_list if product.is_published}
     assert products_in_context == products_available
+
+
+def test_product_prices_are_stored_on_save(product):
+    variant = product.variants.get()
+    models.ProductVariant.objects.create(product=product, sku='second')
+    variant.price_override = Money(15, 'USD')
+    variant.save()
+    product.refresh_from_db()
+    assert product.min_price == Money(10, 'USD')
+    assert product.max_price == Money(15, 'USD')
+    assert product.min_price_undiscounted == Money(10, 'USD')
+    assert product.max_price_undiscounted == Money(15, 'USD')
+
+
+def test_update_product_prices_applies_discounts(product, sale):
+    update_product_prices(product, [sale])
+    product.refresh_from_db()
+    assert product.min_price == Money(5, 'USD')
+    assert product.min_price_undiscounted == Money(10, 'USD')
+    variant = product.variants.get()
+    assert variant.discounted_price == Money(5, 'USD')
+
+
+def test_get_products_of_sales(product, sale, product_type):
+    other_category = models.Category.objects.create(
+        name='Other', slug='other')
+    other_product = models.Product.objects.create(
+        name='Other product', price=Money(10, 'USD'),
+        product_type=product_type, category=other_category)
+    assert list(get_products_of_sales([sale])) == [product]
+    sale.products.add(other_product)
+    assert set(get_products_of_sales([sale])) == {product, other_product}
+
+
+def test_prices_of_sales_ended_before_last_run_are_updated(product, sale):
+    today = datetime.date.today()
+    Sale.objects.filter(pk=sale.pk).update(
+        start_date=today - datetime.timedelta(days=5),
+        end_date=today - datetime.timedelta(days=3))
+    models.Product.objects.filter(pk=product.pk).update(
+        min_price=Money(5, 'USD'))
+
+    update_prices_of_starting_and_ending_sales_task()
+
+    product.refresh_from_db()
+    assert product.min_price == Money(10, 'USD')
+    sale.refresh_from_db()
+    assert sale.prices_updated_on == today
+
+    models.Product.objects.filter(pk=product.pk).update(
+        min_price=Money(5, 'USD'))
+    update_prices_of_starting_and_ending_sales_task()
+    product.refresh_from_db()
+    assert product.min_price == Money(5, 'USD')
+
+
+def test_product_filter_sorted_by_discounted_price(
+        authorized_client, product_list, category, sale):
+    cheapest = product_list[-1]
+    sale.categories.clear()
+    sale.value = 15
+    sale.save()
+    sale.products.add(cheapest)
+    update_product_prices(cheapest, [sale])
+    url = reverse(
+        'product:category',
+        kwargs={'slug': category.slug, 'category_id': category.pk})
+    response = authorized_client.get(url, {'sort_by': 'price'})
+    products = list(response.context['filter_set'].qs)
+    assert products[0] == cheapest
+
+
+def test_category_tree_snapshot(db):
+    root = models.Category.objects.create(name='Root', slug='root')
+    child = models.Category.objects.create(
+        name='Child', slug='child', parent=root)
+    grandchild = models.Category.objects.create(
+        name='Grandchild', slug='grandchild', parent=child)
+    other = models.Category.objects.create(name='Other', slug='other')
+
+    tree = get_category_tree()
+    assert tree.get_descendant_ids(root.pk) == [child.pk, grandchild.pk]
+    assert tree.get_descendant_ids(child.pk, include_self=True) == [
+        child.pk, grandchild.pk]
+    assert tree.get_ancestor_ids(grandchild.pk) == [root.pk, child.pk]
+    assert tree.get_children_ids(root.pk) == [child.pk]
+    assert tree.get_path(grandchild.pk) == ['Root', 'Child', 'Grandchild']
+    assert tree.get_ids_by_slug('child') == [child.pk]
+    assert tree.is_descendant_of(grandchild.pk, root.pk)
+    assert not tree.is_descendant_of(root.pk, root.pk)
+    assert tree.is_descendant_of(root.pk, root.pk, include_self=True)
+    assert not tree.is_descendant_of(grandchild.pk, other.pk)
+    assert get_category_tree() is tree
+
+    child.move_to(other)
+    tree = get_category_tree()
+    assert tree.get_path(grandchild.pk) == ['Other', 'Child', 'Grandchild']
+    assert tree.get_descendant_ids(root.pk) == []
+    assert tree.is_descendant_of(grandchild.pk, other.pk)
+
+
+def test_product_filter_facets(authorized_client, product, category):
+    color = product.product_type.product_attributes.get()
+    red, blue = color.values.order_by('pk')
+    size = product.product_type.variant_attributes.get()
+    size_value = size.values.first()
+    models.Product.objects.create(
+        name='Blue product', price=Money('10.00', 'USD'),
+        product_type=product.product_type, category=category,
+        attributes={str(color.pk): str(blue.pk)})
+    url = reverse(
+        'product:category',
+        kwargs={
+            'slug': category.slug,
+            'category_id': category.pk})
+
+    response = authorized_client.get(url)
+
+    facets = response.context['facets']
+    assert facets[color.slug] == {red.pk: 1, blue.pk: 1}
+    assert facets[size.slug] == {size_value.pk: 1}
+
+    response = authorized_client.get(url, {color.slug: [red.pk]})
+
+    assert list(response.context['filter_set'].qs) == [product]
+    facets = response.context['facets']
+    # selected attribute keeps counts of its other values
+    assert facets[color.slug] == {red.pk: 1, blue.pk: 1}
+    assert facets[size.slug] == {size_value.pk: 1}
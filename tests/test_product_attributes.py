@@ -1,10 +1,27 @@
+from unittest.mock import Mock
+
 import pytest
+from django.core.cache import cache
 
 from saleor.product.models import (
-    AttributeChoiceValue, Product, ProductAttribute)
+    AttributeChoiceValue, Product, ProductAttribute, ProductBitmap,
+    ProductIndexChange)
+from saleor.product.utils import bitmaps
 from saleor.product.utils.attributes import (
-    generate_name_from_values, get_attributes_display_map,
+    generate_name_from_values, get_attribute_registry,
+    get_attributes_display_map, get_attributes_lookup, get_attributes_query,
     get_name_from_attributes)
+from saleor.product.utils.bitmaps import (
+    PRODUCT_INDEX_VERSION_KEY, bitmap_from_ids, bitmap_to_ids, compress_bitmap,
+    decompress_bitmap, get_attribute_key, get_category_key, get_product_index,
+    invalidate_product_index, rebuild_product_index, update_queued_products)
+
+
+@pytest.fixture
+def fresh_product_index(monkeypatch):
+    # the process-wide index and its version are left by previous tests
+    monkeypatch.setattr(bitmaps, '_product_index', None)
+    cache.delete(PRODUCT_INDEX_VERSION_KEY)
 
 
 @pytest.fixture()
@@ -67,3 +84,159 @@ def test_generate_name_from_values():
 def test_generate_name_from_values_empty():
     name = generate_name_from_values({})
     assert name == ''
+
+
+def test_attribute_registry(color_attribute):
+    registry = get_attribute_registry()
+    assert get_attribute_registry() is registry
+    value = color_attribute.values.first()
+    assert registry.get_attribute_pk(color_attribute.slug) == (
+        color_attribute.pk)
+    assert registry.get_value_pk(color_attribute.pk, value.slug) == value.pk
+    assert registry.get_value(value.pk) == value
+    assert registry.get_values(color_attribute.pk) == list(
+        color_attribute.values.all())
+    assert registry.get_attribute_pk('unknown') is None
+
+
+def test_attribute_registry_rebuilt_after_value_change(color_attribute):
+    registry = get_attribute_registry()
+    value = AttributeChoiceValue.objects.create(
+        attribute=color_attribute, name='Green', slug='green')
+    assert registry.get_value_pk(color_attribute.pk, 'green') is None
+    registry = get_attribute_registry()
+    assert registry.get_value_pk(color_attribute.pk, 'green') == value.pk
+
+
+def test_bitmap_round_trip():
+    ids = [0, 3, 8, 255, 100000]
+    bitmap = bitmap_from_ids(ids)
+    assert bitmap_to_ids(bitmap) == ids
+    assert decompress_bitmap(compress_bitmap(bitmap)) == bitmap
+    assert bitmap_to_ids(bitmap_from_ids([])) == []
+
+
+def test_product_index_updated_on_save(product):
+    color = product.product_type.product_attributes.get()
+    red, blue = color.values.order_by('pk')
+    size = product.product_type.variant_attributes.get()
+    size_value = size.values.first()
+    index = get_product_index()
+    assert bitmap_to_ids(index.get_attribute_bitmap(color.pk, [red.pk])) == [
+        product.pk]
+    assert bitmap_to_ids(
+        index.get_attribute_bitmap(size.pk, [size_value.pk])) == [product.pk]
+    assert bitmap_to_ids(index.get_category_bitmap([product.category_id])) == [
+        product.pk]
+    assert bitmap_to_ids(index.get_published_bitmap()) == [product.pk]
+
+    product.attributes = {str(color.pk): str(blue.pk)}
+    product.is_published = False
+    product.save()
+
+    index = get_product_index()
+    assert not index.get_attribute_bitmap(color.pk, [red.pk])
+    assert bitmap_to_ids(index.get_attribute_bitmap(color.pk, [blue.pk])) == [
+        product.pk]
+    assert not index.get_published_bitmap()
+    assert not ProductBitmap.objects.filter(
+        key=get_attribute_key(color.pk, red.pk)).exists()
+
+    product.delete()
+
+    assert not len(get_product_index())
+
+
+def test_product_index_updated_in_batches(product, settings):
+    settings.PRODUCT_INDEX_QUEUE_UPDATES = True
+    color = product.product_type.product_attributes.get()
+    red, blue = color.values.order_by('pk')
+    product.attributes = {str(color.pk): str(blue.pk)}
+    product.save()
+    product.save()
+
+    assert list(ProductIndexChange.objects.values_list(
+        'product_id', flat=True)) == [product.pk]
+    index = get_product_index()
+    assert bitmap_to_ids(index.get_attribute_bitmap(color.pk, [red.pk])) == [
+        product.pk]
+
+    assert update_queued_products(10) == 1
+
+    assert not ProductIndexChange.objects.exists()
+    index = get_product_index()
+    assert not index.get_attribute_bitmap(color.pk, [red.pk])
+    assert bitmap_to_ids(index.get_attribute_bitmap(color.pk, [blue.pk])) == [
+        product.pk]
+    assert update_queued_products(10) == 0
+
+
+def test_product_index_reloads_changed_bitmaps(
+        product, fresh_product_index, monkeypatch):
+    color = product.product_type.product_attributes.get()
+    red, blue = color.values.order_by('pk')
+    index = get_product_index()
+    category_bitmap = index.get_category_bitmap([product.category_id])
+
+    product.attributes = {str(color.pk): str(blue.pk)}
+    product.save()
+
+    decompress_mock = Mock(wraps=decompress_bitmap)
+    monkeypatch.setattr(bitmaps, 'decompress_bitmap', decompress_mock)
+    new_index = get_product_index()
+    assert new_index is not index
+    # the emptied bitmap of red is removed, only the one of blue is loaded
+    assert decompress_mock.call_count == 1
+    assert new_index.get_category_bitmap(
+        [product.category_id]) == category_bitmap
+    assert new_index.row_versions[get_category_key(product.category_id)] == (
+        index.row_versions[get_category_key(product.category_id)])
+    assert bitmap_to_ids(
+        new_index.get_attribute_bitmap(color.pk, [blue.pk])) == [product.pk]
+
+
+def test_product_index_rebuild(product):
+    color = product.product_type.product_attributes.get()
+    red = color.values.order_by('pk').first()
+    ProductBitmap.objects.all().delete()
+    invalidate_product_index()
+    assert not get_product_index().get_attribute_bitmap(color.pk, [red.pk])
+
+    rebuild_product_index()
+
+    index = get_product_index()
+    assert bitmap_to_ids(index.get_attribute_bitmap(color.pk, [red.pk])) == [
+        product.pk]
+    candidates = bitmap_from_ids([product.pk])
+    assert index.count_attribute_values(candidates, [color.pk]) == {
+        color.pk: {red.pk: 1}}
+
+
+def test_get_attributes_query(product):
+    color = product.product_type.product_attributes.get()
+    red, blue = color.values.order_by('pk')
+    size = product.product_type.variant_attributes.get()
+    size_value = size.values.first()
+    products = Product.objects.all()
+
+    query = get_attributes_query(
+        {color.pk: [red.pk, blue.pk], size.pk: [size_value.pk]})
+    assert list(products.filter(query)) == [product]
+    query = get_attributes_query({color.pk: [blue.pk]})
+    assert not products.filter(query).exists()
+    query = get_attributes_query({color.pk: []})
+    assert not products.filter(query).exists()
+
+
+@pytest.mark.parametrize('max_ids', [0, 5000])
+def test_get_attributes_lookup(product, max_ids, monkeypatch):
+    monkeypatch.setattr(
+        'saleor.product.utils.attributes.MAX_ATTRIBUTE_LOOKUP_IDS', max_ids)
+    size = product.product_type.variant_attributes.get()
+    size_value = size.values.first()
+    products = Product.objects.all()
+
+    lookup = get_attributes_lookup({size.pk: [size_value.pk]})
+    assert list(products.filter(lookup)) == [product]
+    lookup = get_attributes_lookup({size.pk: [size_value.pk]}, scope=0)
+    assert not products.filter(lookup).exists()
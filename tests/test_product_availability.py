@@ -4,8 +4,9 @@ from unittest.mock import Mock
 from saleor.product import (
     ProductAvailabilityStatus, VariantAvailabilityStatus, models)
 from saleor.product.utils.availability import (
-    get_availability, get_product_availability_status,
-    get_variant_availability_status)
+    ProductPriceSheet, get_availability, get_product_availability_status,
+    get_variant_availability_status, price_products)
+from saleor.seo.schema.product import product_json_ld
 
 
 def test_product_availability_status(unavailable_product):
@@ -90,6 +91,42 @@ def test_availability(product, monkeypatch, settings, taxes):
     assert availability.available
 
 
+def test_price_products_matches_get_availability(
+        product_list, sale, site_settings, taxes):
+    site_settings.include_taxes_in_prices = False
+    site_settings.save()
+    sale.products.add(product_list[0])
+    discounts = [sale]
+    products = models.Product.objects.prefetch_related('variants')
+    results = price_products(products, discounts, taxes)
+    assert len(results) == len(product_list)
+    for product, availability in results:
+        assert availability == get_availability(product, discounts, taxes)
+
+
+def test_product_price_sheet(product, sale, site_settings, taxes):
+    sale.products.add(product)
+    discounts = [sale]
+    price_sheet = ProductPriceSheet(product, discounts, taxes)
+    assert price_sheet.availability == get_availability(
+        product, discounts, taxes)
+    for variant in product.variants.all():
+        variant_prices = price_sheet.get_variant_prices(variant)
+        assert variant_prices.price == variant.get_price(discounts, taxes)
+        assert variant_prices.price_undiscounted == variant.get_price(
+            taxes=taxes)
+        assert variant_prices.price_local_currency is None
+
+
+def test_product_json_ld_uses_price_sheet(product, sale):
+    sale.products.add(product)
+    price_sheet = ProductPriceSheet(product, [sale])
+    data = product_json_ld(product, price_sheet=price_sheet)
+    variant = product.variants.get()
+    offer = data['offers'][0]
+    assert offer['price'] == variant.get_price([sale]).net.amount
+
+
 def test_available_products_only_published(product_list):
     available_products = models.Product.objects.available_products()
     assert available_products.count() == 2
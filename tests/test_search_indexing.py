@@ -0,0 +1,123 @@
+import pytest
+from django.core.cache import cache
+from elasticsearch_dsl.connections import connections
+
+from saleor.product.models import Category, Product
+from saleor.search import indexing
+from saleor.search.documents import ProductDocument
+from saleor.search.indexing import (
+    REINDEX_TARGET_KEY, IndexingRejected, QueuedSignalProcessor,
+    flush_index_changes, queue_index_changes)
+from saleor.search.models import IndexChange
+from saleor.search.tasks import flush_index_changes_task
+
+DOC_TYPE = ProductDocument._doc_type.mapping.doc_type
+
+
+@pytest.fixture(autouse=True)
+def elasticsearch_connection():
+    connections.create_connection('default', hosts=['http://search:9200'])
+
+
+@pytest.fixture
+def sent_actions(monkeypatch):
+    actions = []
+
+    def fake_bulk(client, new_actions, **kwargs):
+        new_actions = list(new_actions)
+        actions.extend(new_actions)
+        return len(new_actions), []
+
+    monkeypatch.setattr(indexing, 'bulk', fake_bulk)
+    return actions
+
+
+def test_queue_index_changes_deduplicates(product):
+    queue_index_changes(Product, [product.pk, product.pk])
+    queue_index_changes(Product, [product.pk])
+    change = IndexChange.objects.get()
+    assert (change.model, change.object_id) == ('product.Product', product.pk)
+
+
+def test_signal_processor_queues_indexed_models(product, category):
+    processor = QueuedSignalProcessor(connections)
+    try:
+        product.save()
+        category.save()
+    finally:
+        processor.teardown()
+    assert list(IndexChange.objects.values_list('model', 'object_id')) == [
+        ('product.Product', product.pk)]
+
+
+def test_flush_index_changes(product, sent_actions):
+    missing_pk = product.pk + 1
+    queue_index_changes(Product, [product.pk, missing_pk])
+    assert flush_index_changes(batch_size=10) == 2
+    assert [
+        (action['_op_type'], action['_id']) for action in sent_actions] == [
+            ('index', product.pk), ('delete', missing_pk)]
+    assert sent_actions[0]['_source']['name'] == product.name
+    assert not IndexChange.objects.exists()
+
+
+def test_flush_index_changes_keeps_changes_queued_again(
+        product, monkeypatch):
+    queue_index_changes(Product, [product.pk])
+
+    def bulk_and_save(client, actions, **kwargs):
+        queue_index_changes(Product, [product.pk])
+        return len(list(actions)), []
+
+    monkeypatch.setattr(indexing, 'bulk', bulk_and_save)
+    assert flush_index_changes(batch_size=10) == 1
+    assert IndexChange.objects.get().object_id == product.pk
+
+
+def test_flush_index_changes_writes_to_rebuilt_index(product, sent_actions):
+    queue_index_changes(Product, [product.pk])
+    cache.set(REINDEX_TARGET_KEY % ('storefront', ), 'storefront-new')
+    try:
+        flush_index_changes(batch_size=10)
+    finally:
+        cache.delete(REINDEX_TARGET_KEY % ('storefront', ))
+    assert [action['_index'] for action in sent_actions] == [
+        'storefront', 'storefront-new']
+
+
+def test_flush_index_changes_keeps_rejected_changes(
+        product, category, monkeypatch):
+    other_product = Product.objects.create(
+        name='Other', price=product.price, product_type=product.product_type,
+        category=category)
+    queue_index_changes(Product, [product.pk, other_product.pk])
+    rejected = {'index': {
+        '_type': DOC_TYPE, '_id': str(product.pk), 'status': 429}}
+    monkeypatch.setattr(
+        indexing, 'bulk', lambda client, actions, **kwargs: (1, [rejected]))
+    with pytest.raises(IndexingRejected):
+        flush_index_changes(batch_size=10)
+    assert IndexChange.objects.get().object_id == product.pk
+
+
+def test_flush_index_changes_requeues_changes_not_sent(product, monkeypatch):
+    queue_index_changes(Product, [product.pk])
+
+    def failing_bulk(client, actions, **kwargs):
+        assert not IndexChange.objects.exists()
+        raise ConnectionError('Elasticsearch is down')
+
+    monkeypatch.setattr(indexing, 'bulk', failing_bulk)
+    with pytest.raises(ConnectionError):
+        flush_index_changes(batch_size=10)
+    assert IndexChange.objects.get().object_id == product.pk
+
+
+def test_flush_index_changes_task_sends_all_batches(
+        product, sent_actions, settings):
+    settings.SEARCH_INDEX_BATCH_SIZE = 1
+    queue_index_changes(Product, [product.pk])
+    queue_index_changes(Category, [product.category_id])
+    flush_index_changes_task.delay()
+    assert len(sent_actions) == 1
+    assert not IndexChange.objects.exists()
@@ -0,0 +1,154 @@
+import json
+
+import graphene
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from tests.utils import get_graphql_content
+
+from saleor.order.models import OrderLine
+from saleor.product.models import Category, CategoryTranslation, Product
+from saleor.search.index_log import (
+    LOG_RETENTION, log_index_changes, write_log_state)
+from saleor.search.models import IndexLogEntry
+from saleor.search.suggestions import (
+    CATEGORY, COLLECTION, DEFAULT_LANGUAGE, PRODUCT, SUGGESTIONS_INDEX,
+    SuggestionIndex, get_suggestion_index, get_suggestions,
+    invalidate_suggestion_index, normalize, rebuild_suggestion_index,
+    update_suggestion_index, write_suggestion_index)
+
+
+@pytest.fixture(autouse=True)
+def search_enabled(settings):
+    settings.ENABLE_SEARCH = True
+
+
+def test_normalize():
+    assert normalize('  Café-Crème, 100%  ') == 'cafe creme 100'
+
+
+def test_get_suggestions_by_word_prefix(product, collection):
+    rebuild_suggestion_index()
+    suggestions = get_suggestions('prod', 'en')
+    assert [(s['kind'], s['pk']) for s in suggestions] == [
+        (PRODUCT, product.pk)]
+    assert suggestions[0]['name'] == product.name
+    assert suggestions[0]['url'] == product.get_absolute_url()
+    suggestions = get_suggestions('COLL', 'en')
+    assert [(s['kind'], s['pk']) for s in suggestions] == [
+        (COLLECTION, collection.pk)]
+    assert get_suggestions('duct', 'en') == []
+    assert get_suggestions('  ', 'en') == []
+
+
+def test_get_suggestions_ranked_by_popularity(product, category, order):
+    product.name = 'Default product'
+    product.save()
+    OrderLine.objects.create(
+        order=order, variant=product.variants.first(), quantity=3,
+        product_name=product.name, product_sku='SKU',
+        is_shipping_required=True, unit_price_net=product.price,
+        unit_price_gross=product.price)
+    rebuild_suggestion_index()
+    suggestions = get_suggestions('default', 'en')
+    assert [(s['kind'], s['pk']) for s in suggestions] == [
+        (PRODUCT, product.pk), (CATEGORY, category.pk)]
+    assert get_suggestions('default', 'en', limit=1)[0]['pk'] == product.pk
+
+
+def test_suggestion_index_ranks_all_matches(tmpdir):
+    path = str(tmpdir.join('ranked.idx'))
+    entries = [
+        ('\0a%04d' % (index, ), 1, (PRODUCT, index, 'A%04d' % (index, ), '/'))
+        for index in range(2000)]
+    entries.append(('\0az', 5, (CATEGORY, 1, 'Az', '/')))
+    write_suggestion_index(entries, path)
+    matches = SuggestionIndex(path).lookup(DEFAULT_LANGUAGE, 'a', limit=2)
+    assert [payload[:2] for dummy_popularity, payload in matches] == [
+        (CATEGORY, 1), (PRODUCT, 0)]
+
+
+def test_get_suggestions_translated(category):
+    CategoryTranslation.objects.create(
+        category=category, language_code='de', name='Standardkategorie')
+    rebuild_suggestion_index()
+    assert get_suggestions('standard', 'en') == []
+    suggestions = get_suggestions('standard', 'de')
+    assert suggestions[0]['name'] == 'Standardkategorie'
+    suggestions = get_suggestions('default', 'de')
+    assert suggestions[0]['name'] == 'Default'
+
+
+def test_update_suggestion_index(product, collection):
+    rebuild_suggestion_index()
+    entries = len(get_suggestion_index())
+    Product.objects.filter(pk=product.pk).update(is_published=False)
+    update_suggestion_index(PRODUCT, [product.pk])
+    assert get_suggestions('test product', 'en') == []
+    assert len(get_suggestion_index()) == entries - 2
+    assert get_suggestions('collection', 'en')
+
+
+def test_suggestion_index_updated_on_save(transactional_db, category):
+    get_suggestion_index()
+    category.name = 'Renamed'
+    category.save()
+    assert get_suggestions('renamed', 'en')[0]['pk'] == category.pk
+    category.delete()
+    assert get_suggestions('renamed', 'en') == []
+
+
+def test_suggestion_index_applies_logged_changes(category):
+    get_suggestion_index()
+    Category.objects.filter(pk=category.pk).update(name='Renamed')
+    log_index_changes(SUGGESTIONS_INDEX, CATEGORY, [category.pk])
+    assert get_suggestions('renamed', 'en')[0]['pk'] == category.pk
+    assert IndexLogEntry.objects.get().object_id == category.pk
+
+
+def test_suggestion_index_rebuilt_after_log_is_pruned(category, settings):
+    get_suggestion_index()
+    Category.objects.filter(pk=category.pk).update(name='Renamed')
+    write_log_state(settings.SEARCH_SUGGESTIONS_PATH + '.log', {
+        'applied_at': (timezone.now() - LOG_RETENTION).timestamp(),
+        'applied_ids': []})
+    invalidate_suggestion_index()
+    assert get_suggestions('renamed', 'en')[0]['pk'] == category.pk
+
+
+def test_suggest_view(client, product):
+    url = reverse('search:suggest')
+    response = client.get(url, {'q': 'test pr'})
+    assert response.status_code == 200
+    assert json.loads(response.content.decode()) == {
+        'suggestions': [{
+            'kind': PRODUCT, 'name': product.name,
+            'url': product.get_absolute_url()}]}
+
+
+def test_suggest_view_search_disabled(client, settings):
+    settings.ENABLE_SEARCH = False
+    response = client.get(reverse('search:suggest'), {'q': 'test'})
+    assert response.status_code == 404
+
+
+def test_search_suggestions_query(user_api_client, product, category):
+    query = '''
+    query SearchSuggestions($query: String!) {
+        searchSuggestions(query: $query, first: 1) {
+            id
+            kind
+            name
+            url
+        }
+    }
+    '''
+    response = user_api_client.post(
+        reverse('api'), {
+            'query': query, 'variables': json.dumps({'query': 'test'})})
+    content = get_graphql_content(response)
+    assert 'errors' not in content
+    assert content['data']['searchSuggestions'] == [{
+        'id': graphene.Node.to_global_id('Product', product.pk),
+        'kind': 'PRODUCT', 'name': product.name,
+        'url': product.get_absolute_url()}]
@@ -1,9 +1,10 @@
 import pytest
 
+from saleor.core.utils.translations import prefetch_translations
 from saleor.product.models import (
     AttributeChoiceValueTranslation, CategoryTranslation,
-    CollectionTranslation, ProductAttributeTranslation, ProductTranslation,
-    ProductVariantTranslation)
+    CollectionTranslation, Product, ProductAttributeTranslation,
+    ProductTranslation, ProductVariantTranslation)
 from saleor.shipping.models import ShippingMethodTranslation
 
 
@@ -71,6 +72,38 @@ def test_translation_not_override_id(
     assert not translated_product.id == product_translation_fr
 
 
+def test_wrapper_is_memoized_per_language(
+        product, settings, product_translation_fr):
+    product = Product.objects.prefetch_related('translations').get(
+        pk=product.pk)
+    assert product.translated is product.translated
+    settings.LANGUAGE_CODE = 'fr'
+    assert product.translated.translation == product_translation_fr
+    assert product.translated is product.translated
+
+
+def test_wrapper_follows_saved_translations(product, settings):
+    settings.LANGUAGE_CODE = 'fr'
+    assert product.translated.name == product.name
+    ProductTranslation.objects.create(
+        language_code='fr', product=product, name='French name')
+    assert product.translated.name == 'French name'
+
+
+def test_prefetch_translations_fetches_active_language_only(
+        product, settings, product_translation_fr, product_translation_pl,
+        django_assert_num_queries):
+    settings.LANGUAGE_CODE = 'fr'
+    products = prefetch_translations(
+        Product.objects.filter(pk=product.pk), 'translations',
+        'category__translations')
+    product = products.get()
+    assert product._prefetched_translations_fr == [product_translation_fr]
+    with django_assert_num_queries(0):
+        assert product.translated.name == 'French name'
+        assert product.category.translated.name == product.category.name
+
+
 def test_collection_translation(settings, collection):
     settings.LANGUAGE_CODE = 'fr'
     french_name = 'French name'